@@ -2,7 +2,7 @@ from typing import Dict
 from pathlib import Path
 
 from gsuid_core.data_store import get_res_path
-from gsuid_core.utils.plugins_config.models import GSC, GsStrConfig, GsBoolConfig, GsListStrConfig
+from gsuid_core.utils.plugins_config.models import GSC, GsIntConfig, GsStrConfig, GsBoolConfig, GsListStrConfig
 from gsuid_core.utils.plugins_config.gs_config import StringConfig
 
 # from gsuid_core.utils.database.base_models import DB_PATH
@@ -64,6 +64,46 @@ AI_CONFIG: Dict[str, GSC] = {
         "指定是否需要@才能触发AI服务",
         True,
     ),
+    "session_max_num": GsIntConfig(
+        "最多保留的会话数",
+        "内存中最多保留的对话会话(用户+群组)数量, 超出后淘汰最久未对话的会话",
+        2000,
+        100000,
+        [500, 2000, 5000, 20000],
+    ),
+    "session_idle_minutes": GsIntConfig(
+        "会话闲置淘汰时间(分钟)",
+        "会话超过该时间没有新对话则从内存中淘汰, 0为不限制",
+        60,
+        10080,
+        [0, 30, 60, 180, 1440],
+    ),
+    "session_spill": GsBoolConfig(
+        "淘汰会话落盘",
+        "被淘汰会话的对话历史保存到本地SQLite, 用户再次对话时恢复, 关闭则直接丢弃",
+        True,
+    ),
+    "embedding_batch_size": GsIntConfig(
+        "向量计算批大小",
+        "同一时间窗口内的并发查询会合并为一次向量计算, 该值为单批最多合并的条数",
+        32,
+        256,
+        [8, 16, 32, 64],
+    ),
+    "embedding_batch_wait": GsIntConfig(
+        "向量计算合批等待(毫秒)",
+        "收到查询后最多等待该时间以合并更多查询, 0为不等待",
+        5,
+        100,
+        [0, 2, 5, 10, 20],
+    ),
+    "embedding_cache_size": GsIntConfig(
+        "查询向量缓存条数",
+        "按查询文本缓存计算好的向量, 同一条消息在意图识别/工具检索/知识检索中只计算一次",
+        2048,
+        100000,
+        [512, 1024, 2048, 8192],
+    ),
 }
 
 OPENAI_CONFIG: Dict[str, GSC] = {
@@ -15,6 +15,7 @@ from gsuid_core.data_store import AI_CORE_PATH
 from gsuid_core.ai_core.ai_config import ai_config
 
 from .register import get_registered_tools
+from .embedding_service import EmbeddingService
 
 enable_ai: bool = ai_config.get_config("enable").data
 MODELS_CACHE = AI_CORE_PATH / "models_cache"
@@ -45,6 +46,13 @@ if enable_ai:
 else:
     logger.info("🧠 [AI][Embedding] 未启用 Embedding 功能，将跳过加载模型, AI功能均不可用...")
 
+embedding_service = EmbeddingService(
+    embedding_model,
+    batch_size=ai_config.get_config("embedding_batch_size").data,
+    batch_wait=ai_config.get_config("embedding_batch_wait").data / 1000,
+    cache_size=ai_config.get_config("embedding_cache_size").data,
+)
+
 
 def get_tool_id(tool_name: str) -> str:
     """根据工具名称生成固定的 UUID 作为 Qdrant 存储的唯一 ID"""
@@ -102,6 +110,8 @@ async def sync_tools_to_db():
 
     # 2. 对比差异 (Diff)
     points_to_upsert = []
+    # (工具名, 待计算向量的文本, payload), 最后统一批量计算向量
+    changed_tools = []
     local_tool_names = set(all_tools_metadata.keys())
     db_tool_names = set(existing_tools.keys())
 
@@ -122,12 +132,14 @@ async def sync_tools_to_db():
 
             # 使用 desc 生成向量（也可以组合 name 和 desc）
             text_to_embed = f"{raw_data['name']} - {raw_data['desc']}"
-            vector = list(embedding_model.embed([text_to_embed]))[0]
-
-            points_to_upsert.append(PointStruct(id=get_tool_id(name), vector=list(vector), payload=clean_payload))
+            changed_tools.append((name, text_to_embed, clean_payload))
         else:
             logger.info(f"🧠 [AI][Embedding] [跳过] 无需更新: {name}")
 
+    vectors = await embedding_service.embed_many([text for _, text, _ in changed_tools])
+    for (name, _, clean_payload), vector in zip(changed_tools, vectors):
+        points_to_upsert.append(PointStruct(id=get_tool_id(name), vector=vector, payload=clean_payload))
+
     # 找出本地已经删除，但数据库里还在的工具，执行删除
     tools_to_delete_names = db_tool_names - local_tool_names
     tools_to_delete_ids = [existing_tools[n]["id"] for n in tools_to_delete_names]
@@ -149,11 +161,11 @@ async def search_tools(query: str, limit: int = 5):
         raise RuntimeError("AI功能未启用，无法搜索工具")
 
     logger.info(f"🧠 [AI][Embedding][ToolSearch] 正在查询: {query}")
-    query_vec = list(embedding_model.embed([query]))[0]
+    query_vec = await embedding_service.embed(query)
 
     response = await client.query_points(
         collection_name=COLLECTION_NAME,
-        query=list(query_vec),
+        query=query_vec,
         limit=limit,
     )
     return response.points
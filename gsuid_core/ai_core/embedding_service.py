@@ -0,0 +1,168 @@
+"""
+Embedding 服务
+
+fastembed 的推理是同步计算, 直接在事件循环中调用会阻塞所有连接的消息处理。
+本服务将推理放到独立的工作线程中执行, 并且:
+    - 将同一时间窗口内的并发查询合并为一次`embed()`调用(微批处理)
+    - 以规范化后的查询文本为键做 LRU 缓存, 同一条消息在意图识别/工具检索/知识检索中只计算一次
+    - 相同文本的并发请求共用同一个计算结果
+"""
+
+import time
+import asyncio
+from typing import TYPE_CHECKING, Set, Dict, List, Tuple, Union, Optional
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from gsuid_core.logger import logger
+from gsuid_core.scheduler import LatencyHistogram
+
+if TYPE_CHECKING:
+    from fastembed import TextEmbedding
+
+Vector = List[float]
+
+
+def normalize_text(text: str) -> str:
+    """缓存键: 去除首尾空白并合并连续空白"""
+    return " ".join(text.split())
+
+
+class EmbeddingService:
+    def __init__(
+        self,
+        model: "Optional[TextEmbedding]",
+        batch_size: int = 32,
+        batch_wait: float = 0.005,
+        cache_size: int = 2048,
+    ):
+        self.model = model
+        self.batch_size = max(batch_size, 1)
+        self.batch_wait = batch_wait
+        self.cache_size = cache_size
+
+        self._cache: "OrderedDict[str, Vector]" = OrderedDict()
+        # 已提交但尚未得到结果的文本, 相同文本的请求共用一个 Future
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # (文本, 入队时间)
+        self._pending: List[Tuple[str, float]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="GsCore-Embedding")
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.batches = 0
+        self.batch_items = 0
+        self.max_batch = 0
+        self.queue_wait = LatencyHistogram()
+        self.embed_time = LatencyHistogram()
+
+    async def embed(self, text: str) -> Vector:
+        """获取单条查询文本的向量, 优先读取缓存"""
+        if self.model is None:
+            raise RuntimeError("AI功能未启用，无法计算向量")
+
+        key = normalize_text(text)
+        vector = self._cache.get(key)
+        if vector is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return vector
+        self.misses += 1
+
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+        else:
+            future = self._inflight[key] = asyncio.get_running_loop().create_future()
+            self._pending.append((key, time.perf_counter()))
+            self._schedule_flush()
+
+        vector = await asyncio.shield(future)
+        self._set_cache(key, vector)
+        return vector
+
+    async def embed_many(self, texts: List[str]) -> List[Vector]:
+        """批量计算文档向量, 不做规范化也不走缓存, 用于启动时同步工具与知识库"""
+        if self.model is None:
+            raise RuntimeError("AI功能未启用，无法计算向量")
+        if not texts:
+            return []
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._run_model, texts)
+
+    def _schedule_flush(self):
+        if len(self._pending) >= self.batch_size:
+            if self._flush_handle is not None:
+                self._flush_handle.cancel()
+                self._flush_handle = None
+            self._start_flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(self.batch_wait, self._start_flush)
+
+    def _start_flush(self):
+        task = asyncio.get_running_loop().create_task(self._flush())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _flush(self):
+        self._flush_handle = None
+        batch, self._pending = self._pending[: self.batch_size], self._pending[self.batch_size :]
+        if self._pending:
+            self._schedule_flush()
+        if not batch:
+            return
+
+        now = time.perf_counter()
+        for _, enqueued in batch:
+            self.queue_wait.observe((now - enqueued) * 1000)
+        self.batches += 1
+        self.batch_items += len(batch)
+        self.max_batch = max(self.max_batch, len(batch))
+
+        texts = [key for key, _ in batch]
+        loop = asyncio.get_running_loop()
+        try:
+            vectors = await loop.run_in_executor(self._executor, self._run_model, texts)
+        except Exception as e:
+            logger.exception(f"🧠 [AI][Embedding] 向量计算失败: {e}")
+            for key in texts:
+                future = self._inflight.pop(key)
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self.embed_time.observe((time.perf_counter() - now) * 1000)
+
+        for key, vector in zip(texts, vectors):
+            future = self._inflight.pop(key)
+            if not future.done():
+                future.set_result(vector)
+
+    def _run_model(self, texts: List[str]) -> List[Vector]:
+        assert self.model is not None
+        return [vector.tolist() for vector in self.model.embed(texts, batch_size=len(texts))]
+
+    def _set_cache(self, key: str, vector: Vector):
+        self._cache[key] = vector
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def get_stats(self) -> Dict[str, Union[int, float, Dict]]:
+        total = self.hits + self.misses
+        return {
+            "cache_size": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "coalesced": self.coalesced,
+            "pending": len(self._pending),
+            "batches": self.batches,
+            "avg_batch": round(self.batch_items / self.batches, 2) if self.batches else 0.0,
+            "max_batch": self.max_batch,
+            "queue_wait_ms": self.queue_wait.to_dict(),
+            "embed_ms": self.embed_time.to_dict(),
+        }
@@ -0,0 +1,316 @@
+"""
+AI 对话历史存储
+
+- ConversationHistory: 以完整轮次(user + 后续 assistant / tool 消息)为单位存放在 deque 中,
+  每条消息在加入时计算一次 token 数, 超限时从最早的轮次整轮淘汰
+- SessionStore: 按 用户+群组 保存会话, 闲置超时或超出数量上限时按 LRU 淘汰,
+  可选将被淘汰会话的历史落盘到 SQLite, 该用户再次对话时恢复
+"""
+
+import json
+import time
+import asyncio
+import sqlite3
+from typing import TYPE_CHECKING, Any, Dict, List, Deque, Tuple, Callable, Iterator, Optional
+from pathlib import Path
+from functools import lru_cache
+from collections import OrderedDict, deque
+
+import tiktoken
+
+from gsuid_core.pool import to_thread
+from gsuid_core.logger import logger
+
+if TYPE_CHECKING:
+    from .openai_api import AsyncOpenAISession
+
+# 落盘的历史超过该时间未被恢复则清理
+SPILL_EXPIRE = 7 * 86400
+
+
+@lru_cache(maxsize=None)
+def get_tokenizer(model: Optional[str] = None) -> tiktoken.Encoding:
+    """获取模型对应的 tiktoken 编码器, 未知模型使用 cl100k_base (gpt-4, gpt-3.5-turbo)"""
+    if model:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            pass
+    return tiktoken.get_encoding("cl100k_base")
+
+
+def estimate_tokens(msg: Dict[str, Any], enc: Optional[tiktoken.Encoding] = None) -> int:
+    """使用 tiktoken 精确估算消息的 token 数"""
+    if enc is None:
+        enc = get_tokenizer()
+
+    total_tokens = 0
+    content = msg.get("content", "")
+    if isinstance(content, str):
+        total_tokens = len(enc.encode(content))
+    elif isinstance(content, list):
+        # 对于包含图片等的复杂内容，估算一个固定值
+        for item in content:
+            if isinstance(item, dict):
+                if item.get("type") == "text":
+                    text = item.get("text", "")
+                    total_tokens += len(enc.encode(text))
+                elif item.get("type") == "image_url":
+                    # 图片 token 估算 (gpt-4-vision 约为 85 + 170 * 瓦片数)
+                    total_tokens += 255  # 粗略估算
+
+    # 为每条消息增加结构化 Token 冗余（role, name 等字段约占 4-5 个 token）
+    return total_tokens + 5 if total_tokens > 0 else 5
+
+
+class Turn:
+    """一轮完整对话: 以 user 消息开头, 包含其后的 assistant / tool 消息"""
+
+    __slots__ = ("messages", "tokens")
+
+    def __init__(self, messages: List[Dict[str, Any]], tokens: List[int]):
+        self.messages = messages
+        self.tokens = tokens
+
+    @property
+    def token_count(self) -> int:
+        return sum(self.tokens)
+
+
+class ConversationHistory:
+    """
+    对话历史
+
+    可直接迭代得到按时间排序的全部消息, 用于拼接发送给 API 的 messages。
+    整轮淘汰保证不会切断工具调用链, 且最新的一轮始终保留。
+    """
+
+    def __init__(self):
+        self.turns: Deque[Turn] = deque()
+        self.token_count = 0
+        self.message_count = 0
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for turn in self.turns:
+            yield from turn.messages
+
+    def __len__(self) -> int:
+        return self.message_count
+
+    def append_turn(self, messages: List[Dict[str, Any]], enc: Optional[tiktoken.Encoding] = None):
+        tokens = [estimate_tokens(msg, enc) for msg in messages]
+        self._push(Turn(messages, tokens))
+
+    def _push(self, turn: Turn):
+        self.turns.append(turn)
+        self.token_count += turn.token_count
+        self.message_count += len(turn.messages)
+
+    def truncate(self, max_tokens: int) -> int:
+        """从最早的轮次开始整轮淘汰直到不超过 max_tokens, 返回删除的消息数"""
+        removed = 0
+        while self.token_count > max_tokens and len(self.turns) > 1:
+            turn = self.turns.popleft()
+            self.token_count -= turn.token_count
+            self.message_count -= len(turn.messages)
+            removed += len(turn.messages)
+        return removed
+
+    def clear(self):
+        self.turns.clear()
+        self.token_count = 0
+        self.message_count = 0
+
+    def dump(self) -> str:
+        return json.dumps(
+            [{"messages": turn.messages, "tokens": turn.tokens} for turn in self.turns],
+            ensure_ascii=False,
+        )
+
+    def load(self, data: str):
+        self.clear()
+        for turn in json.loads(data):
+            self._push(Turn(turn["messages"], turn["tokens"]))
+
+
+class HistorySpill:
+    """被淘汰会话的历史落盘, 使用独立的 SQLite 文件, 与主数据库无关"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10)
+        if not self._initialized:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS session_history ("
+                "session_id TEXT PRIMARY KEY, history TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "DELETE FROM session_history WHERE updated_at < ?",
+                (time.time() - SPILL_EXPIRE,),
+            )
+            conn.commit()
+            self._initialized = True
+        return conn
+
+    @to_thread
+    def save_many(self, items: List[Tuple[str, str]]):
+        if not items:
+            return
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO session_history (session_id, history, updated_at) VALUES (?, ?, ?)",
+                    [(session_id, history, now) for session_id, history in items],
+                )
+        finally:
+            conn.close()
+
+    @to_thread
+    def pop(self, session_id: str) -> Optional[str]:
+        """取出并删除落盘的历史, 会话恢复到内存后以内存为准"""
+        conn = self._connect()
+        try:
+            with conn:
+                row = conn.execute(
+                    "SELECT history FROM session_history WHERE session_id = ?",
+                    (session_id,),
+                ).fetchone()
+                if row is None:
+                    return None
+                conn.execute("DELETE FROM session_history WHERE session_id = ?", (session_id,))
+                return row[0]
+        finally:
+            conn.close()
+
+
+class SessionStore:
+    """
+    AI 会话存储
+
+    Args:
+        factory: 创建新会话的函数
+        max_sessions: 内存中最多保留的会话数
+        idle_ttl: 会话闲置超过该秒数后淘汰, 0为不限制
+        spill: 淘汰时落盘历史的存储, 为 None 时直接丢弃
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], "AsyncOpenAISession"],
+        max_sessions: int = 2000,
+        idle_ttl: float = 3600,
+        spill: Optional[HistorySpill] = None,
+    ):
+        self.factory = factory
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.spill = spill
+
+        # session_id -> (会话, 最后活跃时间), 按最后活跃时间排序
+        self._sessions: "OrderedDict[str, Tuple[AsyncOpenAISession, float]]" = OrderedDict()
+        self._lock = asyncio.Lock()
+        # session_id -> 正在进行的落盘任务, 恢复会话前需等待其完成
+        self._saving: Dict[str, "asyncio.Task[None]"] = {}
+
+        self.created = 0
+        self.restored = 0
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    async def get(self, session_id: str) -> "AsyncOpenAISession":
+        now = time.time()
+        item = self._sessions.get(session_id)
+        if item is not None:
+            self._sessions[session_id] = (item[0], now)
+            self._sessions.move_to_end(session_id)
+            await self._evict(now)
+            return item[0]
+
+        async with self._lock:
+            # 等待锁期间可能已被其他请求创建
+            item = self._sessions.get(session_id)
+            if item is not None:
+                return item[0]
+
+            session = self.factory()
+            self.created += 1
+            if self.spill is not None:
+                saving = self._saving.get(session_id)
+                if saving is not None:
+                    # 会话刚被淘汰、历史尚未写完时, 先等待写入, 否则会读不到这次的历史,
+                    # 而之后写入的历史也不会再被取回
+                    await asyncio.wait((saving,))
+                data = await self.spill.pop(session_id)
+                if data:
+                    try:
+                        session.history.load(data)
+                        self.restored += 1
+                    except (ValueError, KeyError, TypeError) as e:
+                        logger.warning(f"🧠 [AI][Session] 恢复会话 {session_id} 历史失败: {e}")
+            self._sessions[session_id] = (session, now)
+
+        await self._evict(now)
+        return session
+
+    async def _evict(self, now: float):
+        expired: List[Tuple[str, "AsyncOpenAISession"]] = []
+        while self._sessions:
+            session_id, (session, last_active) = next(iter(self._sessions.items()))
+            if len(self._sessions) <= self.max_sessions and (not self.idle_ttl or now - last_active < self.idle_ttl):
+                break
+            self._sessions.popitem(last=False)
+            expired.append((session_id, session))
+
+        if expired:
+            self.evicted += len(expired)
+            await self._spill(expired)
+
+    async def _spill(self, sessions: List[Tuple[str, "AsyncOpenAISession"]]):
+        if self.spill is None:
+            return
+        items = [(session_id, session.history.dump()) for session_id, session in sessions if len(session.history)]
+        if not items:
+            return
+        task = asyncio.create_task(self._save(items))
+        for session_id, _ in items:
+            self._saving[session_id] = task
+        # 调用方被取消时落盘仍继续进行
+        await asyncio.shield(task)
+
+    async def _save(self, items: List[Tuple[str, str]]):
+        assert self.spill is not None
+        try:
+            await self.spill.save_many(items)
+        except sqlite3.Error as e:
+            logger.warning(f"🧠 [AI][Session] 会话历史落盘失败: {e}")
+        finally:
+            task = asyncio.current_task()
+            for session_id, _ in items:
+                if self._saving.get(session_id) is task:
+                    del self._saving[session_id]
+
+    async def flush(self):
+        """将内存中全部会话的历史落盘, 用于关闭时保存"""
+        sessions = [(session_id, session) for session_id, (session, _) in self._sessions.items()]
+        self._sessions.clear()
+        await self._spill(sessions)
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "sessions": len(self._sessions),
+            "messages": sum(len(session.history) for session, _ in self._sessions.values()),
+            "tokens": sum(session.history.token_count for session, _ in self._sessions.values()),
+            "created": self.created,
+            "restored": self.restored,
+            "evicted": self.evicted,
+        }
@@ -9,7 +9,6 @@ from typing import Any, Dict, List, Tuple, Union, Optional, cast
 from pathlib import Path
 
 import aiofiles
-import tiktoken
 from bot import Bot
 from PIL import Image
 from models import Event
@@ -24,37 +23,12 @@ from gsuid_core.utils.resource_manager import RM
 from gsuid_core.utils.image.image_tools import image_to_base64
 
 from .models import ToolDef
+from .history import ConversationHistory, get_tokenizer
 
 FileInput = Union[str, Path]
 MessageUnion = Union[Dict, Any]
 
 
-# 使用 tiktoken 进行精确的 token 估算
-def estimate_tokens(msg: MessageUnion, enc: Optional[tiktoken.Encoding] = None) -> int:
-    """使用 tiktoken 精确估算消息的 token 数"""
-    if enc is None:
-        # 默认使用 cl100k_base (gpt-4, gpt-3.5-turbo)
-        enc = tiktoken.get_encoding("cl100k_base")
-
-    total_tokens = 0
-    content = msg.get("content", "")
-    if isinstance(content, str):
-        total_tokens = len(enc.encode(content))
-    elif isinstance(content, list):
-        # 对于包含图片等的复杂内容，估算一个固定值
-        for item in content:
-            if isinstance(item, dict):
-                if item.get("type") == "text":
-                    text = item.get("text", "")
-                    total_tokens += len(enc.encode(text))
-                elif item.get("type") == "image_url":
-                    # 图片 token 估算 (gpt-4-vision 约为 85 + 170 * 瓦片数)
-                    total_tokens += 255  # 粗略估算
-
-    # 为每条消息增加结构化 Token 冗余（role, name 等字段约占 4-5 个 token）
-    return total_tokens + 5 if total_tokens > 0 else 5
-
-
 class AgentState(Enum):
     """ReAct Agent 状态机状态"""
 
@@ -77,77 +51,30 @@ class AsyncOpenAISession:
         # 基础人设（所有模式下通用的部分）
         self.base_persona = system_prompt or "你是一个智能助手。"
         # 历史记录只保存 user 和 assistant 的对话，不保存 system 消息
-        self.history = []
+        self.history = ConversationHistory()
         # 配置：最大工具调用迭代次数，防止无限循环
         self.max_tool_iterations = max_tool_iterations
         # 配置：最大历史 token 数量，按 token 裁剪（粗略估算，每个中文字符约2-3个token）
         self.max_history_tokens = 6000
         # 配置：OpenAI API 最大输出 token 数
         self.max_tokens = 1800
-        # 当前历史记录的 token 数，避免每轮全量重新计算
-        self.current_token_count = 0
         # 初始化 tiktoken encoder
-        try:
-            self.tokenizer = tiktoken.encoding_for_model(model)
-        except KeyError:
-            # 如果模型未知，使用默认的 cl100k_base
-            self.tokenizer = tiktoken.get_encoding("cl100k_base")
+        self.tokenizer = get_tokenizer(model)
+
+    @property
+    def current_token_count(self) -> int:
+        """当前历史记录的 token 数，每条消息加入历史时计算一次"""
+        return self.history.token_count
 
     def _safe_truncate_history(self) -> None:
         """
         安全截断历史记录，避免切断工具链。
-        策略：
-        1. 成对删除消息（确保不删除单个消息导致角色错乱）
-        2. 如果遇到 tool 消息，必须连带删除对应的 assistant tool_call 消息
-        3. 保留至少一个完整的对话轮次
-        优化：使用 self.current_token_count 避免每轮全量重新计算
+        策略：按完整轮次（user + 后续 assistant / tool 消息）从最早的一轮开始删除，
+        最新的一轮始终保留。
         """
-        # 如果还没有计算过当前 token 数量，先计算一次
-        if self.current_token_count == 0:
-            self.current_token_count = sum(estimate_tokens(msg, self.tokenizer) for msg in self.history)
-
-        while True:
-            if self.current_token_count <= self.max_history_tokens or len(self.history) <= 2:
-                break
-
-            # 查找可以安全删除的最前面的消息组
-            # 策略：找到最早的 user 消息，然后删除 user + 后续的 assistant（包括 tool chain）
-            removed_count = 0
-            i = 0
-            while i < len(self.history) and removed_count == 0:
-                msg = self.history[i]
-                if isinstance(msg, dict) and msg.get("role") == "user":
-                    # 找到了最早的 user 消息，现在需要删除这个 user 以及后续关联的消息
-                    # 删除 user
-                    removed_msg = self.history.pop(i)
-                    removed_count += 1
-                    self.current_token_count -= estimate_tokens(removed_msg, self.tokenizer)
-
-                    # 继续删除后续关联的 assistant 和 tool 消息
-                    # 直到遇到下一个 user 或 history 结束
-                    while i < len(self.history):
-                        next_msg = self.history[i]
-                        if isinstance(next_msg, dict) and next_msg.get("role") == "user":
-                            # 遇到下一个 user，停止删除
-                            break
-
-                        # 只要不是 user，统统删掉（包括 assistant, tool，以及残留的其他内容）
-                        removed_msg = self.history.pop(i)
-                        removed_count += 1
-                        self.current_token_count -= estimate_tokens(removed_msg, self.tokenizer)
-                        # 此处不需要 i += 1，因为 pop 后元素自动前移
-                    break
-                i += 1
-
-            if removed_count > 0:
-                logger.debug(f"🧠 [AI][OpenAI] 历史消息 token 数超限，安全删除 {removed_count} 条消息")
-            else:
-                # 无法安全删除，直接删除最早的一条（保底策略）
-                removed_msg = self.history.pop(0)
-                self.current_token_count -= estimate_tokens(removed_msg, self.tokenizer)
-                logger.warning(
-                    f"🧠 [AI][OpenAI] 历史消息 token 数超限，强制删除最早消息: {removed_msg.get('role', 'unknown')}"
-                )
+        removed_count = self.history.truncate(self.max_history_tokens)
+        if removed_count > 0:
+            logger.debug(f"🧠 [AI][OpenAI] 历史消息 token 数超限，安全删除 {removed_count} 条消息")
 
     async def _process_file(self, file_path: FileInput) -> str:
         """
@@ -368,9 +295,7 @@ class AsyncOpenAISession:
                                 history_payload.append({"type": "text", "text": "[用户上传了一张图片]"})
                     msg["content"] = history_payload
 
-        for msg in new_history_messages:
-            self.history.append(msg)
-            self.current_token_count += estimate_tokens(msg, self.tokenizer)
+        self.history.append_turn(new_history_messages, self.tokenizer)
 
         logger.debug(f"🧠 [AI][ReAct] 历史记录已更新，新增 {len(new_history_messages)} 条消息")
         self._safe_truncate_history()
@@ -569,13 +494,7 @@ class AsyncOpenAISession:
 
     def reset_session(self, system_prompt: Optional[str] = None):
         """重置会话，可选择性更新基础人设"""
-        self.history = []
-        self.current_token_count = 0
-        # 重新初始化 tokenizer，防止缓存问题
-        try:
-            self.tokenizer = tiktoken.encoding_for_model(self.model)
-        except KeyError:
-            self.tokenizer = tiktoken.get_encoding("cl100k_base")
+        self.history.clear()
         if system_prompt:
             self.base_persona = system_prompt
 
@@ -9,7 +9,7 @@ from qdrant_client.models import Filter, Distance, MatchValue, PointStruct, Vect
 from qdrant_client.http.models.models import ScoredPoint
 
 from gsuid_core.logger import logger
-from gsuid_core.ai_core.embedding import DIMENSION, client, embedding_model
+from gsuid_core.ai_core.embedding import DIMENSION, client, embedding_model, embedding_service
 
 from .models import KnowledgeBase, KnowledgePoint
 from .register import _ENTITIES
@@ -89,6 +89,7 @@ async def sync_knowledge():
 
     # 2. 准备新数据
     points_to_upsert = []
+    changed_knowledge = []
     local_ids = set()
 
     logger.info(f"🧠 [RAG] 本地知识数量: {len(_ENTITIES)}")
@@ -109,21 +110,21 @@ async def sync_knowledge():
                 f"🧠 [RAG] [{knowledge['plugin']}] [{action_str}] 知识: {knowledge['category']}/{knowledge['title']}"
             )
 
-            # 生成向量
-            text_to_embed = build_embedding_text(knowledge)
-            vector = list(embedding_model.embed([text_to_embed]))[0]
-
             # 构建payload
             payload = knowledge.copy()
             payload["_hash"] = current_hash  # type: ignore
-
-            points_to_upsert.append(
-                PointStruct(
-                    id=get_knowledge_point_id(id_str),
-                    vector=list(vector),
-                    payload=payload,  # type: ignore
-                )
+            changed_knowledge.append((id_str, build_embedding_text(knowledge), payload))
+
+    # 生成向量, 变动的知识统一批量计算
+    vectors = await embedding_service.embed_many([text for _, text, _ in changed_knowledge])
+    for (id_str, _, payload), vector in zip(changed_knowledge, vectors):
+        points_to_upsert.append(
+            PointStruct(
+                id=get_knowledge_point_id(id_str),
+                vector=vector,
+                payload=payload,  # type: ignore
             )
+        )
 
     # 3. 执行更新
     if points_to_upsert:
@@ -175,7 +176,7 @@ async def query_knowledge(
     logger.info(f"🧠 [RAG] 查询知识: {query}")
 
     # 生成查询向量
-    query_vec = list(embedding_model.embed([query]))[0]
+    query_vec = await embedding_service.embed(query)
 
     # 构建过滤条件
     filter_condition = None
@@ -200,7 +201,7 @@ async def query_knowledge(
     # 查询向量库
     response = await client.query_points(
         collection_name=COLLECTION_NAME,
-        query=list(query_vec),
+        query=query_vec,
         limit=limit,
         query_filter=filter_condition,
         with_payload=True,
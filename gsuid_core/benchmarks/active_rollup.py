@@ -0,0 +1,122 @@
+"""
+看板活跃指标基准测试
+
+在临时 SQLite 数据库中生成约100万行、跨度31天的`CoreDataAnalysis`合成数据, 对比:
+    - 旧方式: `_get_stats_for_type`的5条 COUNT(DISTINCT) / NOT IN 查询
+    - 活跃位图: 首次查询时回填位图的一次性耗时, 以及之后每次查询的耗时
+分别统计全部机器人与单个机器人过滤两种情况, 并校验两种方式的结果一致。
+
+运行: python -m gsuid_core.benchmarks.active_rollup [行数]
+"""
+
+import sys
+import time
+import random
+import asyncio
+import sqlite3
+import tempfile
+from typing import Dict, Tuple, Callable, Optional, Awaitable
+from pathlib import Path
+from datetime import date, timedelta
+
+from sqlmodel import SQLModel
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from gsuid_core.utils.database import base_models
+from gsuid_core.utils.database.active_rollup import ActiveRollup
+from gsuid_core.utils.database.global_val_models import DataType, CoreDataAnalysis
+
+ROW_NUM = 1_000_000
+DAYS = 31
+BOTS = [("onebot", "10001"), ("onebot", "10002"), ("qqgroup", "20001")]
+USER_POOL = 80_000
+GROUP_POOL = 4_000
+COMMANDS = [f"cmd_{i}" for i in range(40)]
+
+
+def build_db(path: Path, rows: int):
+    """从今天往前31天生成数据, 用户活跃度服从长尾分布"""
+    rng = random.Random(20240601)
+    today = date.today()
+    conn = sqlite3.connect(path)
+    analysis = set()
+    summary = set()
+    while len(analysis) < rows:
+        day = today - timedelta(days=rng.randrange(DAYS))
+        bot_id, bot_self_id = rng.choice(BOTS)
+        if rng.random() < 0.8:
+            data_type, target = "USER", str(10**8 + int(rng.paretovariate(0.6)) % USER_POOL)
+        else:
+            data_type, target = "GROUP", str(10**6 + int(rng.paretovariate(0.8)) % GROUP_POOL)
+        analysis.add((data_type, target, rng.choice(COMMANDS), day.isoformat(), bot_id, bot_self_id))
+        summary.add((day.isoformat(), bot_id, bot_self_id))
+
+    conn.executemany(
+        "INSERT INTO coredataanalysis (data_type, target_id, command_name, command_count, date, bot_id, bot_self_id)"
+        " VALUES (?, ?, ?, 1, ?, ?, ?)",
+        [(t, tid, cmd, d, b, s) for t, tid, cmd, d, b, s in analysis],
+    )
+    conn.executemany(
+        "INSERT INTO coredatasummary (receive, send, command, image, user_count, group_count,"
+        " date, bot_id, bot_self_id) VALUES (0, 0, 0, 0, 0, 0, ?, ?, ?)",
+        list(summary),
+    )
+    conn.commit()
+    conn.close()
+
+
+async def timeit(func: Callable[[], Awaitable]) -> Tuple[float, object]:
+    start = time.perf_counter()
+    result = await func()
+    return (time.perf_counter() - start) * 1000, result
+
+
+async def old_stats(data_type: DataType, bot_self_id: Optional[str]) -> Dict:
+    today = date.today()
+    return await CoreDataAnalysis._get_stats_for_type(
+        data_type,
+        today,
+        today - timedelta(days=30),
+        today - timedelta(days=7),
+        None,
+        bot_self_id,
+    )
+
+
+async def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else ROW_NUM
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bench.db"
+        engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+        base_models.async_maker = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+
+        start = time.perf_counter()
+        build_db(path, rows)
+        print("=" * 64)
+        print(f"CoreDataAnalysis 行数: {rows}  天数: {DAYS}  生成耗时: {time.perf_counter() - start:.1f}s")
+        print("-" * 64)
+
+        rollup = ActiveRollup()
+        backfill_ms, _ = await timeit(lambda: rollup.backfill(date.today()))
+        print(f"{'首次回填位图(一次性)':<28}{backfill_ms:>12.1f} ms")
+
+        print(f"{'':<28}{'旧方式(ms)':>12}{'位图(ms)':>12}{'加速':>10}")
+        for bot_self_id in (None, BOTS[0][1]):
+            for data_type in DataType:
+                name = f"{data_type.value} / {bot_self_id or 'all'}"
+                old_ms, old = await timeit(lambda: old_stats(data_type, bot_self_id))
+                new_ms, new = await timeit(lambda: rollup.get_stats(data_type, date.today(), None, bot_self_id))
+                assert isinstance(old, dict) and isinstance(new, dict)
+                for key in ("mau", "new"):
+                    assert old[key] == new[key], f"{name} {key}: {old[key]} != {new[key]}"
+                for key in ("dau_dag", "out_rate", "stickiness"):
+                    assert abs(float(old[key]) - new[key]) < 1e-6, f"{name} {key}: {old[key]} != {new[key]}"
+                print(f"{name:<28}{old_ms:>12.1f}{new_ms:>12.1f}{old_ms / new_ms:>9.0f}x")
+        print("=" * 64)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
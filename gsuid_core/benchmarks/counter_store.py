@@ -0,0 +1,124 @@
+"""
+指令统计计数器基准测试
+
+模拟一天内10万用户、2000个群组在3个机器人上触发指令, 对比:
+    - 旧方式: `bot_val`嵌套字典 {bot_id: {bot_self_id: {"user": {用户: {指令: 次数}}}}}
+    - 计数器: `CounterStore`的驻留 + array 列存储
+统计写入耗时与`tracemalloc`测得的内存占用, 并校验两种方式的快照一致。
+
+运行: python -m gsuid_core.benchmarks.counter_store [触发次数]
+"""
+
+import sys
+import time
+import random
+import tracemalloc
+from copy import deepcopy
+from typing import Dict, List, Tuple, Callable, Optional
+
+from gsuid_core import counter_store
+from gsuid_core.counter_store import Interner, CounterStore
+
+EVENT_NUM = 1_000_000
+BOTS = [("onebot", "10001"), ("onebot", "10002"), ("qqgroup", "20001")]
+USER_POOL = 100_000
+GROUP_POOL = 2_000
+COMMANDS = [f"cmd_{i}" for i in range(60)]
+
+Event = Tuple[str, str, str, Optional[str], str]
+
+
+def build_events(num: int) -> List[Event]:
+    rng = random.Random(20240601)
+    events = []
+    for _ in range(num):
+        bot_id, bot_self_id = rng.choice(BOTS)
+        user_id = str(10**8 + rng.randrange(USER_POOL))
+        group_id = str(10**6 + rng.randrange(GROUP_POOL)) if rng.random() < 0.7 else None
+        events.append((bot_id, bot_self_id, user_id, group_id, rng.choice(COMMANDS)))
+    return events
+
+
+def old_count(events: List[Event]) -> Dict:
+    """与改动前`count_data`相同的写法"""
+    bot_val: Dict = {}
+    template = {"receive": 0, "send": 0, "command": 0, "image": 0, "user_count": 0, "group_count": 0}
+    for bot_id, bot_self_id, user_id, group_id, keyword in events:
+        local_val = bot_val.setdefault(bot_id, {}).setdefault(bot_self_id, None)
+        if local_val is None:
+            local_val = bot_val[bot_id][bot_self_id] = deepcopy(template) | {"group": {}, "user": {}}
+        local_val["command"] += 1
+        if group_id:
+            if group_id not in local_val["group"]:
+                local_val["group"][group_id] = {}
+            if keyword not in local_val["group"][group_id]:
+                local_val["group"][group_id][keyword] = 1
+            else:
+                local_val["group"][group_id][keyword] += 1
+            local_val["group_count"] = len(local_val["group"])
+        if user_id:
+            if user_id not in local_val["user"]:
+                local_val["user"][user_id] = {}
+            if keyword not in local_val["user"][user_id]:
+                local_val["user"][user_id][keyword] = 1
+            else:
+                local_val["user"][user_id][keyword] += 1
+            local_val["user_count"] = len(local_val["user"])
+    return bot_val
+
+
+def new_count(events: List[Event]) -> CounterStore:
+    # 驻留表是进程级的, 每次测量前重置, 使其内存计入结果
+    counter_store.targets = Interner()
+    counter_store.commands = Interner()
+    store = CounterStore()
+    for bot_id, bot_self_id, user_id, group_id, keyword in events:
+        store.count_command(bot_id, bot_self_id, user_id, group_id, keyword)
+    return store
+
+
+def measure(func: Callable, events: List[Event]) -> Tuple[float, float, object]:
+    """写入耗时与内存分两次测量, 避免 tracemalloc 拖慢计时"""
+    start = time.perf_counter()
+    func(events)
+    elapsed = (time.perf_counter() - start) * 1000
+
+    tracemalloc.start()
+    result = func(events)
+    size = tracemalloc.get_traced_memory()[0] / 1024 / 1024
+    tracemalloc.stop()
+    return elapsed, size, result
+
+
+def main():
+    num = int(sys.argv[1]) if len(sys.argv) > 1 else EVENT_NUM
+    events = build_events(num)
+
+    old_ms, old_mb, bot_val = measure(old_count, events)
+    new_ms, new_mb, store = measure(new_count, events)
+    assert isinstance(bot_val, dict) and isinstance(store, CounterStore)
+
+    for bot_id, bot_self_id in BOTS:
+        old = bot_val[bot_id][bot_self_id]
+        new = store.snapshot(bot_id, bot_self_id)
+        for key in ("command", "user_count", "group_count", "user", "group"):
+            assert old[key] == new[key], f"{bot_id}/{bot_self_id} {key} 不一致"
+    pairs = sum(len(store.get(b, s).user) + len(store.get(b, s).group) for b, s in BOTS)
+    users = sum(store.get(b, s).user_count for b, s in BOTS)
+
+    print("=" * 64)
+    print(f"触发次数: {num}  (目标, 指令)对: {pairs}  用户(按机器人计): {users}")
+    print("-" * 64)
+    print(f"{'':<16}{'写入(ms)':>12}{'内存(MB)':>12}{'每用户(B)':>14}")
+    for name, ms, mb in (("嵌套字典", old_ms, old_mb), ("CounterStore", new_ms, new_mb)):
+        print(f"{name:<16}{ms:>12.1f}{mb:>12.1f}{mb * 1024 * 1024 / users:>14.0f}")
+
+    start = time.perf_counter()
+    for _ in range(1000):
+        store.summary()
+    print(f"{'summary() 全平台':<16}{(time.perf_counter() - start):>12.3f} ms/次")
+    print("=" * 64)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+数据库会话往返次数基准测试
+
+在临时 SQLite 数据库(WAL)中执行几种常见流程, 统计每次流程的连接借出次数、提交次数、SQL 语句数与耗时:
+    - 改动前: 嵌套的`with_session`方法各自打开会话并提交
+    - 改动后: 嵌套调用加入外层会话, 在 SAVEPOINT 中执行; 多步写入放在`db.transaction()`中只提交一次
+流程包括 记录用户(新用户/已存在)、群用户数、绑定UID, 以及插件常见的 写入Cookie + 绑定UID + 读取 组合,
+并校验两种方式执行后数据库中的数据一致。
+
+运行: python -m gsuid_core.benchmarks.db_session [每种流程的次数]
+"""
+
+import sys
+import time
+import asyncio
+import tempfile
+from typing import Dict, List, Tuple, Callable, Awaitable
+from pathlib import Path
+from unittest import mock
+
+from sqlmodel import SQLModel, select
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from gsuid_core.utils.database import base_models
+from gsuid_core.utils.database.models import GsBind, GsUser, CoreUser
+from gsuid_core.utils.database.base_models import db
+
+RUN_NUM = 200
+
+
+class Counter:
+    def __init__(self):
+        self.checkout = 0
+        self.commit = 0
+        self.statement = 0
+
+    def snapshot(self) -> Tuple[int, int, int]:
+        return self.checkout, self.commit, self.statement
+
+
+async def setup(path: Path, counter: Counter):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}", connect_args={"check_same_thread": False})
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def set_sqlite_pragma(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
+    @event.listens_for(engine.sync_engine.pool, "checkout")
+    def on_checkout(*args):
+        counter.checkout += 1
+
+    @event.listens_for(engine.sync_engine, "commit")
+    def on_commit(*args):
+        counter.commit += 1
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def on_execute(*args):
+        counter.statement += 1
+
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    base_models.engine = engine
+    base_models.async_maker = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    base_models.sqlite_semaphore = asyncio.Semaphore(20)
+    return engine
+
+
+async def plugin_flow(i: int):
+    """插件登录后的常见写法: 写入Cookie、绑定UID、读回用户数据"""
+    uid = str(100000000 + i)
+    async with db.transaction():
+        await GsUser.full_insert_data(
+            bot_id="onebot",
+            user_id=str(i),
+            uid=uid,
+            cookie=f"ltuid={i}; cookie_token=token{i}",
+            status=None,
+            push_switch="off",
+            sign_switch="off",
+        )
+        await GsBind.insert_uid(str(i), "onebot", uid, None, 9)
+        await GsUser.select_data_by_uid(uid)
+
+
+FLOWS: List[Tuple[str, Callable[[int], Awaitable]]] = [
+    ("记录用户(新用户)", lambda i: CoreUser.insert_user("onebot", str(i), "10001", f"user{i}", "1")),
+    ("记录用户(已存在)", lambda i: CoreUser.insert_user("onebot", str(i), "10001", f"user{i}", "1")),
+    ("群用户数", lambda i: CoreUser.get_group_all_user_count("10001")),
+    ("绑定UID", lambda i: GsBind.insert_uid(str(i), "onebot", str(200000000 + i), None, 9)),
+    ("写入Cookie+绑定+读取", plugin_flow),
+]
+
+
+async def dump() -> Dict[str, list]:
+    """只比较业务字段, 忽略自增ID"""
+    result = {}
+    async with base_models.async_maker() as session:
+        for table, columns in (
+            (CoreUser, (CoreUser.bot_id, CoreUser.user_id, CoreUser.group_id, CoreUser.user_name)),
+            (GsBind, (GsBind.bot_id, GsBind.user_id, GsBind.uid)),
+            (GsUser, (GsUser.bot_id, GsUser.user_id, GsUser.uid, GsUser.cookie)),
+        ):
+            rows = await session.execute(select(*columns))
+            result[table.__name__] = sorted(tuple(row) for row in rows.all())
+    return result
+
+
+async def run_all(path: Path, num: int, old: bool) -> Tuple[List[Tuple[float, float, float, float]], Dict]:
+    counter = Counter()
+    engine = await setup(path, counter)
+    stats = []
+    # 改动前不存在外层会话, 每个方法各自打开会话
+    patch = mock.patch.object(base_models, "_get_current", lambda: None) if old else mock.MagicMock()
+    with patch:
+        for _, flow in FLOWS:
+            before = counter.snapshot()
+            start = time.perf_counter()
+            for i in range(num):
+                await flow(i)
+            elapsed = (time.perf_counter() - start) * 1000
+            after = counter.snapshot()
+            stats.append((*((a - b) / num for a, b in zip(after, before)), elapsed / num))
+        data = await dump()
+    await engine.dispose()
+    return stats, data
+
+
+async def main():
+    num = int(sys.argv[1]) if len(sys.argv) > 1 else RUN_NUM
+    with tempfile.TemporaryDirectory() as tmp:
+        old_stats, old_data = await run_all(Path(tmp) / "old.db", num, True)
+        new_stats, new_data = await run_all(Path(tmp) / "new.db", num, False)
+    assert old_data == new_data, "两种方式写入的数据不一致"
+
+    print("=" * 84)
+    print(f"每种流程执行 {num} 次, 数值为每次流程的平均值 (改动前 -> 改动后)")
+    print("-" * 84)
+    print(f"{'流程':<22}{'连接':>12}{'提交':>12}{'语句':>14}{'耗时(ms)':>18}")
+    for (name, _), old, new in zip(FLOWS, old_stats, new_stats):
+        cols = [f"{o:.1f} -> {n:.1f}" for o, n in zip(old[:3], new[:3])]
+        print(f"{name:<22}{cols[0]:>12}{cols[1]:>12}{cols[2]:>14}{f'{old[3]:.2f} -> {new[3]:.2f}':>18}")
+    print("=" * 84)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
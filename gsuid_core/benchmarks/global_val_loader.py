@@ -0,0 +1,139 @@
+"""
+统计数据读取基准测试
+
+在临时 SQLite 数据库中为多个机器人生成7天的`CoreDataSummary`/`CoreDataAnalysis`数据, 对比:
+    - 旧方式: 每天查询概要行, 再为每个概要行查询一次明细 ORM 对象, 逐个转换后合并(N+1)
+    - 新方式: `get_global_val_range`一次读取整个日期范围的概要与按列流式读取的明细
+并校验两种方式得到的接收/发送/指令/图片计数与用户/群组集合一致。
+
+运行: python -m gsuid_core.benchmarks.global_val_loader [每个机器人每天的明细行数]
+"""
+
+import sys
+import time
+import random
+import asyncio
+import sqlite3
+import tempfile
+from copy import deepcopy
+from typing import Dict, List, Tuple
+from pathlib import Path
+from datetime import date, timedelta
+
+from sqlmodel import SQLModel
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from gsuid_core import global_val as gv
+from gsuid_core.utils.database import base_models
+from gsuid_core.utils.database.global_val_models import DataType, CoreDataSummary, CoreDataAnalysis
+
+ROWS_PER_BOT_DAY = 2_000
+DAYS = 7
+BOTS = [("onebot", str(10000 + i)) for i in range(40)]
+USER_POOL = 30_000
+GROUP_POOL = 1_000
+COMMANDS = [f"cmd_{i}" for i in range(40)]
+
+
+def build_db(path: Path, rows: int):
+    rng = random.Random(20240601)
+    today = date.today()
+    conn = sqlite3.connect(path)
+    analysis = []
+    summary = []
+    for day in range(DAYS):
+        d = (today - timedelta(days=day)).isoformat()
+        for bot_id, bot_self_id in BOTS:
+            seen = set()
+            while len(seen) < rows:
+                if rng.random() < 0.8:
+                    key = ("USER", str(10**8 + rng.randrange(USER_POOL)), rng.choice(COMMANDS))
+                else:
+                    key = ("GROUP", str(10**6 + rng.randrange(GROUP_POOL)), rng.choice(COMMANDS))
+                seen.add(key)
+            analysis.extend((t, tid, cmd, rng.randrange(1, 20), d, bot_id, bot_self_id) for t, tid, cmd in seen)
+            summary.append((rng.randrange(10**5), rng.randrange(10**5), rows, 0, 0, 0, d, bot_id, bot_self_id))
+
+    conn.executemany(
+        "INSERT INTO coredataanalysis (data_type, target_id, command_name, command_count, date, bot_id, bot_self_id)"
+        " VALUES (?, ?, ?, ?, ?, ?, ?)",
+        analysis,
+    )
+    conn.executemany(
+        "INSERT INTO coredatasummary (receive, send, command, image, user_count, group_count,"
+        " date, bot_id, bot_self_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        summary,
+    )
+    conn.commit()
+    conn.close()
+
+
+async def old_range(start: date, end: date) -> Dict[date, gv.PlatformVal]:
+    """改动前`get_global_val(None, None, day)`逐天执行的写法"""
+    result = {}
+    day = start
+    while day <= end:
+        pv = deepcopy(gv.platform_val)
+        for summary in await CoreDataSummary.select_rows(date=day) or []:
+            datas = await CoreDataAnalysis.select_rows(
+                date=summary.date,
+                bot_id=summary.bot_id,
+                bot_self_id=summary.bot_self_id,
+            )
+            if datas:
+                vl = deepcopy(gv.platform_val)
+                vl["receive"] = summary.receive
+                vl["send"] = summary.send
+                vl["command"] = summary.command
+                vl["image"] = summary.image
+                for data in datas:
+                    target = vl["user"] if data.data_type == DataType.USER else vl["group"]
+                    target[data.target_id] = {data.command_name: data.command_count}
+                pv = gv.merge_dict(vl, pv)
+        result[day] = pv
+        day += timedelta(days=1)
+    return result
+
+
+async def timeit(func) -> Tuple[float, object]:
+    start = time.perf_counter()
+    result = await func()
+    return (time.perf_counter() - start) * 1000, result
+
+
+async def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else ROWS_PER_BOT_DAY
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bench.db"
+        engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+        base_models.async_maker = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+        build_db(path, rows)
+
+        today = date.today()
+        print("=" * 64)
+        print(f"机器人: {len(BOTS)}  天数: {DAYS}  明细行数: {rows * len(BOTS) * DAYS}")
+        print("-" * 64)
+        print(f"{'':<20}{'旧方式(ms)':>14}{'新方式(ms)':>14}{'加速':>10}")
+        cases: List[Tuple[str, date]] = [("单日", today), (f"{DAYS}天", today - timedelta(days=DAYS - 1))]
+        for name, start in cases:
+            old_ms, old = await timeit(lambda: old_range(start, today))
+            new_ms, new = await timeit(lambda: gv.get_global_val_range(start, today))
+            assert isinstance(old, dict) and isinstance(new, dict)
+            for day, pv in old.items():
+                for key in ("receive", "send", "command", "image"):
+                    assert pv[key] == new[day][key], f"{day} {key}"
+                assert pv["user"].keys() == new[day]["user"].keys(), f"{day} user"
+                assert pv["group"].keys() == new[day]["group"].keys(), f"{day} group"
+            print(f"{name:<20}{old_ms:>14.1f}{new_ms:>14.1f}{old_ms / new_ms:>9.1f}x")
+
+        start_time = time.perf_counter()
+        await gv.load_all_global_val()
+        print(f"{'load_all_global_val':<20}{'':>14}{(time.perf_counter() - start_time) * 1000:>14.1f}")
+        print("=" * 64)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,82 @@
+"""
+图片编码吞吐基准测试
+
+为几种常见尺寸的卡片图, 并发编码一批图片, 对比`ImageEncoder`的两种执行方式:
+    - thread: 在线程池中用 Pillow 编码(改动前`convert_img`的方式)
+    - process: 像素经共享内存交给进程池编码
+统计每秒编码张数, 以及同时运行的 1ms 定时协程观测到的事件循环最大延迟。
+进程方式需要多个 CPU 核心才有收益, 单核机器上`image_encoder`会自动使用 thread。
+安装了 PyTurboJPEG 时额外测试 turbojpeg 编码器。
+
+运行: python -m gsuid_core.benchmarks.image_encode [每种尺寸的张数]
+"""
+
+import os
+import sys
+import time
+import asyncio
+from typing import List, Tuple
+
+from PIL import Image, ImageDraw
+
+from gsuid_core.utils.image import encode_worker
+from gsuid_core.utils.image.encoder import ImageEncoder
+
+IMAGE_NUM = 32
+CARD_SIZES = [(600, 800), (1000, 2400), (1500, 4000)]
+
+
+def build_card(size: Tuple[int, int]) -> Image.Image:
+    card = Image.effect_noise(size, 30).convert("RGB")
+    draw = ImageDraw.Draw(card)
+    for y in range(0, size[1], 120):
+        draw.rectangle((40, y + 10, size[0] - 40, y + 100), fill=(30 + y % 200, 80, 160))
+        draw.text((60, y + 40), f"UID 100000001 #{y // 120}", fill=(255, 255, 255))
+    return card
+
+
+async def run(encoder: ImageEncoder, card: Image.Image, num: int) -> Tuple[float, float]:
+    lag = 0.0
+    done = False
+
+    async def ticker():
+        nonlocal lag
+        while not done:
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lag = max(lag, time.perf_counter() - start - 0.001)
+
+    tick = asyncio.create_task(ticker())
+    start = time.perf_counter()
+    await asyncio.gather(*(encoder.encode(card) for _ in range(num)))
+    elapsed = time.perf_counter() - start
+    done = True
+    await tick
+    return num / elapsed, lag * 1000
+
+
+async def main():
+    num = int(sys.argv[1]) if len(sys.argv) > 1 else IMAGE_NUM
+    backends: List[Tuple[str, str]] = [("thread", "pil"), ("process", "pil")]
+    if "turbojpeg" in encode_worker.available_encoders():
+        backends += [("thread", "turbojpeg"), ("process", "turbojpeg")]
+
+    encoders = {key: ImageEncoder(key[0], key[1], 85, {}, min_pixels=0) for key in backends}
+    # 预热进程池
+    await encoders[("process", "pil")].encode(Image.new("RGB", (64, 64)))
+
+    print("=" * 72)
+    simd = encode_worker.is_pillow_simd()
+    print(f"每种尺寸并发编码 {num} 张 JPEG(质量85)  CPU: {os.cpu_count()}  pillow-simd: {simd}")
+    print("-" * 72)
+    print(f"{'尺寸':<14}{'方式':<22}{'张/秒':>10}{'循环最大延迟(ms)':>22}")
+    for size in CARD_SIZES:
+        card = build_card(size)
+        for backend, name in backends:
+            rate, lag = await run(encoders[(backend, name)], card, num)
+            print(f"{f'{size[0]}x{size[1]}':<14}{f'{backend}/{name}':<22}{rate:>10.1f}{lag:>22.1f}")
+    print("=" * 72)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
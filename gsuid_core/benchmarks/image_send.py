@@ -0,0 +1,137 @@
+"""
+图片发送链路基准测试
+
+生成一张大尺寸卡片图, 编码后通过`_Bot.target_send`发送1000次(以 base64 发送的平台), 对比:
+    - 旧方式: `MessageSegment.image`先转为`base64://`字符串, 已是 base64 的图片仍先解码一次,
+      再由`msgjson.encode`序列化整段字符串
+    - 新方式: 图片以原始字节携带, 只在序列化时编码一次 base64 并作为`msgspec.Raw`直接写入
+分别测量插件发送字节与发送`base64://`字符串两种情况的 CPU 时间与`tracemalloc`峰值内存,
+并校验两种方式发出的报文一致; 另对比以链接发送时读取图片宽高的耗时。
+
+运行: python -m gsuid_core.benchmarks.image_send [发送次数]
+"""
+
+import sys
+import time
+import asyncio
+import tracemalloc
+from base64 import b64decode, b64encode
+from typing import List, Tuple, Union, Callable
+from unittest import mock
+
+from PIL import Image, ImageDraw
+from msgspec import json as msgjson
+
+from gsuid_core import bot as bot_module
+from gsuid_core.bot import _Bot
+from gsuid_core.models import Message, MessageSend
+from gsuid_core.segment import _image_info
+from gsuid_core.utils.image.convert import encode_image
+
+SEND_NUM = 1000
+CARD_SIZE = (1000, 2400)
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent: List[bytes] = []
+
+    async def send_bytes(self, data: bytes):
+        # 只保留最后一条, 避免累积的报文计入内存
+        self.sent[:] = [data]
+
+
+def build_card():
+    card = Image.effect_noise(CARD_SIZE, 40).convert("RGB")
+    draw = ImageDraw.Draw(card)
+    for y in range(0, CARD_SIZE[1], 120):
+        draw.rectangle((40, y + 10, CARD_SIZE[0] - 40, y + 100), fill=(30 + y % 200, 80, 160))
+        draw.text((60, y + 40), f"UID 100000001  角色面板 #{y // 120}", fill=(255, 255, 255))
+    return encode_image(card)
+
+
+async def old_convert_message(message: Union[bytes, str], bot_id: str, bot_self_id: str) -> List[Message]:
+    """改动前`_convert_message_to_image`以 base64 发送时的写法"""
+    image_b64 = None
+    if isinstance(message, str) and message.startswith("base64://"):
+        image_b64 = message
+        image_bytes = b64decode(message[9:])
+    else:
+        image_bytes = message
+    assert isinstance(image_bytes, bytes)
+    if image_b64:
+        return [Message(type="image", data=image_b64)]
+    return [Message(type="image", data=f"base64://{b64encode(image_bytes).decode()}")]
+
+
+def old_encode(send: MessageSend) -> bytes:
+    return msgjson.encode(send)
+
+
+async def send_all(ws: FakeWebSocket, image: Union[bytes, str], num: int):
+    bot = _Bot("onebot", ws)  # type: ignore
+    for _ in range(num):
+        await bot.target_send(image, "group", "10001", "onebot", "20001")
+    return ws.sent[-1]
+
+
+def measure(image: Union[bytes, str], num: int, old: bool) -> Tuple[float, float, bytes]:
+    """CPU 时间与峰值内存分两次测量, 避免 tracemalloc 拖慢计时"""
+    patches = []
+    if old:
+        patches = [
+            mock.patch.object(bot_module, "convert_message", old_convert_message),
+            mock.patch.object(bot_module, "encode_message_send", old_encode),
+        ]
+    for p in patches:
+        p.start()
+    try:
+        start = time.process_time()
+        body = asyncio.run(send_all(FakeWebSocket(), image, num))
+        cpu_ms = (time.process_time() - start) * 1000
+
+        tracemalloc.start()
+        asyncio.run(send_all(FakeWebSocket(), image, max(num // 10, 1)))
+        peak = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+        tracemalloc.stop()
+    finally:
+        for p in patches:
+            p.stop()
+    return cpu_ms, peak, body
+
+
+def time_it(func: Callable, num: int) -> float:
+    start = time.perf_counter()
+    for _ in range(num):
+        func()
+    return (time.perf_counter() - start) * 1e6 / num
+
+
+def main():
+    num = int(sys.argv[1]) if len(sys.argv) > 1 else SEND_NUM
+    card = build_card()
+    cases = [("发送字节", card), ("发送base64字符串", f"base64://{b64encode(card).decode()}")]
+
+    # 日志输出不计入测量
+    with mock.patch.object(bot_module.logger, "info"), mock.patch.object(bot_module.logger, "trace"):
+        print("=" * 72)
+        print(f"卡片: {CARD_SIZE[0]}x{CARD_SIZE[1]} JPEG {len(card) / 1024:.0f} KB  发送次数: {num}")
+        print("-" * 72)
+        print(f"{'':<20}{'旧CPU(ms)':>12}{'新CPU(ms)':>12}{'旧峰值(MB)':>14}{'新峰值(MB)':>14}")
+        for name, image in cases:
+            old_ms, old_mb, old_body = measure(image, num, True)
+            new_ms, new_mb, new_body = measure(image, num, False)
+            assert old_body == new_body, f"{name} 报文不一致"
+            print(f"{name:<20}{old_ms:>12.1f}{new_ms:>12.1f}{old_mb:>14.1f}{new_mb:>14.1f}")
+
+    plain = bytes(card)
+    print("-" * 72)
+    print(
+        f"读取宽高  Image.open: {time_it(lambda: _image_info(plain), 1000):.1f} us"
+        f"  编码时记录: {time_it(lambda: _image_info(card), 1000):.2f} us"
+    )
+    print("=" * 72)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+日志索引基准测试
+
+生成一份合成的百万行 JSON 日志(同时按`DailyNamedFileHandler`的方式写出旁路索引),
+对比`/api/logs`分页一次的耗时:
+    - 旧方式: 改动前`HistoryLogData`的写法, 读取并解析整份日志后切片
+    - 无索引冷启动: 扫描日志建立索引后分页
+    - 读取旁路索引: 进程首次访问该日志
+    - 已缓存索引: 之后的每次请求(首页/末页/按等级过滤/统计)
+
+运行: python -m gsuid_core.benchmarks.log_index [行数]
+"""
+
+import sys
+import json
+import time
+import random
+import asyncio
+import tempfile
+from typing import Dict, List, Callable
+from pathlib import Path
+
+import aiofiles
+
+from gsuid_core.log_index import RECORD, LogReader, index_path, level_code_by_no
+
+LINE_NUM = 1_000_000
+DATE = "2024-06-01"
+
+LEVELS = [("info", 20), ("info", 20), ("info", 20), ("success", 25), ("warning", 30), ("error", 40), ("debug", 10)]
+EVENTS = [
+    "[收到事件]",
+    "[命令触发]",
+    "[发送消息to] onebot group 123456",
+    "[GsCore] 插件加载完成",
+    "[米游社请求] Url: https://api-takumi-record.mihoyo.com/game_record/app/genshin/api/index",
+]
+
+
+def build_log(path: Path, lines: int):
+    rng = random.Random(20240601)
+    index = bytearray()
+    offset = 0
+    with open(path, "wb") as f:
+        for i in range(lines):
+            level, levelno = rng.choice(LEVELS)
+            sec = i * 86400 // lines
+            ev = {
+                "event": f"{rng.choice(EVENTS)} #{i}",
+                "user_id": str(rng.randrange(10**8, 10**9)),
+                "level": level,
+                "timestamp": f"{DATE} {sec // 3600:02d}:{sec % 3600 // 60:02d}:{sec % 60:02d}",
+            }
+            line = (json.dumps(ev, ensure_ascii=False) + "\n").encode()
+            f.write(line)
+            index += RECORD.pack(offset, len(line), 0, level_code_by_no(levelno))
+            offset += len(line)
+    index_path(path).write_bytes(bytes(index))
+
+
+def timeit(func: Callable) -> float:
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000
+
+
+async def old_parse_logs(log_file_path: Path) -> List[Dict]:
+    """改动前`HistoryLogData.get_parse_logs`的写法(不含按文件名的缓存)"""
+    log_entries: List[Dict] = []
+
+    async with aiofiles.open(log_file_path, "r", encoding="utf-8") as file:
+        lines = await file.readlines()
+
+    for _id, line in enumerate(lines, 1):
+        ev: Dict[str, str] = json.loads(line.strip())
+        log_entries.append(
+            {
+                "id": _id,
+                "时间": ev["timestamp"],
+                "日志等级": ev["level"].upper(),
+                "内容": ev["event"],
+            }
+        )
+    return log_entries
+
+
+def old_query(path: Path, level: str, page: int, per_page: int = 50) -> List:
+    logs = asyncio.run(old_parse_logs(path))
+    logs = [log for log in logs if log["日志等级"].lower().startswith(level)] if level else logs
+    return logs[(page - 1) * per_page : page * per_page]
+
+
+def main():
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else LINE_NUM
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / f"{DATE}.log"
+        cost = timeit(lambda: build_log(path, lines))
+        size_mb = path.stat().st_size / 1024 / 1024
+        print("=" * 56)
+        print(f"日志行数: {lines}  体积: {size_mb:.1f} MB  生成耗时: {cost / 1000:.1f}s")
+        print("-" * 56)
+
+        results = []
+        results.append(("旧方式 首页", timeit(lambda: old_query(path, "", 1))))
+        results.append(("旧方式 warn过滤", timeit(lambda: old_query(path, "warn", 3))))
+
+        idx = index_path(path)
+        backup = idx.read_bytes()
+        idx.unlink()
+        results.append(("无索引冷启动 首页", timeit(lambda: LogReader().query(path, None, 1))))
+        idx.write_bytes(backup)
+
+        reader = LogReader()
+        results.append(("读取旁路索引 首页", timeit(lambda: reader.query(path, None, 1))))
+        last_page = (lines + 49) // 50
+        results.append(("已缓存 首页", timeit(lambda: reader.query(path, None, 1))))
+        results.append(("已缓存 末页", timeit(lambda: reader.query(path, None, last_page))))
+        results.append(("已缓存 warn过滤", timeit(lambda: reader.query(path, "warn", 3))))
+        results.append(("已缓存 统计", timeit(lambda: reader.get_index(path).counts())))
+
+        # 结果与旧方式一致
+        old = old_query(path, "", last_page)
+        new = reader.query(path, None, last_page)[1]
+        assert [o["内容"] for o in old] == [n["event"] for n in new], "分页结果与旧方式不一致!"
+
+        for name, ms in results:
+            print(f"{name:<16}{ms:>12.2f} ms")
+        print("=" * 56)
+
+
+if __name__ == "__main__":
+    main()
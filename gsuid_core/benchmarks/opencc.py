@@ -0,0 +1,87 @@
+"""
+繁体转简体基准测试
+
+模拟一批收到的消息文本(英文指令、简体指令、少量繁体指令、偶发的长文本), 对比每条消息的耗时:
+    - 旧方式: 每条消息`OpenCC("t2s")`重新加载词典后转换
+    - 共享转换器: 全进程一个转换器, 每条都转换
+    - TextNormalizer: 共享转换器 + 跳过不含繁体字的文本 + LRU 缓存
+并校验三种方式的转换结果一致。
+
+运行: python -m gsuid_core.benchmarks.opencc [消息条数]
+"""
+
+import sys
+import time
+import random
+from typing import List, Callable
+
+from opencc import OpenCC
+
+from gsuid_core.text_normalize import TextNormalizer
+
+MESSAGE_NUM = 20_000
+ASCII = ["help", "sign", "ping", "status", "mr", "uid 100000001", "bind 123456789"]
+SIMPLIFIED = ["原神签到", "星铁体力", "查询角色面板", "绑定uid", "刷新面板", "今日运势", "帮助"]
+TRADITIONAL = ["原神簽到", "查詢角色面板", "綁定uid", "刷新面闆", "今日運勢", "幫助", "回覆訊息"]
+LONG_TEXT = "這是一段比較長的聊天訊息, 包含了許多繁體字與標點符號, 用來模擬群聊中的普通對話內容。" * 3
+
+
+def build_messages(num: int) -> List[str]:
+    rng = random.Random(20240601)
+    messages = []
+    for _ in range(num):
+        r = rng.random()
+        if r < 0.45:
+            messages.append(rng.choice(ASCII))
+        elif r < 0.85:
+            messages.append(rng.choice(SIMPLIFIED))
+        elif r < 0.98:
+            messages.append(rng.choice(TRADITIONAL))
+        else:
+            messages.append(LONG_TEXT + str(rng.randrange(10**6)))
+    return messages
+
+
+def measure(func: Callable[[str], str], messages: List[str]) -> List[str]:
+    return [func(msg) for msg in messages]
+
+
+def main():
+    num = int(sys.argv[1]) if len(sys.argv) > 1 else MESSAGE_NUM
+    messages = build_messages(num)
+    # 旧方式过慢, 只取一部分换算
+    old_messages = messages[: max(num // 20, 1)]
+
+    start = time.perf_counter()
+    old = measure(lambda text: OpenCC("t2s").convert(text), old_messages)
+    old_us = (time.perf_counter() - start) * 1e6 / len(old_messages)
+
+    converter = OpenCC("t2s")
+    start = time.perf_counter()
+    shared = measure(converter.convert, messages)
+    shared_us = (time.perf_counter() - start) * 1e6 / num
+
+    normalizer = TextNormalizer()
+    start = time.perf_counter()
+    normalizer.load()
+    load_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    new = measure(normalizer.normalize, messages)
+    new_us = (time.perf_counter() - start) * 1e6 / num
+
+    assert old == shared[: len(old)], "共享转换器结果不一致"
+    assert new == shared, "TextNormalizer 结果不一致"
+
+    print("=" * 64)
+    print(f"消息条数: {num}  繁体字集合: {len(normalizer.trad_chars)}  首次加载: {load_ms:.1f} ms")
+    print("-" * 64)
+    print(f"{'':<24}{'每条(us)':>12}{'加速':>10}")
+    for name, us in (("每条新建 OpenCC", old_us), ("共享转换器", shared_us), ("TextNormalizer", new_us)):
+        print(f"{name:<24}{us:>12.2f}{old_us / us:>9.0f}x")
+    stats = normalizer.get_stats()
+    print(f"跳过: {stats['skipped']}  缓存命中: {stats['hits']}  实际转换: {stats['misses']}")
+    print("=" * 64)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+触发器分发基准测试
+
+模拟约60个插件、数千个触发器的真实插件规模, 回放一批消息,
+对比「逐个检查全部触发器」与「预编译触发器索引」两种方式的:
+    - 每条消息实际检查的触发器数量
+    - 分发延迟 P50 / P99
+
+运行: python -m gsuid_core.benchmarks.trigger_dispatch
+"""
+
+import time
+import random
+import statistics
+from typing import Dict, List
+
+from gsuid_core.models import Event
+from gsuid_core.trigger import Trigger
+from gsuid_core.trigger_index import TriggerIndex
+
+PLUGIN_NUM = 60
+SV_PER_PLUGIN = 5
+MESSAGE_NUM = 5000
+
+PREFIXES = ["gs", "sr", "ww", "zzz", "bd", "mys", "xy", "ark", "bh", "pm"]
+WORDS = [
+    "帮助",
+    "面板",
+    "抽卡记录",
+    "签到",
+    "体力",
+    "深渊",
+    "角色",
+    "武器",
+    "攻略",
+    "绑定",
+    "查询",
+    "更新",
+    "刷新",
+    "排行",
+    "图鉴",
+    "材料",
+    "日历",
+    "公告",
+    "兑换码",
+    "练度",
+]
+CHATTER = [
+    "哈哈哈哈",
+    "今天吃什么",
+    "有人打本吗",
+    "好困啊",
+    "这个怎么配队",
+    "晚上好",
+    "?",
+    "6",
+]
+
+
+async def _noop(*args):
+    return None
+
+
+class _BenchSV:
+    def __init__(self, name: str, priority: int):
+        self.name = name
+        self.priority = priority
+        self.TL: Dict[str, Dict[str, Trigger]] = {}
+
+    def add(self, _type, keyword: str, prefix: str = ""):
+        if _type not in self.TL:
+            self.TL[_type] = {}
+        self.TL[_type][prefix + keyword] = Trigger(_type, keyword, _noop, prefix)
+
+
+def build_plugins(rng: random.Random) -> List[_BenchSV]:
+    svs: List[_BenchSV] = []
+    for p in range(PLUGIN_NUM):
+        plugin_prefix = PREFIXES[p % len(PREFIXES)] + ("" if p < len(PREFIXES) else str(p))
+        for s in range(SV_PER_PLUGIN):
+            sv = _BenchSV(f"plugin{p}_sv{s}", rng.randint(1, 5))
+            for word in rng.sample(WORDS, 6):
+                kw = f"{word}{s}"
+                # 与sv.py一致: 每个关键词会同时注册「插件前缀」和「空前缀」两个触发器
+                for _p in (plugin_prefix, ""):
+                    sv.add("command", kw, _p)
+                    sv.add("fullmatch", f"{kw}列表", _p)
+                    sv.add("prefix", f"{kw}查询", _p)
+            sv.add("suffix", f"{rng.choice(WORDS)}{p}{s}面板")
+            sv.add("keyword", f"{rng.choice(WORDS)}{p}_{s}")
+            sv.add("regex", rf"^{plugin_prefix}(\d+)号{rng.choice(WORDS)}{s}$", plugin_prefix)
+            svs.append(sv)
+    return svs
+
+
+def build_messages(rng: random.Random) -> List[Event]:
+    messages: List[Event] = []
+    for _ in range(MESSAGE_NUM):
+        roll = rng.random()
+        if roll < 0.5:
+            text = rng.choice(CHATTER)
+        elif roll < 0.9:
+            p = rng.randrange(PLUGIN_NUM)
+            prefix = PREFIXES[p % len(PREFIXES)] + ("" if p < len(PREFIXES) else str(p))
+            text = f"{prefix}{rng.choice(WORDS)}{rng.randrange(SV_PER_PLUGIN)}"
+        else:
+            text = f"{rng.choice(WORDS)}{rng.randrange(SV_PER_PLUGIN)}查询 100000001"
+        messages.append(Event(raw_text=text, user_type="group", group_id="1", user_id="2"))
+    return messages
+
+
+def _percentile(data: List[float], q: float) -> float:
+    data = sorted(data)
+    return data[min(len(data) - 1, int(len(data) * q))]
+
+
+def run_scan(svs: List[_BenchSV], messages: List[Event]):
+    latencies: List[float] = []
+    evaluated = 0
+    hits = []
+    for ev in messages:
+        start = time.perf_counter()
+        valid = {}
+        for sv in svs:
+            for _type in sv.TL:
+                for trigger in sv.TL[_type].values():
+                    evaluated += 1
+                    if trigger.check_command(ev):
+                        valid[trigger] = sv.priority
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits.append(set(valid))
+    return latencies, evaluated / len(messages), hits
+
+
+def run_index(svs: List[_BenchSV], messages: List[Event]):
+    index = TriggerIndex()
+    start = time.perf_counter()
+    index.build(svs)  # type: ignore
+    build_ms = (time.perf_counter() - start) * 1000
+
+    latencies: List[float] = []
+    evaluated = 0
+    hits = []
+    for ev in messages:
+        start = time.perf_counter()
+        valid = {}
+        for _, sv, trigger in index.get_candidates(ev):
+            evaluated += 1
+            if trigger.check_command(ev):
+                valid[trigger] = sv.priority
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits.append(set(valid))
+    return latencies, evaluated / len(messages), hits, build_ms, index.total
+
+
+def main():
+    rng = random.Random(20240601)
+    svs = build_plugins(rng)
+    messages = build_messages(rng)
+
+    scan_lat, scan_eval, scan_hits = run_scan(svs, messages)
+    index_lat, index_eval, index_hits, build_ms, total = run_index(svs, messages)
+
+    assert scan_hits == index_hits, "索引匹配结果与全量扫描不一致!"
+
+    print("=" * 56)
+    print(f"插件数: {PLUGIN_NUM}  SV数: {len(svs)}  触发器总数: {total}  消息数: {len(messages)}")
+    print(f"索引构建耗时: {build_ms:.2f} ms")
+    print("-" * 56)
+    print(f"{'方式':<10}{'检查触发器/条':>14}{'P50(ms)':>12}{'P99(ms)':>12}{'平均(ms)':>10}")
+    for name, lat, ev in (
+        ("全量扫描", scan_lat, scan_eval),
+        ("触发器索引", index_lat, index_eval),
+    ):
+        print(
+            f"{name:<10}{ev:>14.1f}{_percentile(lat, 0.5):>12.4f}"
+            f"{_percentile(lat, 0.99):>12.4f}{statistics.mean(lat):>10.4f}"
+        )
+    print("=" * 56)
+
+
+if __name__ == "__main__":
+    main()
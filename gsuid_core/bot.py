@@ -1,23 +1,25 @@
-import time
 import asyncio
 import inspect
 from typing import Any, Dict, List, Union, Literal, Optional
 
 from fastapi import WebSocket
-from msgspec import json as msgjson
 
+from gsuid_core.perf import profiler
 from gsuid_core.logger import logger
-from gsuid_core.models import Event, Message, MessageSend, TaskContext
+from gsuid_core.models import Event, Message, MessageSend
 from gsuid_core.segment import (
     MessageSegment,
     to_markdown,
     convert_message,
     is_split_button,
+    wire_message_send,
     check_same_buttons,
+    encode_message_send,
     markdown_to_template_markdown,
 )
 from gsuid_core.gs_logger import GsLogger
-from gsuid_core.global_val import bot_traffic, get_global_val
+from gsuid_core.scheduler import create_scheduler
+from gsuid_core.counter_store import counter_store
 from gsuid_core.load_template import (
     parse_button,
     custom_buttons,
@@ -62,7 +64,7 @@ def _truncate_for_log(obj: Any, max_str_len: int = 100) -> Any:
             return obj[:max_str_len] + f"...({len(obj)} chars)"
         return obj
 
-    if isinstance(obj, (bytes, bytearray)):
+    if isinstance(obj, (bytes, bytearray, memoryview)):
         return f"<bytes: {len(obj)} bytes>"
 
     if isinstance(obj, list):
@@ -78,15 +80,36 @@ def _truncate_for_log(obj: Any, max_str_len: int = 100) -> Any:
     return obj
 
 
+async def prepare_message(
+    message: Union[Message, List[Message], List[str], str, bytes],
+    bot_id: str,
+    bot_self_id: str,
+) -> List[Message]:
+    """将消息转换为该平台的标准输出类型, 结果只读, 可重复发送"""
+    with profiler.span("convert_message"):
+        _message = await convert_message(
+            message,
+            bot_id,
+            bot_self_id,
+        )
+
+    if bot_id in enable_markdown_platform:
+        _message = await to_markdown(
+            _message,
+            None,
+            bot_id,
+        )
+    return _message
+
+
 class _Bot:
     def __init__(self, _id: str, ws: Optional[WebSocket] = None):
         self.bot_id = _id
         self.bot = ws
         self.logger = GsLogger(self.bot_id, ws)
-        self.queue = asyncio.queues.PriorityQueue()
+        self.scheduler = create_scheduler(self.bot_id)
         self.send_dict = {}
         self.bg_tasks = set()
-        self.sem = asyncio.Semaphore(10)
 
     async def target_send(
         self,
@@ -102,19 +125,36 @@ class _Bot:
         task_id: str = "",
         task_event: Optional[asyncio.Event] = None,
     ):
-        _message = await convert_message(
-            message,
+        _message = await prepare_message(message, bot_id, bot_self_id)
+        await self.send_prepared(
+            _message,
+            target_type,
+            target_id,
             bot_id,
             bot_self_id,
+            msg_id,
+            at_sender,
+            sender_id,
+            group_id,
+            task_id,
+            task_event,
         )
 
-        if bot_id in enable_markdown_platform:
-            _message = await to_markdown(
-                _message,
-                None,
-                bot_id,
-            )
-
+    async def send_prepared(
+        self,
+        _message: List[Message],
+        target_type: Literal["group", "direct", "channel", "sub_channel"],
+        target_id: Optional[str],
+        bot_id: str,
+        bot_self_id: str,
+        msg_id: str = "",
+        at_sender: bool = False,
+        sender_id: str = "",
+        group_id: Optional[str] = None,
+        task_id: str = "",
+        task_event: Optional[asyncio.Event] = None,
+    ):
+        """发送已经过`prepare_message`转换的消息, 同一平台的消息可转换一次后发往多个目标"""
         _message_result = []
         message_result: List[List[Message]] = []
 
@@ -184,16 +224,15 @@ class _Bot:
                 msg_id=msg_id,
             )
 
-            local_val = await get_global_val(bot_id, bot_self_id)
-
-            local_val["send"] += 1
+            counter_store.add(bot_id, bot_self_id, "send")
 
             logger.info(f"[发送消息to] {bot_id} - {target_type} - {target_id}")
             if self.bot:
-                body = msgjson.encode(send)
-                await self.bot.send_bytes(body)
+                with profiler.span("send"):
+                    body = encode_message_send(send)
+                    await self.bot.send_bytes(body)
             else:
-                self.send_dict[task_id] = send
+                self.send_dict[task_id] = wire_message_send(send)
                 if task_event:
                     task_event.set()
 
@@ -207,42 +246,8 @@ class _Bot:
         del self.send_dict[task_id]
         return result
 
-    async def _safe_run(self, ctx: TaskContext):
-        start_exec_time = time.perf_counter()
-        wait_time = start_exec_time - ctx.create_time
-
-        if wait_time > 5.0:
-            logger.warning(f"[排队警告] 函数 {ctx.name} 等待了 {wait_time:.2f}s 才开始执行")
-
-        try:
-            bot_traffic["req"] += 1
-            bot_traffic["max_qps"] = max(bot_traffic["max_qps"], bot_traffic["req"])
-            func_name = getattr(ctx, "name")
-            logger.trace(f"[核心执行] 函数 {func_name} 开始执行")
-            await ctx.coro
-        except Exception:
-            logger.exception(f"[核心执行异常] 函数 {func_name} 执行发生未捕获异常")
-        finally:
-            end_time = time.perf_counter()
-            run_duration = end_time - start_exec_time
-            total_duration = end_time - ctx.create_time
-
-            bot_traffic["total_count"] += 1
-            bot_traffic["total_time"] += total_duration
-            bot_traffic["max_runtime"] = max(bot_traffic["max_runtime"], run_duration)
-            bot_traffic["max_wait_time"] = max(bot_traffic["max_wait_time"], wait_time)
-            bot_traffic["max_time"] = max(bot_traffic["max_time"], total_duration)
-            bot_traffic["max_runtime_func"] = func_name
-
-            bot_traffic["req"] -= 1
-            self.sem.release()
-            self.queue.task_done()
-
     async def _process(self):
-        while True:
-            ctx: TaskContext = await self.queue.get()
-            await self.sem.acquire()
-            asyncio.create_task(self._safe_run(ctx))
+        await self.scheduler.run()
 
 
 class Bot:
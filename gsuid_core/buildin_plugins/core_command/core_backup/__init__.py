@@ -19,6 +19,7 @@ from gsuid_core.utils.database.base_models import DB_PATH
 from gsuid_core.utils.plugins_config.gs_config import log_config, backup_config
 from gsuid_core.utils.database.global_val_models import (
     CoreDataSummary,
+    CoreActiveRollup,
     CoreDataAnalysis,
 )
 
@@ -74,6 +75,7 @@ async def clear_cache():
     await GsCache.delete_all_cache(GsUser)
     await CoreDataSummary.delete_outdate()
     await CoreDataAnalysis.delete_outdate()
+    await CoreActiveRollup.delete_outdate()
     logger.success("♻️ [早柚核心] 缓存已清除!")
 
 
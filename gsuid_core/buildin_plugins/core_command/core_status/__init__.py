@@ -9,6 +9,7 @@ from gsuid_core.models import Event
 from gsuid_core.global_val import BotTraffic
 from gsuid_core.status.draw_status import draw_status
 from gsuid_core.utils.database.models import CoreUser, CoreGroup
+from gsuid_core.utils.plugins_config.gs_config import sp_config
 
 sv_core_status = SV("Core状态", pm=0)
 
@@ -38,8 +39,9 @@ async def count_group_user():
 async def _u_clear_and_save_global_val_all():
     """每天凌晨0点执行，清空全局状态"""
 
-    await gv.save_all_global_val(1)
-    gv.bot_val = {}
+    # 跨天时完整写入一次前一天的统计, 兜底之前可能写库失败的增量
+    await gv.save_all_global_val(1, full=True)
+    gv.counter_store.clear()
 
     await gv.save_bot_max_qps()
 
@@ -62,12 +64,19 @@ async def _u_clear_and_save_global_val_all():
     logger.success("[早柚核心] 状态已保存!")
 
 
-# 每隔10分钟执行一次save_all_global_val，但凌晨0点不执行
+# 定时将变化过的统计写入数据库, 统计带有所属日期, 跨天前后执行都不会写错日期
+@scheduler.scheduled_job("interval", seconds=sp_config.get_config("StatFlushInterval").data)
+async def _scheduled_flush_global_val():
+    """定时写入上次保存后变化过的统计"""
+
+    await gv.save_all_global_val(0)
+
+
+# 每隔10分钟执行一次save_bot_max_qps，但凌晨0点不执行
 @scheduler.scheduled_job("cron", minute="*/10", hour="1-23")
 async def _scheduled_save_global_val_all():
     """每隔10分钟执行一次，同步全局状态"""
 
-    await gv.save_all_global_val(0)
     await gv.save_bot_max_qps()
     logger.success("[早柚核心] 状态已同步!")
 
@@ -70,6 +70,7 @@ async def main():
     await load_gss(args.dev)
 
     from gsuid_core.bot import _Bot
+    from gsuid_core.perf import profiler
     from gsuid_core.config import core_config
     from gsuid_core.logger import logger
     from gsuid_core.models import MessageReceive
@@ -131,8 +132,10 @@ async def main():
                 try:
                     while True:
                         data = await websocket.receive_bytes()
-                        msg = msgjson.decode(data, type=MessageReceive)
-                        await handle_event(bot, msg)
+                        with profiler.trace("message"):
+                            with profiler.span("decode"):
+                                msg = msgjson.decode(data, type=MessageReceive)
+                            await handle_event(bot, msg)
                 except WebSocketDisconnect:
                     await gss.disconnect(bot_id)
 
@@ -151,9 +154,11 @@ async def main():
 
         @app.post("/api/send_msg")
         async def sendMsg(msg: Dict):
-            data = msgjson.encode(msg)
-            MR = msgjson.Decoder(MessageReceive).decode(data)
-            result = await handle_event(_bot, MR, True)
+            with profiler.trace("message"):
+                with profiler.span("decode"):
+                    data = msgjson.encode(msg)
+                    MR = msgjson.Decoder(MessageReceive).decode(data)
+                result = await handle_event(_bot, MR, True)
             if result:
                 return {"status_code": 200, "data": to_builtins(result)}
             else:
@@ -0,0 +1,358 @@
+"""
+指令统计计数器
+
+按(bot_id, bot_self_id)统计接收/发送/指令/图片次数, 以及每个用户、群组调用每个指令的次数。
+
+用户/群组ID与指令关键词都先驻留(intern)为小整数, (目标, 指令)对打包为一个整数,
+存放在基于`array`的开放寻址哈希表中, 代替原先每个用户一个`Dict[str, int]`的嵌套字典。
+用户数/群组数与全平台合计都在写入时维护, 读取为 O(1)。
+每条记录带有脏标记, 定时落库时只写入上次落库后变化过的记录。
+"""
+
+import datetime
+from array import array
+from typing import Dict, List, Tuple, Iterable, Iterator, Optional, TypedDict
+
+# 打包键中指令序号占用的位数
+_COMMAND_BITS = 24
+_COMMAND_MASK = (1 << _COMMAND_BITS) - 1
+_HASH_MULT = 0x9E3779B97F4A7C15
+_UINT64 = (1 << 64) - 1
+# 哈希表最大装载率(十分之几)
+_MAX_LOAD = 7
+
+FIELDS = ("receive", "send", "command", "image")
+
+
+class PlatformVal(TypedDict):
+    receive: int
+    send: int
+    command: int
+    image: int
+    user_count: int
+    group_count: int
+    group: Dict[str, Dict[str, int]]
+    user: Dict[str, Dict[str, int]]
+
+
+class Interner:
+    """字符串 <-> 小整数 的双向映射, 进程内共享, 只增不减"""
+
+    __slots__ = ("ids", "names")
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.names: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def intern(self, name: str) -> int:
+        idx = self.ids.get(name)
+        if idx is None:
+            idx = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return idx
+
+
+# 用户ID与群组ID共用一个驻留表, 指令关键词单独一个
+targets = Interner()
+commands = Interner()
+
+
+class CounterTable:
+    """
+    某个机器人下某一类目标(用户或群组)的 (目标, 指令) -> 次数
+
+    线性探测的开放寻址哈希表, 键(打包后+1, 0表示空槽)与次数分别存放在两个`array`列中,
+    每个槽位固定12字节, 不为每条记录创建 Python 对象。
+    另有一个按槽位对应的`dirty`标记, 记录上次落库后变化过的记录, 落库时只写这部分。
+    """
+
+    __slots__ = ("keys", "counts", "dirty", "dirty_num", "size", "shift", "seen", "distinct", "new_target")
+
+    def __init__(self, capacity_bits: int = 6):
+        self.keys = array("Q", bytes(8 << capacity_bits))
+        self.counts = array("I", bytes(4 << capacity_bits))
+        self.dirty = bytearray(1 << capacity_bits)
+        self.dirty_num = 0
+        self.size = 0
+        # Fibonacci 哈希取高位作为槽位
+        self.shift = 64 - capacity_bits
+        # 以目标序号为下标, 标记该目标是否已出现, 用于维护去重数量
+        self.seen = bytearray()
+        self.distinct = 0
+        # 上次落库后是否出现了新的目标
+        self.new_target = False
+
+    def __len__(self) -> int:
+        return self.size
+
+    def incr(self, target: int, command: int, n: int = 1):
+        key = (target << _COMMAND_BITS | command) + 1
+        keys = self.keys
+        mask = len(keys) - 1
+        slot = (key * _HASH_MULT & _UINT64) >> self.shift
+        while True:
+            k = keys[slot]
+            if k == key:
+                self.counts[slot] += n
+                if not self.dirty[slot]:
+                    self.dirty[slot] = 1
+                    self.dirty_num += 1
+                return
+            if not k:
+                break
+            slot = (slot + 1) & mask
+
+        keys[slot] = key
+        self.counts[slot] = n
+        self.dirty[slot] = 1
+        self.dirty_num += 1
+        self.size += 1
+        if self.size * 10 > len(keys) * _MAX_LOAD:
+            self._grow()
+
+        if target >= len(self.seen):
+            self.seen.extend(bytes(max(target + 1 - len(self.seen), len(self.seen))))
+        if not self.seen[target]:
+            self.seen[target] = 1
+            self.distinct += 1
+            self.new_target = True
+
+    def _grow(self):
+        old_keys, old_counts, old_dirty = self.keys, self.counts, self.dirty
+        capacity = len(old_keys) * 2
+        keys = self.keys = array("Q", bytes(8 * capacity))
+        counts = self.counts = array("I", bytes(4 * capacity))
+        dirty = self.dirty = bytearray(capacity)
+        mask = capacity - 1
+        shift = self.shift = self.shift - 1
+        for key, count, flag in zip(old_keys, old_counts, old_dirty):
+            if key:
+                slot = (key * _HASH_MULT & _UINT64) >> shift
+                while keys[slot]:
+                    slot = (slot + 1) & mask
+                keys[slot] = key
+                counts[slot] = count
+                dirty[slot] = flag
+
+    def items(self) -> Iterator[Tuple[str, str, int]]:
+        """遍历(目标ID, 指令, 次数)"""
+        target_names = targets.names
+        command_names = commands.names
+        for key, count in zip(self.keys, self.counts):
+            if key:
+                key -= 1
+                yield target_names[key >> _COMMAND_BITS], command_names[key & _COMMAND_MASK], count
+
+    def take_dirty(self) -> List[Tuple[str, str, int]]:
+        """取出上次落库后变化过的(目标ID, 指令, 次数)并清除标记"""
+        if not self.dirty_num:
+            return []
+        target_names = targets.names
+        command_names = commands.names
+        rows = []
+        find = self.dirty.find
+        slot = find(1)
+        while slot != -1:
+            key = self.keys[slot] - 1
+            rows.append((target_names[key >> _COMMAND_BITS], command_names[key & _COMMAND_MASK], self.counts[slot]))
+            slot = find(1, slot + 1)
+        self.mark_clean()
+        return rows
+
+    def mark_dirty(self, rows: Iterable[Tuple[str, str, int]]):
+        """重新标记(目标ID, 指令)为已变化, 落库失败时留到下一次写入"""
+        keys = self.keys
+        mask = len(keys) - 1
+        for target, command, _ in rows:
+            target_idx = targets.ids.get(target)
+            command_idx = commands.ids.get(command)
+            if target_idx is None or command_idx is None:
+                continue
+            key = (target_idx << _COMMAND_BITS | command_idx) + 1
+            slot = (key * _HASH_MULT & _UINT64) >> self.shift
+            while keys[slot] and keys[slot] != key:
+                slot = (slot + 1) & mask
+            if keys[slot] and not self.dirty[slot]:
+                self.dirty[slot] = 1
+                self.dirty_num += 1
+
+    def mark_clean(self):
+        self.dirty = bytearray(len(self.keys))
+        self.dirty_num = 0
+        self.new_target = False
+
+    def target_ids(self) -> List[str]:
+        target_names = targets.names
+        return [target_names[i] for i, flag in enumerate(self.seen) if flag]
+
+    def to_dict(self, result: Optional[Dict[str, Dict[str, int]]] = None) -> Dict[str, Dict[str, int]]:
+        """转换为 {目标ID: {指令: 次数}}, 传入 result 时累加到其中"""
+        if result is None:
+            result = {}
+        for target, command, count in self.items():
+            data = result.setdefault(target, {})
+            data[command] = data.get(command, 0) + count
+        return result
+
+
+class BotCounter:
+    """单个机器人(bot_id, bot_self_id)当天的统计"""
+
+    __slots__ = ("receive", "send", "command", "image", "user", "group", "changed")
+
+    def __init__(self):
+        self.receive = 0
+        self.send = 0
+        self.command = 0
+        self.image = 0
+        self.user = CounterTable()
+        self.group = CounterTable()
+        # 上次落库后计数是否有变化
+        self.changed = False
+
+    @property
+    def user_count(self) -> int:
+        return self.user.distinct
+
+    @property
+    def group_count(self) -> int:
+        return self.group.distinct
+
+
+class CounterStore:
+    def __init__(self):
+        self.bots: Dict[Tuple[str, str], BotCounter] = {}
+        # 当前统计所属的日期, 跨天清空前落库仍写入这一天
+        self.date = datetime.date.today()
+        # 全平台合计, 与各机器人的计数同步增加
+        self.totals: Dict[str, int] = dict.fromkeys(FIELDS, 0)
+
+    def get(self, bot_id: str, bot_self_id: str) -> BotCounter:
+        counter = self.bots.get((bot_id, bot_self_id))
+        if counter is None:
+            counter = self.bots[(bot_id, bot_self_id)] = BotCounter()
+        return counter
+
+    def add(self, bot_id: Optional[str], bot_self_id: Optional[str], field: str, n: int = 1):
+        """增加 receive / send / image 计数, 未指定机器人时不计入"""
+        if bot_id is None or bot_self_id is None:
+            return
+        counter = self.get(bot_id, bot_self_id)
+        setattr(counter, field, getattr(counter, field) + n)
+        counter.changed = True
+        self.totals[field] += n
+
+    def count_command(
+        self,
+        bot_id: str,
+        bot_self_id: str,
+        user_id: Optional[str],
+        group_id: Optional[str],
+        keyword: str,
+        n: int = 1,
+    ):
+        """记录一次指令触发"""
+        counter = self.get(bot_id, bot_self_id)
+        counter.command += n
+        counter.changed = True
+        self.totals["command"] += n
+
+        command = commands.intern(keyword)
+        if group_id:
+            counter.group.incr(targets.intern(group_id), command, n)
+        if user_id:
+            counter.user.incr(targets.intern(user_id), command, n)
+
+    def load(
+        self,
+        bot_id: str,
+        bot_self_id: str,
+        fields: Dict[str, int],
+        users: List[Tuple[str, str, int]],
+        groups: List[Tuple[str, str, int]],
+    ):
+        """从数据库恢复当天的统计, users / groups 为(目标ID, 指令, 次数)"""
+        counter = self.bots[(bot_id, bot_self_id)] = BotCounter()
+        for field in FIELDS:
+            setattr(counter, field, fields.get(field, 0))
+        for table, rows in ((counter.user, users), (counter.group, groups)):
+            for target_id, keyword, count in rows:
+                table.incr(targets.intern(target_id), commands.intern(keyword), count)
+            # 与数据库一致, 无需再次写入
+            table.mark_clean()
+        self.date = datetime.date.today()
+        self._recount()
+
+    def clear(self):
+        """清空当天统计, 驻留表保留以便第二天复用"""
+        self.bots.clear()
+        self.date = datetime.date.today()
+        self._recount()
+
+    def _recount(self):
+        self.totals = {field: sum(getattr(c, field) for c in self.bots.values()) for field in FIELDS}
+
+    def _match(self, bot_id: Optional[str], bot_self_id: Optional[str]) -> List[BotCounter]:
+        if bot_id is None or bot_self_id is None:
+            return list(self.bots.values())
+        counter = self.bots.get((bot_id, bot_self_id))
+        return [counter] if counter else []
+
+    def summary(self, bot_id: Optional[str] = None, bot_self_id: Optional[str] = None) -> PlatformVal:
+        """
+        只含计数与用户数/群组数的快照, 不展开各用户/群组的指令明细。
+        未指定机器人时为全平台合计, 用户数/群组数为各机器人之和。
+        """
+        counters = self._match(bot_id, bot_self_id)
+        if bot_id is None or bot_self_id is None:
+            fields = dict(self.totals)
+        else:
+            fields = {field: sum(getattr(c, field) for c in counters) for field in FIELDS}
+        return {
+            "receive": fields["receive"],
+            "send": fields["send"],
+            "command": fields["command"],
+            "image": fields["image"],
+            "user_count": sum(c.user_count for c in counters),
+            "group_count": sum(c.group_count for c in counters),
+            "group": {},
+            "user": {},
+        }
+
+    def snapshot(self, bot_id: Optional[str] = None, bot_self_id: Optional[str] = None) -> PlatformVal:
+        """含各用户/群组指令明细的完整快照, 未指定机器人时合并全部机器人"""
+        pv = self.summary(bot_id, bot_self_id)
+        for counter in self._match(bot_id, bot_self_id):
+            counter.user.to_dict(pv["user"])
+            counter.group.to_dict(pv["group"])
+        return pv
+
+
+counter_store = CounterStore()
+
+
+class LivePlatformVal(dict):
+    """
+    单个机器人的统计字典, 兼容旧版`get_platform_val`返回可修改字典的用法
+
+    receive / send / command / image 的读取与赋值直接作用于计数器, `val["send"] += 1`仍然计入统计;
+    user / group 明细仍是快照, 修改不会生效, 请使用`counter_store.count_command`
+    """
+
+    def __init__(self, bot_id: str, bot_self_id: str, data: PlatformVal):
+        super().__init__(data)
+        self.bot_id = bot_id
+        self.bot_self_id = bot_self_id
+
+    def __getitem__(self, key: str):
+        if key in FIELDS:
+            return getattr(counter_store.get(self.bot_id, self.bot_self_id), key)
+        return super().__getitem__(key)
+
+    def __setitem__(self, key: str, value):
+        if key in FIELDS:
+            counter_store.add(self.bot_id, self.bot_self_id, key, value - self[key])
+        super().__setitem__(key, value)
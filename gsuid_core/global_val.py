@@ -2,13 +2,16 @@ import json
 import asyncio
 import datetime
 from copy import deepcopy
-from typing import Set, Dict, List, Tuple, Optional, Sequence, TypedDict
+from typing import Set, Dict, List, Tuple, Optional, Sequence
 from pathlib import Path
 
 import aiofiles
 
 from gsuid_core.logger import logger
 from gsuid_core.data_store import get_res_path
+from gsuid_core.counter_store import BotCounter, PlatformVal, CounterTable, LivePlatformVal, counter_store
+from gsuid_core.utils.database.active_rollup import active_rollup
+from gsuid_core.utils.plugins_config.gs_config import sp_config
 from gsuid_core.utils.database.global_val_models import (
     CountVal,
     DataType,
@@ -22,20 +25,6 @@ global_val_path = get_res_path(["GsCore", "global"])
 global_backup_path = get_res_path(["GsCore", "global_backup"])
 
 
-class PlatformVal(TypedDict):
-    receive: int
-    send: int
-    command: int
-    image: int
-    user_count: int
-    group_count: int
-    group: Dict[str, Dict[str, int]]
-    user: Dict[str, Dict[str, int]]
-
-
-GlobalVal = Dict[str, PlatformVal]
-BotVal = Dict[str, GlobalVal]
-
 platform_val: PlatformVal = {
     "receive": 0,
     "send": 0,
@@ -47,7 +36,6 @@ platform_val: PlatformVal = {
     "user": {},
 }
 
-bot_val: BotVal = {}
 bot_traffic: BotTraffic = {
     "req": 0,
     "max_qps": 0,
@@ -115,19 +103,16 @@ def merge_dict(dict1: PlatformVal, dict2: PlatformVal) -> PlatformVal:
     return result
 
 
-def get_platform_val(bot_id: Optional[str], bot_self_id: Optional[str]):
-    if bot_id is None or bot_self_id is None:
-        md = deepcopy(platform_val)
-        for bot_id in bot_val:
-            for bot_self_id in bot_val[bot_id]:
-                md = merge_dict(bot_val[bot_id][bot_self_id], md)
-        return md
+def get_platform_val(bot_id: Optional[str], bot_self_id: Optional[str]) -> PlatformVal:
+    """
+    获取当天统计, 未指定机器人时合并全部机器人, 此时返回值是快照
 
-    if bot_id not in bot_val:
-        bot_val[bot_id] = {}
-    if bot_self_id not in bot_val[bot_id]:
-        bot_val[bot_id][bot_self_id] = deepcopy(platform_val)
-    return bot_val[bot_id][bot_self_id]
+    指定机器人时与此前一样可以修改 receive / send / command / image, 例如`val["send"] += 1`;
+    user / group 明细是快照, 计数请使用`counter_store.add`/`counter_store.count_command`
+    """
+    if bot_id is None or bot_self_id is None:
+        return counter_store.snapshot(bot_id, bot_self_id)
+    return LivePlatformVal(bot_id, bot_self_id, counter_store.snapshot(bot_id, bot_self_id))  # type: ignore
 
 
 async def get_all_bot_dict() -> Dict[str, List[str]]:
@@ -261,89 +246,135 @@ async def get_global_analysis(
 async def load_all_global_val():
     today = datetime.date.today()
     logger.info(f"🔒️ 开始加载全局变量! 今日: {today}")
-    summarys: Optional[Sequence[CoreDataSummary]] = await CoreDataSummary.select_rows(date=today)
-    logger.debug(f"🔒️ summarys = {summarys}")
-    if summarys:
-        for summary in summarys:
-            if summary.bot_id not in bot_val:
-                bot_val[summary.bot_id] = {}
-            datas: Optional[Sequence[CoreDataAnalysis]] = await CoreDataAnalysis.select_rows(
-                date=today,
-                bot_id=summary.bot_id,
-                bot_self_id=summary.bot_self_id,
-            )
-            if datas:
-                platform_val = await trans_database_to_val(summary, datas)
-                bot_val[summary.bot_id][summary.bot_self_id] = platform_val
-    logger.debug(f"🔒️ bot_val = {bot_val}")
+
+    summarys = await CoreDataSummary.get_range(today, today) or []
+    # (bot_id, bot_self_id) -> (用户明细, 群组明细)
+    rows: Dict[Tuple[str, str], Tuple[List[Tuple[str, str, int]], List[Tuple[str, str, int]]]] = {
+        (summary[1], summary[2]): ([], []) for summary in summarys
+    }
+    async for batch in CoreDataAnalysis.stream_range(today, today):
+        for _, bot_id, bot_self_id, data_type, target_id, command_name, command_count in batch:
+            bot_rows = rows.get((bot_id, bot_self_id))
+            if bot_rows is None:
+                continue
+            users, groups = bot_rows
+            if data_type == DataType.USER:
+                users.append((target_id, command_name, command_count))
+            else:
+                groups.append((target_id, command_name, command_count))
+
+    for _, bot_id, bot_self_id, receive, send, command, image, _, _ in summarys:
+        users, groups = rows[(bot_id, bot_self_id)]
+        counter_store.load(
+            bot_id,
+            bot_self_id,
+            {"receive": receive, "send": send, "command": command, "image": image},
+            users,
+            groups,
+        )
+    logger.debug(f"🔒️ 已加载 {len(counter_store.bots)} 个机器人的统计")
     logger.success("🔒️ 全局变量加载完成!")
 
 
-async def save_all_global_val(day: int = 0):
-    logger.info(f"🔒️ 开始保存全局变量, 参数day = {day}!")
-    for bot_id in bot_val:
-        for bot_self_id in bot_val[bot_id]:
-            await save_global_val(bot_id, bot_self_id, day)
-    logger.success("🔒️ 全局变量保存完成!")
+async def get_global_val_range(
+    start: datetime.date,
+    end: datetime.date,
+    bot_id: Optional[str] = None,
+    bot_self_id: Optional[str] = None,
+) -> Dict[datetime.date, PlatformVal]:
+    """
+    读取[start, end]内每天的统计, 未指定机器人时合并全部机器人
 
+    概要与明细各一次查询, 明细按列流式读取并在一次遍历中汇总,
+    查询次数与天数、机器人数无关。没有概要数据的日期不会出现在结果中。
+    """
+    result: Dict[datetime.date, PlatformVal] = {}
+    for date, _, _, receive, send, command, image, user_count, group_count in (
+        await CoreDataSummary.get_range(start, end, bot_id, bot_self_id) or []
+    ):
+        pv = result.get(date)
+        if pv is None:
+            pv = result[date] = deepcopy(platform_val)
+        pv["receive"] += receive
+        pv["send"] += send
+        pv["command"] += command
+        pv["image"] += image
+        pv["user_count"] += user_count
+        pv["group_count"] += group_count
+
+    async for batch in CoreDataAnalysis.stream_range(start, end, bot_id, bot_self_id):
+        for date, _, _, data_type, target_id, command_name, command_count in batch:
+            pv = result.get(date)
+            if pv is None:
+                continue
+            targets = pv["user"] if data_type == DataType.USER else pv["group"]
+            data = targets.get(target_id)
+            if data is None:
+                data = targets[target_id] = {}
+            data[command_name] = data.get(command_name, 0) + command_count
+    return result
 
-async def trans_database_to_val(summary: CoreDataSummary, datas: Sequence[CoreDataAnalysis]) -> PlatformVal:
-    pv: PlatformVal = deepcopy(platform_val)
 
-    pv["command"] = summary.command
-    pv["image"] = summary.image
-    pv["receive"] = summary.receive
-    pv["send"] = summary.send
-    for data in datas:
-        if data.data_type == DataType.USER:
-            pv["user"][data.target_id] = {data.command_name: data.command_count}
-        if data.data_type == DataType.GROUP:
-            pv["group"][data.target_id] = {data.command_name: data.command_count}
-    return pv
+async def save_all_global_val(day: int = 0, full: bool = False):
+    """
+    保存全部机器人的统计
 
+    Args:
+        day: 0 时写入统计所属的日期, 否则写入 day 天前
+        full: 为 False 时只写入上次保存后变化过的记录, 为 True 时写入当天全部记录
+    """
+    # 增量保存每分钟都会执行, 只在调试日志中输出
+    log = logger.info if full else logger.debug
+    log(f"🔒️ 开始保存全局变量, 参数day = {day}, full = {full}!")
+    rows = 0
+    for bot_id, bot_self_id in list(counter_store.bots):
+        rows += await save_global_val(bot_id, bot_self_id, day, full)
+    log(f"🔒️ 全局变量保存完成, 写入 {rows} 条记录!")
 
-async def save_global_val(bot_id: str, bot_self_id: str, day: int = 0):
+
+async def save_global_val(bot_id: str, bot_self_id: str, day: int = 0, full: bool = False) -> int:
+    """保存单个机器人的统计, 返回写入的 CoreDataAnalysis 行数"""
     if not bot_self_id:
         logger.warning("🔒️ 全局变量保存失败, bot_self_id 为空!")
-        return
+        return 0
 
-    local_val = get_platform_val(bot_id, bot_self_id)
-    logger.debug(f"🔒️ local_val = {local_val}")
+    counter = counter_store.get(bot_id, bot_self_id)
+    if not full and not counter.changed:
+        return 0
+    logger.debug(f"🔒️ 保存 {bot_id}/{bot_self_id}: 用户 {counter.user_count} 群组 {counter.group_count}")
 
-    today = datetime.date.today() - datetime.timedelta(days=day)
-    await _save_global_val_to_database(local_val, bot_id, bot_self_id, today)
+    if day == 0:
+        today = counter_store.date
+    else:
+        today = datetime.date.today() - datetime.timedelta(days=day)
+    return await _save_global_val_to_database(counter, bot_id, bot_self_id, today, full)
 
 
 async def _save_global_val_to_database(
-    local_val: PlatformVal,
+    counter: BotCounter,
     bot_id: str,
     bot_self_id: str,
     today_datetime: datetime.date,
-):
-    insert_datas = []
-    for _g in local_val["group"]:
-        group_data = local_val["group"][_g]
-        for command_name in group_data:
-            command_count = group_data[command_name]
-            insert_datas.append(
-                CoreDataAnalysis(
-                    data_type=DataType.GROUP,
-                    target_id=_g,
-                    command_name=command_name,
-                    command_count=command_count,
-                    date=today_datetime,
-                    bot_id=bot_id,
-                    bot_self_id=bot_self_id,
-                )
-            )
-    for _u in local_val["user"]:
-        user_data = local_val["user"][_u]
-        for command_name in user_data:
-            command_count = user_data[command_name]
+    full: bool = False,
+) -> int:
+    # 先取出并清除脏标记再写库, 写库期间新增的计数留到下一次; 写入失败的记录重新标记, 下次再写
+    new_target = full or counter.user.new_target or counter.group.new_target
+    counter.changed = False
+    insert_datas: List[CoreDataAnalysis] = []
+    sources: List[Tuple[CounterTable, Tuple[str, str, int]]] = []
+    for data_type, table in ((DataType.GROUP, counter.group), (DataType.USER, counter.user)):
+        if full:
+            rows = list(table.items())
+            table.mark_clean()
+        else:
+            rows = table.take_dirty()
+        for row in rows:
+            target_id, command_name, command_count = row
+            sources.append((table, row))
             insert_datas.append(
                 CoreDataAnalysis(
-                    data_type=DataType.USER,
-                    target_id=_u,
+                    data_type=data_type,
+                    target_id=target_id,
                     command_name=command_name,
                     command_count=command_count,
                     date=today_datetime,
@@ -352,38 +383,59 @@ async def _save_global_val_to_database(
                 )
             )
 
-    await CoreDataAnalysis.batch_insert_data_with_update(
-        insert_datas,
-        ["command_count"],
-        [
-            "data_type",
-            "target_id",
-            "date",
-            "command_name",
-            "bot_id",
-            "bot_self_id",
-        ],
-    )
+    failed = 0
+    batch_size: int = sp_config.get_config("StatFlushBatch").data
+    for start in range(0, len(insert_datas), batch_size):
+        if not await CoreDataAnalysis.batch_insert_data_with_update(
+            insert_datas[start : start + batch_size],
+            ["command_count"],
+            [
+                "data_type",
+                "target_id",
+                "date",
+                "command_name",
+                "bot_id",
+                "bot_self_id",
+            ],
+        ):
+            batch = sources[start : start + batch_size]
+            failed += len(batch)
+            for table, row in batch:
+                table.mark_dirty((row,))
 
     insert_summary = []
     insert_summary.append(
         CoreDataSummary(
-            receive=local_val["receive"],
-            send=local_val["send"],
-            command=local_val["command"],
-            image=local_val["image"],
-            user_count=len(local_val["user"]),
-            group_count=len(local_val["group"]),
+            receive=counter.receive,
+            send=counter.send,
+            command=counter.command,
+            image=counter.image,
+            user_count=counter.user_count,
+            group_count=counter.group_count,
             date=today_datetime,
             bot_id=bot_id,
             bot_self_id=bot_self_id,
         )
     )
-    await CoreDataSummary.batch_insert_data_with_update(
+    summary_saved = await CoreDataSummary.batch_insert_data_with_update(
         insert_summary,
         ["receive", "send", "command", "image", "user_count", "group_count"],
         ["date", "bot_id", "bot_self_id"],
     )
+    if failed or not summary_saved:
+        counter.changed = True
+        logger.warning(f"🔒️ {bot_id}/{bot_self_id} 的统计有 {failed} 条记录写入失败, 将在下次保存时重试")
+    # 活跃位图只与目标集合有关, 没有新目标时无需重写
+    if new_target and not await active_rollup.update(
+        bot_id,
+        bot_self_id,
+        today_datetime,
+        counter.user.target_ids(),
+        counter.group.target_ids(),
+    ):
+        counter.user.new_target = True
+        counter.changed = True
+    return len(insert_datas) - failed
 
 
 def prepare_models_from_json(
@@ -569,33 +621,9 @@ async def get_global_val(
     day: Optional[int] = None,
 ) -> PlatformVal:
     if bot_self_id is None or bot_id is None:
-        pv = deepcopy(platform_val)
-        today = datetime.date.today()
-        summarys: Optional[Sequence[CoreDataSummary]] = []
-
-        if day:
-            date = today - datetime.timedelta(days=day)
-            _s = await CoreDataSummary.select_rows(date=date)
-            if _s:
-                summarys.extend(_s)
-        else:
-            summarys = await CoreDataSummary.select_rows(date=today)
-
-        if summarys:
-            for summary in summarys:
-                datas: Optional[Sequence[CoreDataAnalysis]] = await CoreDataAnalysis.select_rows(
-                    date=summary.date,
-                    bot_id=summary.bot_id,
-                    bot_self_id=summary.bot_self_id,
-                )
-                if datas:
-                    vl = await trans_database_to_val(summary, datas)
-                    pv = merge_dict(
-                        vl,
-                        pv,
-                    )
-
-        return pv
+        date = datetime.date.today() - datetime.timedelta(days=day or 0)
+        vals = await get_global_val_range(date, date)
+        return vals.get(date) or deepcopy(platform_val)
 
     if day is None or day == 0:
         return get_platform_val(bot_id, bot_self_id)
@@ -614,23 +642,8 @@ async def get_sp_val(
     bot_self_id: Optional[str],
     date: datetime.date,
 ) -> PlatformVal:
-    pv = deepcopy(platform_val)
     if bot_id is None and bot_self_id is None:
-        return pv
-
-    summary = await CoreDataSummary.base_select_data(
-        bot_id=bot_id,
-        bot_self_id=bot_self_id,
-        date=date,
-    )
-    if summary:
-        datas = await CoreDataAnalysis.select_rows(
-            bot_id=bot_id,
-            bot_self_id=bot_self_id,
-            date=date,
-        )
-
-        if datas:
-            pv = await trans_database_to_val(summary, datas)
+        return deepcopy(platform_val)
 
-    return pv
+    vals = await get_global_val_range(date, date, bot_id, bot_self_id)
+    return vals.get(date) or deepcopy(platform_val)
@@ -3,16 +3,19 @@ from copy import deepcopy
 from uuid import uuid4
 from typing import Dict, List
 
-from gsuid_core.sv import SL
 from gsuid_core.bot import Bot, _Bot
+from gsuid_core.perf import profiler
 from gsuid_core.config import core_config
 from gsuid_core.logger import logger
 from gsuid_core.models import Event, Message, TaskContext, MessageReceive
 from gsuid_core.trigger import Trigger
 from gsuid_core.subscribe import gs_subscribe
-from gsuid_core.global_val import get_platform_val
+from gsuid_core.sv_policy import sv_policy
 from gsuid_core.ai_core.rag import query_knowledge
+from gsuid_core.counter_store import counter_store
+from gsuid_core.trigger_index import trigger_index
 from gsuid_core.ai_core.models import ToolDef
+from gsuid_core.text_normalize import text_normalizer
 from gsuid_core.utils.cooldown import cooldown_tracker
 from gsuid_core.ai_core.register import get_registered_tools
 from gsuid_core.ai_core.ai_config import ai_config
@@ -22,9 +25,10 @@ from gsuid_core.ai_core.normalize import normalize_query
 from gsuid_core.ai_core.prompts_qa import qa_prompt
 from gsuid_core.ai_core.prompts_chat import chat_prompt
 from gsuid_core.ai_core.prompts_tools import tools_prompt
-from gsuid_core.utils.database.models import CoreUser, CoreGroup, Subscribe
+from gsuid_core.utils.database.models import Subscribe
 from gsuid_core.utils.resource_manager import RM
 from gsuid_core.ai_core.mode_classifier import classifier_service
+from gsuid_core.utils.database.user_registry import user_registry
 from gsuid_core.utils.plugins_config.gs_config import (
     sp_config,
     log_config,
@@ -75,15 +79,13 @@ async def handle_event(ws: _Bot, msg: MessageReceive, is_http: bool = False):
     same_user_cd: int = sp_config.get_config("SameUserEventCD").data
 
     # 获取用户权限，越小越高
-    msg.user_pm = user_pm = await get_user_pml(msg)
-    event = await msg_process(msg)
-    try:
+    with profiler.span("get_user_pml"):
+        msg.user_pm = user_pm = await get_user_pml(msg)
+    with profiler.span("msg_process"):
+        event = await msg_process(msg)
+    with profiler.span("opencc"):
         # 繁体转简体
-        from opencc import OpenCC
-        cc = OpenCC('t2s')  
-        event.raw_text = cc.convert(event.raw_text)
-    except Exception:
-            logger.info("[繁体转简体] 错误")
+        event.raw_text = text_normalizer.normalize(event.raw_text)
     event.WS_BOT_ID = ws.bot_id
     if show_receive:
         logger.info("[收到事件]", event_payload=event)
@@ -100,8 +102,7 @@ async def handle_event(ws: _Bot, msg: MessageReceive, is_http: bool = False):
                 event,
             )
 
-    local_val = get_platform_val(event.real_bot_id, event.bot_self_id)
-    local_val["receive"] += 1
+    counter_store.add(event.real_bot_id, event.bot_self_id, "receive")
 
     sender_nickname = None
     sender_avater = None
@@ -110,18 +111,19 @@ async def handle_event(ws: _Bot, msg: MessageReceive, is_http: bool = False):
     if event.sender and "avatar" in event.sender:
         sender_avater = event.sender["avatar"]
 
-    await CoreUser.insert_user(
-        event.real_bot_id,
-        event.user_id,
-        event.group_id,
-        sender_nickname,
-        sender_avater,
-    )
-    if event.group_id:
-        await CoreGroup.insert_group(
+    with profiler.span("upsert"):
+        user_registry.add_user(
             event.real_bot_id,
+            event.user_id,
             event.group_id,
+            sender_nickname,
+            sender_avater,
         )
+        if event.group_id:
+            user_registry.add_group(
+                event.real_bot_id,
+                event.group_id,
+            )
 
     bid = event.bot_id if event.bot_id else "0"
     uid = event.user_id if event.user_id else "0"
@@ -171,56 +173,18 @@ async def handle_event(ws: _Bot, msg: MessageReceive, is_http: bool = False):
                 return
 
     valid_event: Dict[Trigger, int] = {}
-    pending = [
-        _check_command(
-            SL.lst[sv].TL[_type][tr],
-            SL.lst[sv].priority,
-            event,
-            valid_event,
-        )
-        for sv in SL.lst
-        for _type in SL.lst[sv].TL
-        for tr in SL.lst[sv].TL[_type]
-        if (
-            msg.group_id not in black_list
-            and msg.user_id not in black_list
-            and SL.lst[sv].plugins.enabled
-            and user_pm <= SL.lst[sv].plugins.pm
-            and msg.group_id not in SL.lst[sv].plugins.black_list
-            and msg.user_id not in SL.lst[sv].plugins.black_list
-            and (
-                True
-                if SL.lst[sv].plugins.area == "SV"
-                or SL.lst[sv].plugins.area == "ALL"
-                or (event.user_type == "group" and SL.lst[sv].plugins.area == "GROUP")
-                or (event.user_type == "direct" and SL.lst[sv].plugins.area == "DIRECT")
-                else False
-            )
-            and (
-                True
-                if (not SL.lst[sv].plugins.white_list or SL.lst[sv].plugins.white_list == [""])
-                else (msg.user_id in SL.lst[sv].plugins.white_list or msg.group_id in SL.lst[sv].plugins.white_list)
-            )
-            and SL.lst[sv].enabled
-            and user_pm <= SL.lst[sv].pm
-            and msg.group_id not in SL.lst[sv].black_list
-            and msg.user_id not in SL.lst[sv].black_list
-            and (
-                True
-                if SL.lst[sv].area == "ALL"
-                or (SL.lst[sv].plugins.area == "ALL")
-                or (event.user_type == "group" and SL.lst[sv].area == "GROUP")
-                or (event.user_type == "direct" and SL.lst[sv].area == "DIRECT")
-                else False
-            )
-            and (
-                True
-                if (not SL.lst[sv].white_list or SL.lst[sv].white_list == [""])
-                else (msg.user_id in SL.lst[sv].white_list or msg.group_id in SL.lst[sv].white_list)
-            )
-        )
-    ]
-    await asyncio.gather(*pending, return_exceptions=True)
+    trigger_plugin: Dict[Trigger, str] = {}
+    if msg.group_id not in black_list and msg.user_id not in black_list:
+        with profiler.span("trigger_match"):
+            policies = sv_policy.get_bucket(event.user_type, user_pm)
+            sv_allowed: Dict[str, bool] = {}
+            for _, sv, trigger in trigger_index.get_candidates(event):
+                if sv.name not in sv_allowed:
+                    policy = policies.get(sv.name)
+                    sv_allowed[sv.name] = policy is not None and policy.check_target(msg.user_id, msg.group_id)
+                if sv_allowed[sv.name]:
+                    if _check_command(trigger, sv.priority, event, valid_event):
+                        trigger_plugin[trigger] = sv.plugins.name
 
     if len(valid_event) >= 1:
         if event.at:
@@ -258,8 +222,14 @@ async def handle_event(ws: _Bot, msg: MessageReceive, is_http: bool = False):
             coro = trigger.func(bot, message)
             func_name = getattr(coro, "__qualname__", str(coro))
             # 根据用户权限设置优先级，user_pm 越小优先级越高
-            task_ctx = TaskContext(coro=coro, name=func_name, priority=_event.user_pm)
-            ws.queue.put_nowait(task_ctx)
+            task_ctx = TaskContext(
+                coro=coro,
+                name=func_name,
+                priority=_event.user_pm,
+                plugin=trigger_plugin[trigger],
+                trace=profiler.current(),
+            )
+            ws.scheduler.submit(task_ctx)
             if _event.task_event:
                 return await ws.wait_task(_event.task_id, _event.task_event)
 
@@ -286,8 +256,14 @@ async def handle_event(ws: _Bot, msg: MessageReceive, is_http: bool = False):
         # 将AI处理逻辑放入队列异步执行，避免阻塞
         coro = _handle_ai_chat(ws, event)
         func_name = "_handle_ai_chat"
-        task_ctx = TaskContext(coro=coro, name=func_name, priority=event.user_pm)
-        ws.queue.put_nowait(task_ctx)
+        task_ctx = TaskContext(
+            coro=coro,
+            name=func_name,
+            priority=event.user_pm,
+            plugin="AI",
+            trace=profiler.current(),
+        )
+        ws.scheduler.submit(task_ctx)
 
 
 async def _handle_ai_chat(ws: _Bot, event: Event):
@@ -455,34 +431,25 @@ async def msg_process(msg: MessageReceive) -> Event:
 
 
 async def count_data(event: Event, trigger: Trigger):
-    local_val = get_platform_val(event.real_bot_id, event.bot_self_id)
-    local_val["command"] += 1
-    if event.group_id:
-        if event.group_id not in local_val["group"]:
-            local_val["group"][event.group_id] = {}
-
-        if trigger.keyword not in local_val["group"][event.group_id]:
-            local_val["group"][event.group_id][trigger.keyword] = 1
-        else:
-            local_val["group"][event.group_id][trigger.keyword] += 1
-        local_val["group_count"] = len(local_val["group"])
-
-    if event.user_id:
-        if event.user_id not in local_val["user"]:
-            local_val["user"][event.user_id] = {}
-        if trigger.keyword not in local_val["user"][event.user_id]:
-            local_val["user"][event.user_id][trigger.keyword] = 1
-        else:
-            local_val["user"][event.user_id][trigger.keyword] += 1
-
-        local_val["user_count"] = len(local_val["user"])
+    counter_store.count_command(
+        event.real_bot_id,
+        event.bot_self_id,
+        event.user_id,
+        event.group_id,
+        trigger.keyword,
+    )
 
 
-async def _check_command(
+def _check_command(
     trigger: Trigger,
     priority: int,
     message: Event,
     valid_event: Dict[Trigger, int],
-):
-    if trigger.check_command(message):
-        valid_event[trigger] = priority
+) -> bool:
+    try:
+        if trigger.check_command(message):
+            valid_event[trigger] = priority
+            return True
+    except Exception as e:
+        logger.warning(f"[GsCore] 触发器【{trigger.keyword}】检查失败: {e}")
+    return False
@@ -0,0 +1,315 @@
+"""
+日志索引
+
+每个`YYYY-MM-DD.log`旁维护一个`YYYY-MM-DD.log.idx`, 每行日志对应一条定长记录:
+    (行起始偏移 u64, 行长度 u32, 时间戳 u32, 日志等级 u8)
+索引由`DailyNamedFileHandler`写入日志时顺带追加, 读取时按偏移直接定位到所需的行,
+分页、按等级过滤与计数都无需解析整份日志。
+"""
+
+import os
+import json
+import mmap
+import time
+import struct
+import datetime
+from array import array
+from typing import Dict, List, Tuple, Optional
+from pathlib import Path
+from threading import Lock
+from collections import OrderedDict
+
+RECORD = struct.Struct("<QIIB")
+INDEX_SUFFIX = ".idx"
+
+# 前端展示使用的等级分类, 与原先的 level_mapping 保持一致, 未知等级归入 info
+LEVELS = ("info", "warn", "error", "debug")
+LEVEL_CODE = {
+    "info": 0,
+    "success": 0,
+    "trace": 0,
+    "warning": 1,
+    "warn": 1,
+    "error": 2,
+    "critical": 2,
+    "fatal": 2,
+    "exception": 2,
+    "debug": 3,
+}
+
+_LEVEL_KEY = b'"level": "'
+_TIME_KEY = b'"timestamp": "'
+
+
+def level_code_by_no(levelno: int) -> int:
+    if levelno >= 40:
+        return 2
+    if levelno >= 30:
+        return 1
+    if levelno == 10:
+        return 3
+    return 0
+
+
+def index_path(log_path: Path) -> Path:
+    return log_path.with_name(log_path.name + INDEX_SUFFIX)
+
+
+class LogIndexWriter:
+    """
+    由日志处理器持有, 每写一行日志追加一条索引记录
+
+    打开时若已有索引与日志不一致(例如旧版本写入的日志、异常退出), 则删除索引并停止写入,
+    由读取端扫描日志重建。
+    """
+
+    def __init__(self, log_path: str, log_size: int):
+        self.offset = log_size
+        self.path = index_path(Path(log_path))
+        self.file = None
+
+        if self._is_consistent(log_size):
+            self.file = open(self.path, "ab")
+        else:
+            self.path.unlink(missing_ok=True)
+
+    def _is_consistent(self, log_size: int) -> bool:
+        if log_size == 0:
+            # 新文件, 清空可能残留的旧索引
+            self.path.unlink(missing_ok=True)
+            return True
+        if not self.path.exists():
+            return False
+        index_size = self.path.stat().st_size
+        if index_size == 0 or index_size % RECORD.size:
+            return False
+        with open(self.path, "rb") as f:
+            f.seek(index_size - RECORD.size)
+            offset, length, _, _ = RECORD.unpack(f.read(RECORD.size))
+        return offset + length == log_size
+
+    def append(self, line_bytes: int, created: float, levelno: int):
+        if self.file is None:
+            return
+        try:
+            self.file.write(RECORD.pack(self.offset, line_bytes, int(created), level_code_by_no(levelno)))
+            self.file.flush()
+        except OSError:
+            self.close()
+        self.offset += line_bytes
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class IndexedLog:
+    """单个日志文件的内存索引, 以数组按列存放, 百万行约占用20MB"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.offsets = array("Q")
+        self.lengths = array("I")
+        self.times = array("I")
+        self.levels = array("B")
+        # 各等级分类下的行号, 用于按等级分页与计数
+        self.by_level: List[array] = [array("I") for _ in LEVELS]
+        # 已建立索引的日志字节数
+        self.size = 0
+        self.loaded = False
+        self.lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def _add(self, offset: int, length: int, ts: int, level: int):
+        self.by_level[level].append(len(self.offsets))
+        self.offsets.append(offset)
+        self.lengths.append(length)
+        self.times.append(ts)
+        self.levels.append(level)
+
+    def load_index(self) -> bool:
+        """读取旁路索引文件, 索引与日志不符时返回 False"""
+        idx = index_path(self.path)
+        if not idx.exists():
+            return False
+
+        data = idx.read_bytes()
+        data = data[: len(data) - len(data) % RECORD.size]
+        if not data:
+            return False
+
+        log_size = self.path.stat().st_size
+        last_offset, last_length, _, _ = RECORD.unpack_from(data, len(data) - RECORD.size)
+        if last_offset + last_length > log_size:
+            return False
+
+        for offset, length, ts, level in RECORD.iter_unpack(data):
+            self._add(offset, length, ts, level)
+        self.size = last_offset + last_length
+        return True
+
+    def scan(self) -> bytes:
+        """扫描尚未建立索引的日志尾部, 返回本次新增的索引记录"""
+        log_size = self.path.stat().st_size
+        if log_size <= self.size:
+            return b""
+
+        date_ts = _date_timestamp(self.path.stem)
+        records = bytearray()
+        offset = self.size
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # 最后一行可能还在写入, 下次再读
+                    break
+                length = len(line)
+                level, ts = _parse_line(line, date_ts)
+                self._add(offset, length, ts, level)
+                records += RECORD.pack(offset, length, ts, level)
+                offset += length
+        self.size = offset
+        return bytes(records)
+
+    def rows(self, level: Optional[str]) -> Tuple[int, Optional[array]]:
+        """返回(行数, 行号数组), 不过滤时行号数组为 None"""
+        if level is None:
+            return len(self), None
+        if level not in LEVELS:
+            return 0, array("I")
+        rows = self.by_level[LEVELS.index(level)]
+        return len(rows), rows
+
+    def counts(self) -> Dict[str, int]:
+        return {name: len(rows) for name, rows in zip(LEVELS, self.by_level)}
+
+
+def _date_timestamp(date: str) -> int:
+    try:
+        return int(time.mktime(datetime.datetime.strptime(date, "%Y-%m-%d").timetuple()))
+    except ValueError:
+        return 0
+
+
+def _parse_line(line: bytes, date_ts: int) -> Tuple[int, int]:
+    """
+    不做完整 JSON 解析, 只取出顶层的 level 与 timestamp
+
+    顶层的 level / timestamp 由 structlog 最后追加, 取最后一次出现的位置,
+    可以避开日志参数中同名的嵌套字段; 字符串中的引号会被转义, 不会误匹配。
+    """
+    level = 0
+    pos = line.rfind(_LEVEL_KEY)
+    if pos != -1:
+        start = pos + len(_LEVEL_KEY)
+        end = line.find(b'"', start)
+        level = LEVEL_CODE.get(line[start:end].decode("ascii", "ignore").lower(), 0)
+
+    ts = 0
+    pos = line.rfind(_TIME_KEY)
+    if pos != -1:
+        start = pos + len(_TIME_KEY)
+        # YYYY-MM-DD HH:MM:SS
+        t = line[start + 11 : start + 19]
+        try:
+            ts = date_ts + int(t[0:2]) * 3600 + int(t[3:5]) * 60 + int(t[6:8])
+        except ValueError:
+            ts = 0
+    return level, ts
+
+
+class LogReader:
+    """
+    日志读取器
+
+    - 首次访问某个日志时读取旁路索引, 缺失或不完整的部分扫描日志补齐
+    - 之后每次访问只扫描新增的尾部
+    - 历史日志(非当天)通过 mmap 读取所需的行, 补齐的索引会写回旁路文件
+    """
+
+    def __init__(self, max_files: int = 3):
+        self.max_files = max_files
+        self._logs: "OrderedDict[str, IndexedLog]" = OrderedDict()
+        self._lock = Lock()
+
+    def get_index(self, path: Path) -> IndexedLog:
+        with self._lock:
+            log = self._logs.get(path.name)
+            # 日志被截断或删除重建时, 旧索引作废
+            if log is None or path.stat().st_size < log.size:
+                log = self._logs[path.name] = IndexedLog(path)
+            self._logs.move_to_end(path.name)
+            while len(self._logs) > self.max_files:
+                self._logs.popitem(last=False)
+
+        with log.lock:
+            if not log.loaded:
+                log.loaded = True
+                log.load_index()
+            records = log.scan()
+            if records and not _is_today(path):
+                # 历史日志不会再被写入, 补齐的索引可以直接写回
+                self._save_index(log)
+        return log
+
+    def _save_index(self, log: IndexedLog):
+        idx = index_path(log.path)
+        tmp = idx.with_name(idx.name + ".tmp")
+        with open(tmp, "wb") as f:
+            for i in range(len(log)):
+                f.write(RECORD.pack(log.offsets[i], log.lengths[i], log.times[i], log.levels[i]))
+        os.replace(tmp, idx)
+
+    def read_rows(self, log: IndexedLog, rows: List[int]) -> List[Dict]:
+        """按行号读取并解析日志"""
+        if not rows:
+            return []
+
+        result: List[Dict] = []
+        with open(log.path, "rb") as f:
+            if _is_today(log.path):
+                # 当天日志仍在增长, 直接 seek 读取
+                for i in rows:
+                    f.seek(log.offsets[i])
+                    result.append(_decode(f.read(log.lengths[i])))
+            else:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    for i in rows:
+                        start = log.offsets[i]
+                        result.append(_decode(mm[start : start + log.lengths[i]]))
+        return result
+
+    def query(
+        self,
+        path: Path,
+        level: Optional[str] = None,
+        page: int = 1,
+        per_page: int = 50,
+    ) -> Tuple[int, List[Dict]]:
+        """分页读取日志, 返回(过滤后的总数, 当前页日志)"""
+        log = self.get_index(path)
+        total, rows = log.rows(level)
+        start = max(page - 1, 0) * per_page
+        end = min(start + per_page, total)
+        if start >= end:
+            return total, []
+        page_rows = list(range(start, end)) if rows is None else rows[start:end].tolist()
+        return total, self.read_rows(log, page_rows)
+
+
+def _is_today(path: Path) -> bool:
+    return path.stem == datetime.datetime.now().strftime("%Y-%m-%d")
+
+
+def _decode(line: bytes) -> Dict:
+    try:
+        ev = json.loads(line)
+    except ValueError:
+        ev = {"event": line.decode("utf-8", "replace").strip()}
+    return ev
+
+
+log_reader = LogReader()
@@ -1,3 +1,4 @@
+import os
 import re
 import sys
 import json
@@ -5,12 +6,11 @@ import asyncio
 import logging
 import datetime
 from copy import deepcopy
-from typing import Any, Dict, List, Optional, Protocol, Sequence
+from typing import Any, List, Optional, Protocol, Sequence
 from pathlib import Path
 from functools import wraps
 from logging.handlers import TimedRotatingFileHandler
 
-import aiofiles
 import structlog
 from colorama import Fore, Style, init
 from structlog.dev import ConsoleRenderer
@@ -19,6 +19,7 @@ from structlog.processors import CallsiteParameter, CallsiteParameterAdder
 
 from gsuid_core.config import core_config
 from gsuid_core.models import Event, Message
+from gsuid_core.log_index import LogIndexWriter
 from gsuid_core.data_store import get_res_path, error_mark_path
 
 log_history: List[EventDict] = []
@@ -37,6 +38,8 @@ class DailyNamedFileHandler(TimedRotatingFileHandler):
 
         self.base_filename_template = "{date}.log"
         filename = self._get_dated_filename()
+        self.index: Optional[LogIndexWriter] = None
+        self._last_msg: Optional[str] = None
 
         super().__init__(
             filename=filename,
@@ -64,6 +67,34 @@ class DailyNamedFileHandler(TimedRotatingFileHandler):
         if not self.delay:
             self.stream = self._open()
 
+    def _open(self):
+        stream = super()._open()
+        # 每个日志文件对应一份旁路索引, 随日志一起追加
+        if self.index is not None:
+            self.index.close()
+        self.index = LogIndexWriter(self.baseFilename, os.path.getsize(self.baseFilename))
+        return stream
+
+    def format(self, record: logging.LogRecord) -> str:
+        msg = super().format(record)
+        self._last_msg = msg
+        return msg
+
+    def emit(self, record: logging.LogRecord):
+        self._last_msg = None
+        super().emit(record)
+        if self.index is not None and self._last_msg is not None:
+            # 文本模式下换行符会被转换为系统换行符(Windows 下为\r\n)
+            terminator = self.terminator.replace("\n", os.linesep)
+            line_bytes = len((self._last_msg + terminator).encode(self.encoding or "utf-8"))
+            self.index.append(line_bytes, record.created, record.levelno)
+
+    def close(self):
+        if self.index is not None:
+            self.index.close()
+            self.index = None
+        super().close()
+
 
 class TraceCapableLogger(Protocol):
     def trace(self, event: Any, *args: Any, **kwargs: Any) -> None: ...
@@ -517,42 +548,5 @@ def handle_exceptions(async_function):
     return wrapper
 
 
-class HistoryLogData:
-    def __init__(self):
-        self.log_list: Dict[str, List[Dict]] = {}
-
-    async def get_parse_logs(self, log_file_path: Path):
-        if log_file_path.name in self.log_list:
-            return self.log_list[log_file_path.name]
-
-        log_entries: List[Dict] = []
-
-        async with aiofiles.open(log_file_path, "r", encoding="utf-8") as file:
-            lines = await file.readlines()
-
-        current_entry = None
-
-        _id = 1
-        for line in lines:
-            ev: Dict[str, str] = json.loads(line.strip())
-
-            if current_entry:
-                log_entries.append(current_entry)
-            current_entry = {
-                "id": _id,
-                "时间": ev["timestamp"],
-                "日志等级": ev["level"].upper(),
-                # '模块': ev['pathname'],
-                "内容": ev["event"],
-            }
-            _id += 1
-
-        if current_entry:
-            log_entries.append(current_entry)
-
-        self.log_list[log_file_path.name] = log_entries
-        return log_entries
-
-
 def get_all_log_path():
     return [file for file in LOG_PATH.iterdir() if file.is_file() and file.suffix == ".log"]
@@ -1,10 +1,16 @@
 import time
 import asyncio
-from typing import Any, Dict, List, Tuple, Literal, Optional, Awaitable
+import itertools
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple, Literal, Optional, Awaitable
 from dataclasses import dataclass
 
 from msgspec import Struct
 
+if TYPE_CHECKING:
+    from gsuid_core.perf import Span
+
+_task_seq = itertools.count()
+
 
 @dataclass
 class TaskContext:
@@ -12,12 +18,19 @@ class TaskContext:
     name: str
     create_time: float = 0.0
     priority: int = 2
+    # 所属插件, 调度器据此做公平调度与并发限制
+    plugin: str = ""
+    # 提交顺序, 保证同优先级任务先进先出
+    seq: int = 0
+    # 提交时所在的耗时追踪, 消息未被采样时为 None
+    trace: "Optional[Span]" = None
 
     def __post_init__(self):
         self.create_time = time.perf_counter()
+        self.seq = next(_task_seq)
 
     def __lt__(self, other: "TaskContext") -> bool:
-        return self.priority < other.priority
+        return (self.priority, self.seq) < (other.priority, other.seq)
 
 
 class Message(Struct):
@@ -0,0 +1,237 @@
+"""
+消息处理热路径耗时剖析
+
+按采样率对收到的消息开启追踪, 记录从解码到发送各阶段的耗时:
+    decode / get_user_pml / msg_process / opencc / upsert / trigger_match /
+    queue_wait / plugin / convert_message / send
+
+- 每个阶段的耗时汇总到对数线性分桶的直方图(HdrHistogram), 全局一份, 按插件再各一份
+- 同时按调用栈累计自身耗时, 可导出为 flamegraph.pl / speedscope 可读的折叠栈格式
+- 采样关闭或消息未被采样时, `span()`只做一次 ContextVar 读取并返回共享的空对象
+"""
+
+import time
+import random
+from typing import Dict, List, Union, Optional
+from contextvars import ContextVar
+
+from gsuid_core.utils.plugins_config.gs_config import sp_config
+
+
+class HdrHistogram:
+    """
+    对数线性分桶的耗时直方图(微秒)
+
+    小于16us的值精确计数, 其后每个2的幂区间分为8个子桶, 相对误差不超过12.5%,
+    覆盖从1us到数小时的范围只需约300个整数槽位。
+    """
+
+    SUB_BITS = 3
+    SIZE = 320
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * self.SIZE
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    @classmethod
+    def _index(cls, value: int) -> int:
+        if value < 2 << cls.SUB_BITS:
+            return value
+        exp = value.bit_length() - cls.SUB_BITS - 1
+        return min((exp << cls.SUB_BITS) + (value >> exp), cls.SIZE - 1)
+
+    @classmethod
+    def _upper(cls, index: int) -> int:
+        """槽位对应区间的上界"""
+        if index < 2 << cls.SUB_BITS:
+            return index
+        exp = (index >> cls.SUB_BITS) - 1
+        mantissa = (index & ((1 << cls.SUB_BITS) - 1)) + (1 << cls.SUB_BITS)
+        return ((mantissa + 1) << exp) - 1
+
+    def observe(self, us: int):
+        self.counts[self._index(us)] += 1
+        self.count += 1
+        self.total += us
+        if us > self.max:
+            self.max = us
+
+    def percentile(self, q: float) -> int:
+        if not self.count:
+            return 0
+        target = q * self.count
+        acc = 0
+        for i, c in enumerate(self.counts):
+            acc += c
+            if acc >= target:
+                return min(self._upper(i), self.max)
+        return self.max
+
+    def to_dict(self) -> Dict[str, Union[int, float]]:
+        return {
+            "count": self.count,
+            "avg_us": round(self.total / self.count, 1) if self.count else 0.0,
+            "max_us": self.max,
+            "p50_us": self.percentile(0.5),
+            "p90_us": self.percentile(0.9),
+            "p99_us": self.percentile(0.99),
+            "p999_us": self.percentile(0.999),
+        }
+
+
+class _NoopSpan:
+    """未采样时使用的空对象"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+_NOOP = _NoopSpan()
+_current: "ContextVar[Optional[Span]]" = ContextVar("gscore_perf_span", default=None)
+
+
+class Span:
+    __slots__ = ("profiler", "stage", "path", "plugin", "parent", "start", "child", "token")
+
+    def __init__(
+        self,
+        profiler: "Profiler",
+        stage: str,
+        parent: "Optional[Span]",
+        plugin: str = "",
+    ):
+        self.profiler = profiler
+        self.stage = stage
+        self.parent = parent
+        self.plugin = plugin or (parent.plugin if parent else "")
+        # 显式指定插件的阶段在调用栈中带上插件名, 便于火焰图区分
+        name = f"{stage}[{plugin}]" if plugin else stage
+        self.path = f"{parent.path};{name}" if parent else name
+        self.start = 0
+        # 子阶段的总耗时, 用于计算自身耗时
+        self.child = 0
+        self.token = None
+
+    def __enter__(self):
+        self.token = _current.set(self)
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *args):
+        duration = time.perf_counter_ns() - self.start
+        if self.token is not None:
+            _current.reset(self.token)
+        if self.parent is not None:
+            self.parent.child += duration
+        self.profiler.record(self.stage, self.plugin, self.path, duration, duration - self.child)
+        return False
+
+
+class Profiler:
+    def __init__(self, sample_rate: float = 0.0):
+        self.sample_rate = sample_rate
+        self.sampled = 0
+        self.stages: Dict[str, HdrHistogram] = {}
+        self.plugins: Dict[str, Dict[str, HdrHistogram]] = {}
+        # 调用栈 -> 自身耗时(纳秒)
+        self.folded: Dict[str, int] = {}
+
+    def set_sample_rate(self, rate: float):
+        self.sample_rate = min(max(rate, 0.0), 1.0)
+
+    def trace(self, stage: str) -> Union[Span, _NoopSpan]:
+        """按采样率开始一次追踪, 未采样时返回空对象"""
+        if not self.sample_rate or (self.sample_rate < 1 and random.random() >= self.sample_rate):
+            return _NOOP
+        self.sampled += 1
+        return Span(self, stage, None)
+
+    def span(
+        self,
+        stage: str,
+        parent: Optional[Span] = None,
+        plugin: str = "",
+    ) -> Union[Span, _NoopSpan]:
+        """
+        记录一个阶段, 默认挂在当前上下文的追踪下, 当前消息未被采样时返回空对象
+        跨任务时(如调度器执行插件)需显式传入提交时的 parent
+        """
+        if parent is None:
+            parent = _current.get()
+            if parent is None:
+                return _NOOP
+        return Span(self, stage, parent, plugin)
+
+    def resume(self, parent: Optional[Span], stage: str, plugin: str = "") -> Union[Span, _NoopSpan]:
+        """
+        在执行插件的独立任务中继续提交时的追踪
+
+        任务会继承创建它时的上下文, 未采样时需清除继承到的追踪, 避免记到无关的消息上。
+        只能在独立的任务中调用, 清除不会被还原。
+        """
+        if parent is None:
+            _current.set(None)
+            return _NOOP
+        return Span(self, stage, parent, plugin)
+
+    def current(self) -> Optional[Span]:
+        return _current.get()
+
+    def add(self, stage: str, duration_ns: int, parent: Optional[Span], plugin: str = ""):
+        """记录一段不在`with`块中测量的耗时, 如排队等待"""
+        if parent is None:
+            return
+        parent.child += duration_ns
+        self.record(stage, plugin or parent.plugin, f"{parent.path};{stage}", duration_ns, duration_ns)
+
+    def record(self, stage: str, plugin: str, path: str, duration_ns: int, self_ns: int):
+        us = duration_ns // 1000
+        hist = self.stages.get(stage)
+        if hist is None:
+            hist = self.stages[stage] = HdrHistogram()
+        hist.observe(us)
+
+        if plugin:
+            plugin_stages = self.plugins.get(plugin)
+            if plugin_stages is None:
+                plugin_stages = self.plugins[plugin] = {}
+            hist = plugin_stages.get(stage)
+            if hist is None:
+                hist = plugin_stages[stage] = HdrHistogram()
+            hist.observe(us)
+
+        self.folded[path] = self.folded.get(path, 0) + max(self_ns, 0)
+
+    def reset(self):
+        self.sampled = 0
+        self.stages.clear()
+        self.plugins.clear()
+        self.folded.clear()
+
+    def get_stats(self) -> Dict:
+        return {
+            "sample_rate": self.sample_rate,
+            "sampled": self.sampled,
+            "stages": {stage: hist.to_dict() for stage, hist in self.stages.items()},
+            "plugins": {
+                plugin: {stage: hist.to_dict() for stage, hist in stages.items()}
+                for plugin, stages in self.plugins.items()
+            },
+        }
+
+    def export_folded(self) -> str:
+        """折叠栈格式, 每行为`阶段;子阶段 自身耗时(微秒)`"""
+        lines: List[str] = [f"{path} {ns // 1000}" for path, ns in sorted(self.folded.items()) if ns >= 1000]
+        return "\n".join(lines)
+
+
+profiler = Profiler(sp_config.get_config("PerfSampleRate").data / 100)
@@ -76,3 +76,9 @@ def to_process(func: Callable[..., Any]) -> Callable[..., Awaitable[Any]]:
         )
 
     return cast(Callable[..., Awaitable[Any]], wrapper)
+
+
+async def run_in_process(func: Callable[..., T], *args: Any) -> T:
+    """在进程池中执行模块级的同步函数, 参数与返回值需可 pickle"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_process_executor, functools.partial(func, *args))
@@ -0,0 +1,416 @@
+import time
+import heapq
+import asyncio
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Dict, List, Type, Tuple, Union, Optional
+
+from gsuid_core.perf import profiler
+from gsuid_core.logger import logger
+from gsuid_core.models import TaskContext
+from gsuid_core.global_val import bot_traffic
+from gsuid_core.utils.plugins_config.gs_config import sp_config
+
+scheduler_type: str = sp_config.get_config("TaskScheduler").data
+task_concurrency: int = sp_config.get_config("TaskConcurrency").data
+plugin_concurrency: int = sp_config.get_config("TaskPluginConcurrency").data
+plugin_weight: List[str] = sp_config.get_config("TaskPluginWeight").data
+task_queue_size: int = sp_config.get_config("TaskQueueSize").data
+shed_policy: str = sp_config.get_config("TaskShedPolicy").data
+task_max_wait: int = sp_config.get_config("TaskMaxWait").data
+
+# 未标明所属插件的任务(例如AI对话)归入该分组
+DEFAULT_PLUGIN = "core"
+
+
+class LatencyHistogram:
+    """固定分桶的耗时直方图(毫秒), 用于估算分位数"""
+
+    BOUNDS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, ms: float):
+        self.counts[bisect_left(self.BOUNDS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def percentile(self, q: float) -> float:
+        """返回分位数所在桶的上界, 落在最后一个桶时返回最大值"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        acc = 0
+        for i, c in enumerate(self.counts):
+            acc += c
+            if acc >= target:
+                return float(self.BOUNDS[i]) if i < len(self.BOUNDS) else self.max
+        return self.max
+
+    def to_dict(self) -> Dict[str, Union[int, float, Dict[str, int]]]:
+        buckets = {f"<={b}": c for b, c in zip(self.BOUNDS, self.counts)}
+        buckets["inf"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "avg": round(self.total / self.count, 2) if self.count else 0.0,
+            "max": round(self.max, 2),
+            "p50": self.percentile(0.5),
+            "p90": self.percentile(0.9),
+            "p99": self.percentile(0.99),
+            "buckets": buckets,
+        }
+
+
+class PluginStats:
+    __slots__ = ("wait", "run", "submitted", "finished", "failed", "shed", "expired", "running", "queued")
+
+    def __init__(self):
+        self.wait = LatencyHistogram()
+        self.run = LatencyHistogram()
+        self.submitted = 0
+        self.finished = 0
+        self.failed = 0
+        self.shed = 0
+        self.expired = 0
+        self.running = 0
+        self.queued = 0
+
+    def to_dict(self) -> Dict:
+        return {
+            "submitted": self.submitted,
+            "finished": self.finished,
+            "failed": self.failed,
+            "shed": self.shed,
+            "expired": self.expired,
+            "running": self.running,
+            "queued": self.queued,
+            "wait_ms": self.wait.to_dict(),
+            "run_ms": self.run.to_dict(),
+        }
+
+
+def _parse_weight(weights: List[str]) -> Dict[str, float]:
+    result: Dict[str, float] = {}
+    for item in weights:
+        name, _, value = item.rpartition(":")
+        try:
+            if name and float(value) > 0:
+                result[name] = float(value)
+        except ValueError:
+            logger.warning(f"[任务调度] 插件权重配置【{item}】格式错误, 应为 插件名:权重")
+    return result
+
+
+class BaseScheduler(ABC):
+    """
+    命令任务调度器基类
+
+    子类只需实现排队结构(`_push`/`_pop`/`_evict`), 并发控制、队列上限与丢弃、
+    超时丢弃以及按插件统计的排队/执行耗时直方图由基类统一处理。
+    """
+
+    def __init__(
+        self,
+        name: str = "",
+        concurrency: int = task_concurrency,
+        per_plugin: int = plugin_concurrency,
+        max_queue: int = task_queue_size,
+        policy: str = shed_policy,
+        max_wait: float = task_max_wait,
+        weights: Optional[Dict[str, float]] = None,
+    ):
+        self.name = name
+        self.concurrency = max(concurrency, 1)
+        self.per_plugin = per_plugin
+        self.max_queue = max(max_queue, 1)
+        self.policy = policy
+        self.max_wait = max_wait
+        self.weights = weights if weights is not None else _parse_weight(plugin_weight)
+
+        self.running = 0
+        self.stats: Dict[str, PluginStats] = {}
+        self._tasks = set()
+        self._wakeup = asyncio.Event()
+        self._runner: Optional[asyncio.Task] = None
+
+    @abstractmethod
+    def __len__(self) -> int: ...
+
+    @abstractmethod
+    def _push(self, ctx: TaskContext): ...
+
+    @abstractmethod
+    def _pop(self) -> Optional[TaskContext]:
+        """取出下一个可执行的任务, 需跳过已达并发上限的插件"""
+
+    @abstractmethod
+    def _evict(self, ctx: TaskContext) -> Optional[TaskContext]:
+        """队列已满时选出被丢弃的任务, 可以是新任务本身, 被选中的旧任务需从队列移除"""
+
+    def _get_stats(self, plugin: str) -> PluginStats:
+        stats = self.stats.get(plugin)
+        if stats is None:
+            stats = self.stats[plugin] = PluginStats()
+        return stats
+
+    def _plugin_full(self, plugin: str) -> bool:
+        if self.per_plugin <= 0:
+            return False
+        stats = self.stats.get(plugin)
+        return stats is not None and stats.running >= self.per_plugin
+
+    def submit(self, ctx: TaskContext) -> bool:
+        """提交任务, 被丢弃时返回 False"""
+        if not ctx.plugin:
+            ctx.plugin = DEFAULT_PLUGIN
+        self._get_stats(ctx.plugin).submitted += 1
+
+        if len(self) >= self.max_queue:
+            victim = ctx if self.policy == "reject" else self._evict(ctx)
+            if victim is None:
+                victim = ctx
+            self._drop(victim, "shed")
+            if victim is ctx:
+                return False
+
+        self._push(ctx)
+        self._get_stats(ctx.plugin).queued += 1
+        self._wakeup.set()
+        self.ensure_running()
+        return True
+
+    def _drop(self, ctx: TaskContext, reason: str):
+        stats = self._get_stats(ctx.plugin)
+        if reason == "shed":
+            stats.shed += 1
+            logger.warning(f"[任务调度] 队列已满({self.max_queue}), 丢弃任务 {ctx.name}")
+        else:
+            stats.expired += 1
+            wait = time.perf_counter() - ctx.create_time
+            logger.warning(f"[任务调度] 任务 {ctx.name} 已排队 {wait:.2f}s, 超过 {self.max_wait}s, 不再执行")
+        # 关闭未执行的协程, 避免 "coroutine was never awaited"
+        close = getattr(ctx.coro, "close", None)
+        if close is not None:
+            close()
+
+    def ensure_running(self):
+        if self._runner is None or self._runner.done():
+            self._runner = asyncio.create_task(self._dispatch())
+
+    async def run(self):
+        self.ensure_running()
+        if self._runner is not None:
+            await self._runner
+
+    async def _dispatch(self):
+        while True:
+            ctx = self._pop() if self.running < self.concurrency else None
+            if ctx is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            stats = self._get_stats(ctx.plugin)
+            stats.queued -= 1
+            if self.max_wait > 0 and time.perf_counter() - ctx.create_time > self.max_wait:
+                self._drop(ctx, "expired")
+                continue
+
+            self.running += 1
+            stats.running += 1
+            task = asyncio.create_task(self._execute(ctx, stats))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _execute(self, ctx: TaskContext, stats: PluginStats):
+        start_exec_time = time.perf_counter()
+        wait_time = start_exec_time - ctx.create_time
+        stats.wait.observe(wait_time * 1000)
+
+        if wait_time > 5.0:
+            logger.warning(f"[排队警告] 函数 {ctx.name} 等待了 {wait_time:.2f}s 才开始执行")
+
+        func_name = ctx.name
+        profiler.add("queue_wait", int(wait_time * 1e9), ctx.trace, ctx.plugin)
+        try:
+            bot_traffic["req"] += 1
+            bot_traffic["max_qps"] = max(bot_traffic["max_qps"], bot_traffic["req"])
+            logger.trace(f"[核心执行] 函数 {func_name} 开始执行")
+            with profiler.resume(ctx.trace, "plugin", ctx.plugin):
+                await ctx.coro
+        except Exception:
+            stats.failed += 1
+            logger.exception(f"[核心执行异常] 函数 {func_name} 执行发生未捕获异常")
+        finally:
+            end_time = time.perf_counter()
+            run_duration = end_time - start_exec_time
+            total_duration = end_time - ctx.create_time
+            stats.run.observe(run_duration * 1000)
+            stats.finished += 1
+
+            bot_traffic["total_count"] += 1
+            bot_traffic["total_time"] += total_duration
+            if run_duration > bot_traffic["max_runtime"]:
+                bot_traffic["max_runtime"] = run_duration
+                bot_traffic["max_runtime_func"] = func_name
+            bot_traffic["max_wait_time"] = max(bot_traffic["max_wait_time"], wait_time)
+            bot_traffic["max_time"] = max(bot_traffic["max_time"], total_duration)
+
+            bot_traffic["req"] -= 1
+            stats.running -= 1
+            self.running -= 1
+            self._wakeup.set()
+
+    def get_stats(self) -> Dict:
+        return {
+            "scheduler": type(self).__name__,
+            "queued": len(self),
+            "running": self.running,
+            "concurrency": self.concurrency,
+            "per_plugin": self.per_plugin,
+            "max_queue": self.max_queue,
+            "plugins": {name: stats.to_dict() for name, stats in self.stats.items()},
+        }
+
+
+QueueItem = Tuple[int, int, float, TaskContext]
+
+
+class _Flow:
+    __slots__ = ("heap", "last_tag")
+
+    def __init__(self):
+        # (优先级, 提交顺序, 虚拟完成时间, 任务)
+        self.heap: List[QueueItem] = []
+        self.last_tag = 0.0
+
+
+class FairScheduler(BaseScheduler):
+    """
+    按插件加权公平调度
+
+    - 不同优先级之间严格按优先级(`user_pm`越小越先)
+    - 同优先级下各插件按加权公平队列(WFQ)的虚拟完成时间轮流出队,
+      单个插件积压大量任务时不会饿死其他插件
+    - 同一插件内按提交顺序先进先出
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._flows: Dict[str, _Flow] = {}
+        self._size = 0
+        self._vtime = 0.0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _push(self, ctx: TaskContext):
+        flow = self._flows.get(ctx.plugin)
+        if flow is None:
+            flow = self._flows[ctx.plugin] = _Flow()
+        tag = max(self._vtime, flow.last_tag) + 1 / self.weights.get(ctx.plugin, 1)
+        flow.last_tag = tag
+        heapq.heappush(flow.heap, (ctx.priority, ctx.seq, tag, ctx))
+        self._size += 1
+
+    def _pop(self) -> Optional[TaskContext]:
+        best: Optional[Tuple[int, float, int]] = None
+        best_flow: Optional[_Flow] = None
+        for plugin, flow in self._flows.items():
+            if not flow.heap or self._plugin_full(plugin):
+                continue
+            priority, seq, tag, _ = flow.heap[0]
+            key = (priority, tag, seq)
+            if best is None or key < best:
+                best, best_flow = key, flow
+
+        if best_flow is None:
+            return None
+
+        _, _, tag, ctx = heapq.heappop(best_flow.heap)
+        self._vtime = max(self._vtime, tag)
+        self._size -= 1
+        if not best_flow.heap:
+            # 没有排队任务的插件不再参与扫描, 再次提交时重新创建
+            del self._flows[ctx.plugin]
+        return ctx
+
+    def _evict(self, ctx: TaskContext) -> Optional[TaskContext]:
+        plugin, flow = max(self._flows.items(), key=lambda x: len(x[1].heap))
+        index = max(range(len(flow.heap)), key=lambda i: flow.heap[i][:2])
+        victim = flow.heap[index][3]
+        # 新任务优先级更低, 或与积压最多的插件同属一个插件时, 直接丢弃新任务
+        if ctx.priority > victim.priority or (ctx.priority == victim.priority and ctx.plugin == plugin):
+            return ctx
+
+        flow.heap[index] = flow.heap[-1]
+        flow.heap.pop()
+        heapq.heapify(flow.heap)
+        self._size -= 1
+        self.stats[plugin].queued -= 1
+        return victim
+
+
+class PriorityScheduler(BaseScheduler):
+    """仅按优先级调度, 同优先级先进先出, 同样遵守单插件并发上限"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._heap: List[TaskContext] = []
+        # 因所属插件并发已满而暂缓的任务
+        self._deferred: List[TaskContext] = []
+
+    def __len__(self) -> int:
+        return len(self._heap) + len(self._deferred)
+
+    def _push(self, ctx: TaskContext):
+        heapq.heappush(self._heap, ctx)
+
+    def _pop(self) -> Optional[TaskContext]:
+        if self._deferred:
+            for ctx in self._deferred:
+                heapq.heappush(self._heap, ctx)
+            self._deferred = []
+
+        result = None
+        while self._heap:
+            ctx = heapq.heappop(self._heap)
+            if self._plugin_full(ctx.plugin):
+                self._deferred.append(ctx)
+                continue
+            result = ctx
+            break
+        return result
+
+    def _evict(self, ctx: TaskContext) -> Optional[TaskContext]:
+        self._heap.extend(self._deferred)
+        self._deferred = []
+        victim = max(self._heap)
+        if ctx.priority > victim.priority:
+            return ctx
+        self._heap.remove(victim)
+        heapq.heapify(self._heap)
+        self.stats[victim.plugin].queued -= 1
+        return victim
+
+
+SCHEDULERS: Dict[str, Type[BaseScheduler]] = {
+    "fair": FairScheduler,
+    "priority": PriorityScheduler,
+}
+
+
+def create_scheduler(name: str = "") -> BaseScheduler:
+    scheduler = SCHEDULERS.get(scheduler_type)
+    if scheduler is None:
+        logger.warning(f"[任务调度] 未知的调度器类型【{scheduler_type}】, 使用 fair")
+        scheduler = FairScheduler
+    return scheduler(name)
@@ -10,13 +10,14 @@ from pathlib import Path
 import msgspec
 from PIL import Image
 
-from gsuid_core.models import Message
+from gsuid_core.models import Message, MessageSend
 from gsuid_core.data_store import image_res
-from gsuid_core.global_val import get_global_val
+from gsuid_core.counter_store import counter_store
 from gsuid_core.load_template import markdown_templates, markdown_templates_by_bot
 from gsuid_core.message_models import Button, ButtonList
-from gsuid_core.utils.image.convert import text2pic
-from gsuid_core.utils.image.image_tools import sget
+from gsuid_core.utils.image.convert import ImageBytes, text2pic, encode_image
+from gsuid_core.utils.image.encoder import image_encoder
+from gsuid_core.utils.image.url_cache import url_image_cache
 from gsuid_core.utils.plugins_config.gs_config import (
     bm_config,
     pic_gen_config,
@@ -36,6 +37,9 @@ pic_quality: int = pic_gen_config.get_config("PicQuality").data
 
 is_text2pic = False
 
+# 发送链路中以原始字节携带的图片
+ImageData = Union[bytes, bytearray, memoryview]
+
 pclient = None
 if IS_UPLOAD:
     if SERVER == "smms":
@@ -52,9 +56,6 @@ if IS_UPLOAD:
         pclient = CUSTOM()
 
 
-URL_MAP = {}
-
-
 def process_buttons(buttons: ButtonList) -> ButtonList:
     if not buttons:
         return buttons
@@ -91,33 +92,35 @@ class MessageSegment:
 
     @staticmethod
     def image(img: Union[str, Image.Image, bytes, Path]) -> Message:
+        """
+        图片以原始字节携带, 直到发送时(`encode_message_send`)才按需编码为 base64
+
+        返回消息的`data`:
+            - 传入 Image/bytes/路径时为`bytes`, 不再是`base64://`字符串, 需要字符串时使用`image_to_base64`
+            - 传入 URL 时为`link://`字符串, 传入`base64://`字符串时原样保留
+        """
         if isinstance(img, Image.Image):
-            img = img.convert("RGB")
-            result_buffer = BytesIO()
-            img.save(result_buffer, format="PNG", quality=pic_quality, subsampling=0)
-            img = result_buffer.getvalue()
+            img = encode_image(img, "PNG", quality=pic_quality, subsampling=0)
         elif isinstance(img, bytes):
             pass
+        elif isinstance(img, (bytearray, memoryview)):
+            # 可变或借用的缓冲区拷贝一份, 避免发送前被调用方修改或释放
+            img = bytes(img)
         elif isinstance(img, Path):
             with open(str(img), "rb") as fp:
                 img = fp.read()
-        elif isinstance(img, (bytearray, memoryview)):
-            img = bytes(img)
         else:
             if img.startswith("http"):
                 return Message(type="image", data=f"link://{img}")
             if img.startswith("base64://") and not IS_UPLOAD:
                 return Message(type="image", data=img)
             elif img.startswith("base64://"):
-                img = b64decode(img.replace("base64://", ""))
+                img = _image_bytes(img)
             else:
                 with open(img, "rb") as fp:
                     img = fp.read()
 
-        data = f"base64://{b64encode(img).decode()}"
-
-        msg = Message(type="image", data=data)
-        return msg
+        return Message(type="image", data=img)
 
     @staticmethod
     def text(content: str) -> Message:
@@ -181,10 +184,8 @@ class MessageSegment:
         for msg in content_list:
             if isinstance(msg, Message):
                 msg_list.append(msg)
-            elif isinstance(msg, bytes):
+            elif isinstance(msg, (bytes, bytearray, memoryview)):
                 msg_list.append(MessageSegment.image(msg))
-            elif isinstance(msg, (bytearray, memoryview)):
-                continue
             else:
                 if msg.startswith("base64://"):
                     msg_list.append(Message(type="image", data=msg))
@@ -260,41 +261,50 @@ class MessageSegment:
         return Message(type=f"log_{type}", data=content)
 
 
-async def _image_to_remote_url(image: Union[bytes, str]) -> List[Message]:
-    if pclient is not None:
-        if isinstance(image, str) and image.startswith("base64://"):
-            image_bytes = b64decode(image[9:])
-        else:
-            image_bytes = image
-        assert isinstance(image_bytes, bytes)
+def image_to_base64(image: Union[ImageData, str]) -> str:
+    """图片消息的`data`转换为`base64://`字符串, 已是字符串(base64/link)时原样返回"""
+    if isinstance(image, str):
+        return image
+    return f"base64://{b64encode(image).decode()}"
+
+
+def _image_bytes(image: Union[ImageData, str]) -> ImageData:
+    """`base64://`字符串解码为原始字节, 已是字节时原样返回"""
+    if isinstance(image, str):
+        assert image.startswith("base64://")
+        return b64decode(image[9:])
+    return image
+
+
+def _image_info(image: ImageData) -> Tuple[Tuple[int, int], Optional[str]]:
+    """图片的宽高与格式, 编码时已记录的直接读取, 否则只解析图片头"""
+    if isinstance(image, ImageBytes):
+        return image.size, image.format
+    with Image.open(BytesIO(image)) as img:
+        return img.size, img.format
+
 
-        bio = BytesIO(image_bytes)
-        img = Image.open(bio)
-        bio.seek(0)
-        img_url = await pclient.upload(f"{uuid.uuid4()}.jpg", bio)
+async def _image_to_remote_url(image: Union[ImageData, str]) -> List[Message]:
+    if pclient is not None:
+        image_bytes = _image_bytes(image)
+        size, _ = _image_info(image_bytes)
+        img_url = await pclient.upload(f"{uuid.uuid4()}.jpg", BytesIO(image_bytes))
         _message = [
             MessageSegment.image(img_url if img_url else image_bytes),
-            MessageSegment.image_size(img.size),
+            MessageSegment.image_size(size),
         ]
         return _message
 
     return []
 
 
-async def _image_to_local_url(image: Union[bytes, str]) -> List[Message]:
-    if isinstance(image, str):
-        if image.startswith("base64://"):
-            image_bytes = b64decode(image[9:])
-        else:
-            return [Message(type="image", data=image.replace("link://", ""))]
-    elif isinstance(image, (memoryview, bytearray)):
-        image_bytes = bytes(image)
-    else:
-        image_bytes = image
+async def _image_to_local_url(image: Union[ImageData, str]) -> List[Message]:
+    if isinstance(image, str) and not image.startswith("base64://"):
+        return [Message(type="image", data=image.replace("link://", ""))]
+    image_bytes = _image_bytes(image)
 
-    bio = BytesIO(image_bytes)
-    _image = Image.open(bio)
-    if _image.format == "GIF":
+    size, image_format = _image_info(image_bytes)
+    if image_format == "GIF":
         suffix = ".gif"
     else:
         suffix = ".jpg"
@@ -304,11 +314,11 @@ async def _image_to_local_url(image: Union[bytes, str]) -> List[Message]:
     data = f"link://{pic_srv}/api/image/{name}"
     return [
         Message(type="image", data=data),
-        MessageSegment.image_size(_image.size),
+        MessageSegment.image_size(size),
     ]
 
 
-async def _image_to_url(image: Union[str, bytes], send_type: str, message: Message):
+async def _image_to_url(image: Union[str, ImageData], send_type: str, message: Message):
     if send_type == "link_remote":
         return await _image_to_remote_url(image)
     elif (send_type == "link_local") or (IS_UPLOAD and SERVER == "local"):
@@ -324,31 +334,31 @@ async def _convert_message_to_image(message: Message, bot_id: str, bot_self_id:
         return []
 
     send_type = send_pic_config.get_config(bot_id, "base64").data
-    image_b64 = None
 
     if message.type == "text" and is_text2pic:
         image_bytes = await text2pic(message.data)
         message = Message(type="image", data=image_bytes)
 
     if message.type == "image":
-        local_val = await get_global_val(bot_id, bot_self_id)
-        local_val["image"] += 1
-        img: Union[bytes, str] = message.data  # type: ignore
-        if isinstance(img, str) and img.startswith("base64://"):
-            image_b64 = img
-            image_bytes = b64decode(img[9:])
+        counter_store.add(bot_id, bot_self_id, "image")
+        img: Union[ImageData, str, Image.Image] = message.data  # type: ignore
+        if isinstance(img, Image.Image):
+            # 直接发送的图片对象按平台配置的格式与质量编码
+            image_bytes = await image_encoder.encode(img, bot_id)
+        elif isinstance(img, str) and img.startswith("base64://"):
+            # 已是 base64 的图片原样发送, 只有以链接发送时才需解码
+            if send_type == "base64":
+                return [message]
+            image_bytes = _image_bytes(img)
         elif isinstance(img, str) and img.startswith("link://"):
             if send_type == "base64":
                 url = img.replace("link://", "")
-                if url in URL_MAP:
-                    image_b64 = URL_MAP[url]
-                else:
-                    resp = await sget(url)
-                    image_b64 = b64encode(resp.content).decode("utf-8")
-                    URL_MAP[url] = image_b64
-                return [Message(type="image", data=image_b64)]
+                return [Message(type="image", data=await url_image_cache.get(url))]
             else:
                 return [Message(type="image", data=img)]
+        elif isinstance(img, (bytearray, memoryview)):
+            # 直接构造的消息同样在此拷贝为 bytes
+            image_bytes = bytes(img)
         else:
             image_bytes = img
     else:
@@ -357,12 +367,17 @@ async def _convert_message_to_image(message: Message, bot_id: str, bot_self_id:
     assert isinstance(image_bytes, bytes)
 
     if send_type == "base64":
-        return [Message(type="image", data=image_b64)] if image_b64 else [MessageSegment.image(image_bytes)]
+        # 原始字节在发送时才编码为 base64
+        return [Message(type="image", data=image_bytes)]
 
     return await _image_to_url(image_bytes, send_type, message)
 
 
-async def _convert_message(message: Union[Message, str, bytes], bot_id: str, bot_self_id: str) -> List[Message]:
+async def _convert_message(
+    message: Union[Message, str, bytes, Image.Image],
+    bot_id: str,
+    bot_self_id: str,
+) -> List[Message]:
     _message = [message]
     if isinstance(message, Message):
         if message.data is None:
@@ -386,7 +401,9 @@ async def _convert_message(message: Union[Message, str, bytes], bot_id: str, bot
             _str_message = Message(type="text", data=message)
         _message = await _convert_message_to_image(_str_message, bot_id, bot_self_id)
     elif isinstance(message, (bytes, bytearray, memoryview)):
-        message = bytes(message)
+        _bytes_message = MessageSegment.image(message)
+        _message = await _convert_message_to_image(_bytes_message, bot_id, bot_self_id)
+    elif isinstance(message, Image.Image):
         _bytes_message = Message(type="image", data=message)
         _message = await _convert_message_to_image(_bytes_message, bot_id, bot_self_id)
     return _message
@@ -414,6 +431,33 @@ async def convert_message(
     return _message
 
 
+def _wire_message(message: Message, raw: bool) -> Message:
+    data = message.data
+    if message.type == "image" and isinstance(data, (bytes, bytearray, memoryview)):
+        if raw:
+            # 直接拼出 JSON 字符串片段, 免去 base64 文本解码为 str 以及序列化时的再次扫描与拷贝
+            return Message(type="image", data=msgspec.Raw(b'"base64://' + b64encode(data) + b'"'))
+        return Message(type="image", data=image_to_base64(data))
+    if message.type == "node" and isinstance(data, list):
+        return Message(type="node", data=[_wire_message(m, raw) for m in data])
+    return message
+
+
+def wire_message_send(send: MessageSend, raw: bool = False) -> MessageSend:
+    """
+    将消息中以原始字节携带的图片编码为`base64://`, 这是发送前唯一一次 base64 编码。
+    raw 为 True 时编码结果为`msgspec.Raw`, 只能用于`msgjson.encode`。
+    """
+    if not send.content:
+        return send
+    return msgspec.structs.replace(send, content=[_wire_message(m, raw) for m in send.content])
+
+
+def encode_message_send(send: MessageSend) -> bytes:
+    """序列化待发送的消息"""
+    return msgspec.json.encode(wire_message_send(send, True))
+
+
 async def markdown_to_template_markdown(
     message: List[Message],
     bot_self_id: Optional[str] = None,
@@ -504,9 +548,11 @@ async def to_markdown(
                         )
                 elif m.data.startswith("base64://"):
                     url = await _image_to_url(m.data, send_type, m)
+            elif isinstance(m.data, (bytes, bytearray, memoryview)):
+                url = await _image_to_url(m.data, send_type, m)
 
-                if url and size:
-                    _markdown_list.append(f"![图片 #{size[0]}px #{size[1]}px]({url})")
+            if url and size:
+                _markdown_list.append(f"![图片 #{size[0]}px #{size[1]}px]({url})")
 
         elif m.type == "text":
             assert isinstance(m.data, str)
@@ -287,7 +287,7 @@ async def draw_data_analysis1(
     bot_id: Optional[str],
     bot_self_id: Optional[str],
 ):
-    local_val = gv.get_platform_val(bot_id, bot_self_id)
+    local_val = gv.counter_store.summary(bot_id, bot_self_id)
     data_bar = Image.new("RGBA", (1400, 200))
 
     yesterday: Optional[CoreDataSummary] = await CoreDataSummary.get_yesterday_data(
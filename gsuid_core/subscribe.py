@@ -1,3 +1,4 @@
+import asyncio
 from typing import (
     Dict,
     List,
@@ -10,9 +11,11 @@ from typing import (
     TypedDict,
 )
 
+from gsuid_core.logger import logger
 from gsuid_core.models import Event, Message
 from gsuid_core.segment import MessageSegment
 from gsuid_core.utils.database.models import Subscribe
+from gsuid_core.utils.plugins_config.gs_config import sp_config
 
 
 class GsCoreSubscribe:
@@ -223,46 +226,108 @@ class GsCoreSubscribe:
         datas: Sequence[Subscribe],
         func: Callable[..., Awaitable[str]],
         attr: str = "uid",
+        concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
     ):
+        """📝简单介绍:
+
+            对订阅列表中每个订阅的`attr`值执行`func`, 汇总为私聊与群聊的推送结果
+
+            `attr`值相同的订阅只执行一次`func`, 不同的值并发执行, 每完成一个立即汇总
+
+            单个值执行超时或出错时, 结果记为失败, 不影响其他订阅
+
+        🌱参数:
+
+            🔹concurrency (`Optional[int]`, 默认是 `None`):
+                    同时执行的数量, 默认取配置`SubscribeConcurrency`
+
+            🔹timeout (`Optional[float]`, 默认是 `None`):
+                    单个值的超时秒数, 默认取配置`SubscribeTimeout`, 0为不限制
+        """
+        if concurrency is None:
+            concurrency = sp_config.get_config("SubscribeConcurrency").data
+        if timeout is None:
+            timeout = sp_config.get_config("SubscribeTimeout").data
+
         priv_result: Dict[str, PrivTask] = {}
         group_result: Dict[str, GroupTask] = {}
+
+        # 同一个值的订阅合并, 只请求一次上游
+        groups: Dict[str, List[Subscribe]] = {}
         for data in datas:
             attr_data = data.__getattribute__(attr)
             if attr_data:
-                im = await func(attr_data)
-                if data.user_type == "group":
-                    sid = f"{data.WS_BOT_ID}_{data.group_id}"
-                    if sid not in group_result:
-                        group_result[sid] = {
-                            "success": 0,
-                            "fail": 0,
-                            "event": data,
-                            "push_message": [],
-                        }
-                    if "失败" in im:
-                        group_result[sid]["fail"] += 1
-                        qid = attr_data = data.__getattribute__("user_id")
-                        group_result[sid]["push_message"].extend(
-                            [
-                                MessageSegment.text("\n"),
-                                MessageSegment.at(qid),
-                                MessageSegment.text("\n"),
-                                MessageSegment.text(im),
-                            ]
-                        )
-                    else:
-                        group_result[sid]["success"] += 1
-                else:
-                    sid = f"{data.WS_BOT_ID}_{data.user_id}"
-                    if sid not in priv_result:
-                        priv_result[sid] = {
-                            "im": [],
-                            "event": data,
-                            "push_message": [],
-                        }
-                    priv_result[sid]["im"].append(im)
+                groups.setdefault(attr_data, []).append(data)
+
+        items = iter(groups.items())
+
+        async def worker():
+            # 各个 worker 共用同一个迭代器, 依次取出下一个值
+            for attr_data, subs in items:
+                im = await self._run_func(func, attr_data, timeout)
+                for data in subs:
+                    self._collect_result(data, im, priv_result, group_result)
+
+        await asyncio.gather(*(worker() for _ in range(min(max(concurrency, 1), len(groups)))))
         return priv_result, group_result
 
+    async def _run_func(
+        self,
+        func: Callable[..., Awaitable[str]],
+        attr_data: str,
+        timeout: Optional[float],
+    ) -> str:
+        try:
+            if timeout:
+                return await asyncio.wait_for(func(attr_data), timeout)
+            return await func(attr_data)
+        except asyncio.TimeoutError:
+            logger.warning(f"[订阅推送] {attr_data} 执行超过{timeout}秒, 已跳过")
+            return "执行失败, 请求超时!"
+        except Exception as e:
+            logger.exception(f"[订阅推送] {attr_data} 执行失败: {e}")
+            return "执行失败, 请检查控制台!"
+
+    def _collect_result(
+        self,
+        data: Subscribe,
+        im: str,
+        priv_result: Dict[str, "PrivTask"],
+        group_result: Dict[str, "GroupTask"],
+    ):
+        if data.user_type == "group":
+            sid = f"{data.WS_BOT_ID}_{data.group_id}"
+            if sid not in group_result:
+                group_result[sid] = {
+                    "success": 0,
+                    "fail": 0,
+                    "event": data,
+                    "push_message": [],
+                }
+            if "失败" in im:
+                group_result[sid]["fail"] += 1
+                qid = data.__getattribute__("user_id")
+                group_result[sid]["push_message"].extend(
+                    [
+                        MessageSegment.text("\n"),
+                        MessageSegment.at(qid),
+                        MessageSegment.text("\n"),
+                        MessageSegment.text(im),
+                    ]
+                )
+            else:
+                group_result[sid]["success"] += 1
+        else:
+            sid = f"{data.WS_BOT_ID}_{data.user_id}"
+            if sid not in priv_result:
+                priv_result[sid] = {
+                    "im": [],
+                    "event": data,
+                    "push_message": [],
+                }
+            priv_result[sid]["im"].append(im)
+
     async def _to_dict(self, data: Sequence[Subscribe]) -> Dict[str, List[Subscribe]]:
         result: Dict[str, List[Subscribe]] = {}
         for item in data:
@@ -19,6 +19,11 @@ class SVList:
         self.lst: Dict[str, SV] = {}
         self.plugins: Dict[str, Plugins] = {}
         self.detail_lst: Dict[Plugins, List[SV]] = {}
+        # SV/Plugins配置或触发器变动时递增, 触发器索引据此判断是否需要重建
+        self.version: int = 0
+
+    def mark_dirty(self):
+        self.version += 1
 
     @property
     def get_lst(self):
@@ -130,6 +135,7 @@ class Plugins:
         for var in kwargs:
             setattr(self, var, kwargs[var])
             plugin_config[var] = kwargs[var]
+        SL.mark_dirty()
         if is_lazy:
             core_config.lazy_set_config("plugins", config_plugins)
         else:
@@ -297,6 +303,7 @@ class SV:
         for var in kwargs:
             setattr(self, var, kwargs[var])
             plugin_sv_config[self.name][var] = kwargs[var]
+        SL.mark_dirty()
         if is_lazy:
             core_config.lazy_set_config("plugins", config_plugins)
         else:
@@ -373,6 +380,8 @@ class SV:
                         )
                         logger.trace(f"载入{type}触发器【{_k}】!")
 
+            SL.mark_dirty()
+
             @wraps(func)
             async def wrapper(bot: Bot, msg) -> Optional[Callable]:
                 result = await func(bot, msg)
@@ -0,0 +1,110 @@
+from typing import Dict, Tuple, Optional, FrozenSet
+from dataclasses import dataclass
+
+from gsuid_core.sv import SL, SV
+
+USER_TYPES = ("group", "direct", "channel", "sub_channel")
+
+
+@dataclass(frozen=True)
+class SVPolicy:
+    """
+    由`SV`及其所属`Plugins`编译而来的只读访问策略
+
+    `area`/`enabled`/`pm`等与具体用户无关的部分在编译时已经求值,
+    运行时只需对黑白名单做几次集合查询。
+    """
+
+    name: str
+    enabled: bool
+    # 同时满足插件与SV权限的最低要求, 越小越高
+    pm: int
+    # 允许触发的消息类型
+    user_types: FrozenSet[str]
+    # 插件与SV黑名单的并集
+    black_list: FrozenSet[str]
+    # 为空表示不限制
+    plugin_white_list: FrozenSet[str]
+    sv_white_list: FrozenSet[str]
+
+    @classmethod
+    def compile(cls, sv: SV) -> "SVPolicy":
+        plugins = sv.plugins
+        user_types = frozenset(
+            user_type
+            for user_type in USER_TYPES
+            if (
+                plugins.area in ("SV", "ALL")
+                or (user_type == "group" and plugins.area == "GROUP")
+                or (user_type == "direct" and plugins.area == "DIRECT")
+            )
+            and (
+                sv.area == "ALL"
+                or plugins.area == "ALL"
+                or (user_type == "group" and sv.area == "GROUP")
+                or (user_type == "direct" and sv.area == "DIRECT")
+            )
+        )
+        return cls(
+            name=sv.name,
+            enabled=bool(plugins.enabled and sv.enabled),
+            pm=min(plugins.pm, sv.pm),
+            user_types=user_types,
+            black_list=frozenset(plugins.black_list) | frozenset(sv.black_list),
+            plugin_white_list=_white_list(plugins.white_list),
+            sv_white_list=_white_list(sv.white_list),
+        )
+
+    def is_static_allowed(self, user_type: str, user_pm: int) -> bool:
+        return self.enabled and user_pm <= self.pm and user_type in self.user_types
+
+    def check_target(self, user_id: str, group_id: Optional[str]) -> bool:
+        if user_id in self.black_list or group_id in self.black_list:
+            return False
+        if self.plugin_white_list and not (user_id in self.plugin_white_list or group_id in self.plugin_white_list):
+            return False
+        if self.sv_white_list and not (user_id in self.sv_white_list or group_id in self.sv_white_list):
+            return False
+        return True
+
+
+def _white_list(white_list: list) -> FrozenSet[str]:
+    if not white_list or white_list == [""]:
+        return frozenset()
+    return frozenset(white_list)
+
+
+class SVPolicyManager:
+    """
+    缓存全部SV的访问策略, 并按(user_type, user_pm)分桶缓存通过静态检查的SV
+
+    `SV.set`/`Plugins.set`会变更`SL.version`, 下次查询时整体失效重建。
+    """
+
+    def __init__(self):
+        self.version = -1
+        self._policies: Dict[str, SVPolicy] = {}
+        self._buckets: Dict[Tuple[str, int], Dict[str, SVPolicy]] = {}
+
+    def refresh(self):
+        if self.version != SL.version:
+            self.version = SL.version
+            self._policies = {name: SVPolicy.compile(sv) for name, sv in SL.lst.items()}
+            self._buckets = {}
+
+    def get_policy(self, sv_name: str) -> Optional[SVPolicy]:
+        self.refresh()
+        return self._policies.get(sv_name)
+
+    def get_bucket(self, user_type: str, user_pm: int) -> Dict[str, SVPolicy]:
+        """返回该消息类型与权限下, 开启且满足权限/作用范围的全部SV策略"""
+        self.refresh()
+        key = (user_type, user_pm)
+        if key not in self._buckets:
+            self._buckets[key] = {
+                name: policy for name, policy in self._policies.items() if policy.is_static_allowed(user_type, user_pm)
+            }
+        return self._buckets[key]
+
+
+sv_policy = SVPolicyManager()
@@ -0,0 +1,112 @@
+"""
+消息文本规范化(繁体转简体)
+
+- 全进程共用一个`OpenCC("t2s")`转换器, 不再为每条消息重新加载词典
+- 纯 ASCII 文本, 以及不含任何繁体字的文本直接原样返回, 不调用 OpenCC
+- 最近转换过的短文本(重复的指令)缓存在有界的 LRU 中
+
+繁体字集合在首次使用时构建: 把整个 CJK 统一表意文字区一次性交给转换器, 结果中变化了的字即为繁体字;
+另有少数字单独转换时不变、只在词组中才会转换(如「回覆」->「回复」), 单独列出。
+"""
+
+import threading
+from typing import Set, Dict, Tuple, Union, Optional
+from collections import OrderedDict
+
+from gsuid_core.logger import logger
+from gsuid_core.server import on_core_start
+
+# 缓存的最大条数, 以及参与缓存的文本最大长度
+CACHE_SIZE = 2048
+CACHE_TEXT_LEN = 64
+
+# 参与检测的码位区间: 扩展A + 基本区, 兼容表意文字, 扩展B~F + 兼容表意文字补充
+_CJK_RANGES: Tuple[Tuple[int, int], ...] = (
+    (0x3400, 0xA000),
+    (0xF900, 0xFB00),
+    (0x20000, 0x2FA20),
+)
+# 单独转换时不变、只在 TSPhrases 词组中才会被转换的字
+_PHRASE_ONLY = "哩坏沈甦瞭藉衹覆"
+
+
+class TextNormalizer:
+    def __init__(self, config: str = "t2s", cache_size: int = CACHE_SIZE):
+        self.config = config
+        self.cache_size = cache_size
+        self.cache: "OrderedDict[str, str]" = OrderedDict()
+        self.converter = None
+        # 含有其中任一字的文本才需要转换
+        self.trad_chars: Set[str] = set()
+        # None 表示尚未加载, False 表示 OpenCC 不可用
+        self.ready: Optional[bool] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0
+
+    def load(self) -> bool:
+        if self.ready is not None:
+            return self.ready
+        with self._lock:
+            if self.ready is not None:
+                return self.ready
+            try:
+                from opencc import OpenCC
+
+                converter = OpenCC(self.config)
+                chars = [chr(cp) for start, end in _CJK_RANGES for cp in range(start, end)]
+                converted = converter.convert("\n".join(chars)).split("\n")
+                if len(converted) != len(chars):
+                    raise ValueError("转换结果与输入长度不一致")
+                self.trad_chars = {c for c, s in zip(chars, converted) if c != s}
+                self.trad_chars.update(_PHRASE_ONLY)
+                self.converter = converter
+                self.ready = True
+            except Exception as e:
+                logger.warning(f"[繁体转简体] 加载 OpenCC 失败, 将不进行转换: {e}")
+                self.ready = False
+        return self.ready
+
+    def normalize(self, text: str) -> str:
+        """繁体转简体, 不含繁体字或 OpenCC 不可用时原样返回"""
+        if not text or text.isascii() or not self.load():
+            self.skipped += 1
+            return text
+        if self.trad_chars.isdisjoint(text):
+            self.skipped += 1
+            return text
+
+        cache = self.cache
+        result = cache.get(text)
+        if result is not None:
+            cache.move_to_end(text)
+            self.hits += 1
+            return result
+
+        self.misses += 1
+        result = self.converter.convert(text)  # type: ignore
+        if len(text) <= CACHE_TEXT_LEN:
+            cache[text] = result
+            if len(cache) > self.cache_size:
+                cache.popitem(last=False)
+        return result
+
+    def get_stats(self) -> Dict[str, Union[int, Optional[bool]]]:
+        return {
+            "ready": self.ready,
+            "trad_chars": len(self.trad_chars),
+            "cache": len(self.cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "skipped": self.skipped,
+        }
+
+
+text_normalizer = TextNormalizer()
+
+
+@on_core_start
+def load_text_normalizer():
+    # 构建繁体字集合约需几十毫秒, 启动时在线程中预先完成, 避免阻塞第一条消息
+    text_normalizer.load()
@@ -0,0 +1,246 @@
+import re
+from typing import Dict, List, Tuple, Iterable, Optional
+from collections import deque
+
+from gsuid_core.sv import SL, SV
+from gsuid_core.logger import logger
+from gsuid_core.models import Event
+from gsuid_core.trigger import Trigger
+
+# (注册顺序, 所属SV, 触发器), 注册顺序用于保持与逐个遍历时一致的命中顺序
+IndexedTrigger = Tuple[int, SV, Trigger]
+
+# 含反向引用/条件分组的正则无法安全合并, 合并后组号会错位
+_UNMERGEABLE = re.compile(r"\\[1-9]|\(\?P=|\(\?\(")
+
+
+class _Trie:
+    """前缀树, 查询时返回所有「是文本前缀」的键对应的触发器"""
+
+    __slots__ = ("root",)
+
+    def __init__(self):
+        # 节点结构: [子节点字典, 触发器列表]
+        self.root: list = [{}, []]
+
+    def insert(self, key: str, item):
+        node = self.root
+        for char in key:
+            nxt = node[0].get(char)
+            if nxt is None:
+                nxt = node[0][char] = [{}, []]
+            node = nxt
+        node[1].append(item)
+
+    def match(self, text: Iterable[str], result: list):
+        node = self.root
+        result.extend(node[1])
+        for char in text:
+            node = node[0].get(char)
+            if node is None:
+                return
+            result.extend(node[1])
+
+
+class _AhoCorasick:
+    """AC自动机, 一次扫描找出文本中出现过的所有关键词"""
+
+    __slots__ = ("goto", "fail", "output", "items", "always")
+
+    def __init__(self):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[List[int]] = [[]]
+        self.items: List[list] = []
+        # 空关键词必定命中
+        self.always: list = []
+
+    def add(self, word: str, item):
+        if not word:
+            self.always.append(item)
+            return
+
+        state = 0
+        for char in word:
+            nxt = self.goto[state].get(char)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[state][char] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+            state = nxt
+
+        if not self.output[state]:
+            self.output[state].append(len(self.items))
+            self.items.append([])
+        self.items[self.output[state][0]].append(item)
+
+    def build(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and char not in self.goto[f]:
+                    f = self.fail[f]
+                target = self.goto[f].get(char, 0)
+                self.fail[nxt] = target if target != nxt else 0
+                self.output[nxt] = self.output[nxt] + self.output[self.fail[nxt]]
+
+    def match(self, text: str, result: list):
+        result.extend(self.always)
+        if not self.items:
+            return
+
+        goto = self.goto
+        fail = self.fail
+        output = self.output
+        found = set()
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+
+        for word_id in found:
+            result.extend(self.items[word_id])
+
+
+class _RegexGroup:
+    """同一前缀下的正则集合, 先用合并后的大正则整体过滤, 命中后再逐条确认"""
+
+    __slots__ = ("prefix", "patterns", "merged")
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self.patterns: List[Tuple[re.Pattern, IndexedTrigger]] = []
+        self.merged: Optional[re.Pattern] = None
+
+    def build(self):
+        sources = [p.pattern for p, _ in self.patterns]
+        if not sources or any(_UNMERGEABLE.search(s) for s in sources):
+            return
+        try:
+            self.merged = re.compile("|".join(f"(?:{s})" for s in sources))
+        except re.error:
+            self.merged = None
+
+    def match(self, text: str, result: list):
+        _text = text[len(self.prefix) :]  # noqa: E203
+        if self.merged is not None and self.merged.search(_text) is None:
+            return
+        for pattern, item in self.patterns:
+            if pattern.search(_text) is not None:
+                result.append(item)
+
+
+class TriggerIndex:
+    """
+    触发器预编译索引
+
+    - `prefix`/`command`/`fullmatch`: 以「前缀+关键词」建前缀树
+    - `suffix`: 以倒序关键词建后缀树
+    - `keyword`: AC自动机
+    - `regex`: 按前缀分组的合并正则
+    - `file`: 按扩展名分组
+    - `message`: 总是候选
+
+    索引只负责筛出「可能命中」的触发器, 最终仍由`Trigger.check_command`确认,
+    因此与逐个检查全部触发器的结果保持一致。
+    SV/Plugins的配置或触发器发生变化时(`SL.version`变动), 下次查询会自动重建。
+    """
+
+    def __init__(self):
+        self.version = -1
+        self.total = 0
+        self._prefix = _Trie()
+        self._suffix = _Trie()
+        self._keyword = _AhoCorasick()
+        self._regex = _Trie()
+        self._file: Dict[str, List[IndexedTrigger]] = {}
+        self._message: List[IndexedTrigger] = []
+
+    def build(self, sv_list: Iterable[SV]):
+        self.version = SL.version
+        self._prefix = _Trie()
+        self._suffix = _Trie()
+        self._keyword = _AhoCorasick()
+        self._regex = _Trie()
+        self._file = {}
+        self._message = []
+
+        regex_groups: Dict[str, _RegexGroup] = {}
+        order = 0
+        for sv in sv_list:
+            for _type in sv.TL:
+                for trigger in sv.TL[_type].values():
+                    item: IndexedTrigger = (order, sv, trigger)
+                    order += 1
+                    self._add(trigger, item, regex_groups)
+
+        self._keyword.build()
+        for group in regex_groups.values():
+            group.build()
+            self._regex.insert(group.prefix, group)
+
+        self.total = order
+        logger.debug(f"[触发器索引] 已重建, 共{order}个触发器")
+
+    def _add(
+        self,
+        trigger: Trigger,
+        item: IndexedTrigger,
+        regex_groups: Dict[str, _RegexGroup],
+    ):
+        if trigger.type in ("prefix", "command", "fullmatch"):
+            self._prefix.insert(trigger.prefix + trigger.keyword, item)
+        elif trigger.type == "suffix":
+            self._suffix.insert(trigger.keyword[::-1], item)
+        elif trigger.type == "keyword":
+            self._keyword.add(trigger.keyword, item)
+        elif trigger.type == "regex":
+            try:
+                pattern = re.compile(trigger.keyword)
+            except re.error as e:
+                logger.warning(f"[触发器索引] 正则触发器【{trigger.keyword}】无法编译, 已忽略: {e}")
+                return
+            if trigger.prefix not in regex_groups:
+                regex_groups[trigger.prefix] = _RegexGroup(trigger.prefix)
+            regex_groups[trigger.prefix].patterns.append((pattern, item))
+        elif trigger.type == "file":
+            self._file.setdefault(trigger.keyword, []).append(item)
+        else:
+            self._message.append(item)
+
+    def refresh(self):
+        if self.version != SL.version:
+            self.build(SL.lst.values())
+
+    def get_candidates(self, event: Event) -> List[IndexedTrigger]:
+        """返回可能命中该事件的触发器, 按注册顺序排列"""
+        self.refresh()
+
+        msg = event.raw_text
+        result: list = []
+        self._prefix.match(msg, result)
+        self._suffix.match(reversed(msg), result)
+        self._keyword.match(msg, result)
+
+        groups: List[_RegexGroup] = []
+        self._regex.match(msg, groups)
+        for group in groups:
+            group.match(msg, result)
+
+        if event.file and event.file_name:
+            result.extend(self._file.get(event.file_name.split(".")[-1], []))
+
+        result.extend(self._message)
+        result.sort(key=lambda x: x[0])
+        return result
+
+
+trigger_index = TriggerIndex()
@@ -10,7 +10,6 @@ from pathlib import Path
 
 import aiofiles
 from PIL import Image
-from httpx import AsyncClient
 
 from gsuid_core.logger import logger
 
@@ -49,6 +48,7 @@ from .models import (
     AmbrReliquarySG,
     AmbrUpgradeItem,
 )
+from ..http_client import get_session
 
 
 async def get_ambr_char_list() -> Optional[Dict[str, AmbrCharacter]]:
@@ -228,13 +228,12 @@ async def get_ambr_icon(
         async with aiofiles.open(file_path, "rb") as f:
             return Image.open(BytesIO(await f.read()))
 
-    async with AsyncClient(timeout=None) as client:
-        req = await client.get(
-            url,
-            headers=_HEADER,
-        )
-        if req.status_code == 200:
-            content = req.read()
+    async with get_session().get(
+        url,
+        headers=_HEADER,
+    ) as req:
+        if req.status == 200:
+            content = await req.read()
             async with aiofiles.open(file_path, "wb") as f:
                 await f.write(content)
             return Image.open(BytesIO(content))
@@ -250,9 +249,8 @@ async def _ambr_request(
     data: Optional[AnyDict] = None,
 ) -> Optional[AnyDict]:
     logger.debug(f"[AmbrRequest] {url} {method} {params} {data}")
-    async with AsyncClient(timeout=None) as client:
-        req = await client.request(method, url=url, headers=header, params=params, json=data)
-        data = req.json()
+    async with get_session().request(method, url=url, headers=header, params=params, json=data) as req:
+        data = await req.json(content_type=None)
         if data and "code" in data:
             data["response"] = data["code"]
         return data
@@ -6,10 +6,9 @@ from __future__ import annotations
 
 from typing import Literal
 
-from httpx import AsyncClient
-
 from ..utils import _HEADER
 from .models import EnkaData
+from ..http_client import get_session
 
 ADDRESS = {
     "enka": "https://enka.network",
@@ -27,10 +26,8 @@ async def get_enka_info(uid: str, address: Literal["enka", "microgg"] = "enka")
     Returns:
         EnkaData: Enka Network 响应数据
     """  # noqa: E501
-    async with AsyncClient(
-        base_url=ADDRESS[address],
+    async with get_session().get(
+        f"{ADDRESS[address]}/api/uid/{uid}",
         headers=_HEADER,
-        timeout=None,
-    ) as client:
-        req = await client.get(url=f"/api/uid/{uid}")
-        return req.json()
+    ) as req:
+        return await req.json(content_type=None)
@@ -2,8 +2,6 @@ from __future__ import annotations
 
 from typing import Dict, Union, Literal, Optional, cast
 
-from httpx import AsyncClient
-
 from .api import (
     HAKUSH_CHAR_URL,
     HAKUSH_CHAR_DATA,
@@ -13,6 +11,7 @@ from .api import (
 from ..types import AnyDict
 from ..utils import _HEADER
 from .models import WeaponData, CharacterData
+from ..http_client import get_session
 
 
 async def get_hakush_char_data(
@@ -54,7 +53,6 @@ async def _hakush_request(
     params: Optional[AnyDict] = None,
     data: Optional[AnyDict] = None,
 ) -> Optional[AnyDict]:
-    async with AsyncClient(timeout=None) as client:
-        req = await client.request(method, url=url, headers=header, params=params, json=data)
-        data = req.json()
+    async with get_session().request(method, url=url, headers=header, params=params, json=data) as req:
+        data = await req.json(content_type=None)
         return data
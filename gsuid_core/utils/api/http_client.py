@@ -0,0 +1,100 @@
+import ssl
+import asyncio
+from typing import Dict, Optional
+
+import aiohttp
+import certifi
+from aiohttp import TCPConnector, ClientTimeout
+
+from gsuid_core.logger import logger
+from gsuid_core.server import on_core_shutdown
+from gsuid_core.utils.plugins_config.gs_config import sp_config
+
+ssl_context = ssl.create_default_context(cafile=certifi.where())
+
+pool_limit: int = sp_config.get_config("HttpPoolLimit").data
+pool_limit_per_host: int = sp_config.get_config("HttpPoolLimitPerHost").data
+keepalive_timeout: int = sp_config.get_config("HttpKeepAlive").data
+dns_cache_ttl: int = sp_config.get_config("HttpDNSCacheTTL").data
+
+
+class HttpClientManager:
+    """
+    进程内共享的 HTTP 客户端
+
+    米游社/MiniGG/安柏/Enka/Hakush 等 API 请求共用同一个`aiohttp.ClientSession`,
+    连接按域名保持在连接池中复用(HTTP/1.1 keep-alive), 并缓存 DNS 解析结果,
+    避免每次请求都重新进行 DNS 查询与 TLS 握手。
+    """
+
+    def __init__(
+        self,
+        limit: int = pool_limit,
+        limit_per_host: int = pool_limit_per_host,
+        keepalive: float = keepalive_timeout,
+        dns_ttl: int = dns_cache_ttl,
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive = keepalive
+        self.dns_ttl = dns_ttl
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.created = 0
+
+    def get_session(self) -> aiohttp.ClientSession:
+        """获取共享的会话, 需在事件循环内调用"""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            # 会话与事件循环绑定, 事件循环变化(例如重启)时重新创建
+            self._session = aiohttp.ClientSession(
+                connector=TCPConnector(
+                    ssl=ssl_context,
+                    limit=self.limit,
+                    limit_per_host=self.limit_per_host,
+                    keepalive_timeout=self.keepalive,
+                    use_dns_cache=True,
+                    ttl_dns_cache=self.dns_ttl,
+                ),
+                timeout=ClientTimeout(total=300),
+                # 会话由所有用户共用, 不保存响应中的 Set-Cookie, 否则会覆盖之后请求显式传入的 Cookie
+                cookie_jar=aiohttp.DummyCookieJar(),
+            )
+            self._loop = loop
+            self.created += 1
+            logger.debug("[HTTP连接池] 已创建共享会话")
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+            logger.debug("[HTTP连接池] 共享会话已关闭")
+        self._session = None
+        self._loop = None
+
+    def get_stats(self) -> Dict[str, int]:
+        stats = {
+            "limit": self.limit,
+            "limit_per_host": self.limit_per_host,
+            "created": self.created,
+            "idle": 0,
+            "hosts": 0,
+        }
+        if self._session is not None and not self._session.closed:
+            conns = getattr(self._session.connector, "_conns", {})
+            stats["hosts"] = len(conns)
+            stats["idle"] = sum(len(v) for v in conns.values())
+        return stats
+
+
+http_client = HttpClientManager()
+
+
+def get_session() -> aiohttp.ClientSession:
+    return http_client.get_session()
+
+
+@on_core_shutdown
+async def close_http_client():
+    await http_client.close()
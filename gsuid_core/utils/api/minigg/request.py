@@ -12,7 +12,7 @@ from enum import Enum
 from typing import Any, Dict, List, Union, Literal, Optional, cast, overload
 from pathlib import Path
 
-from httpx import AsyncClient
+from aiohttp import ClientTimeout
 
 from ..types import AnyDict
 from ..utils import cache_data
@@ -31,6 +31,7 @@ from .models import (
     CharacterConstellations,
 )
 from .exception import MiniggNotFoundError
+from ..http_client import get_session
 
 MINIGG_AUDIO_URL = "https://genshin.minigg.cn/"
 MINIGG_URL = "https://info.minigg.cn"
@@ -94,19 +95,18 @@ async def get_map_data(resource_name: str, map_id: str, is_cluster: bool = False
     Returns:
         bytes: 图片。
     """
-    async with AsyncClient(timeout=None) as client:
-        req = await client.get(
-            url=MINIGG_MAP_URL,
-            params={
-                "resource_name": resource_name,
-                "map_id": map_id,
-                "is_cluster": is_cluster,
-            },
-        )
-    if req.headers["content-type"] == "image/jpeg":
-        return req.content
-    else:
-        raise MiniggNotFoundError(**req.json())
+    async with get_session().get(
+        MINIGG_MAP_URL,
+        params={
+            "resource_name": resource_name,
+            "map_id": map_id,
+            "is_cluster": str(is_cluster).lower(),
+        },
+    ) as req:
+        if req.headers["content-type"] == "image/jpeg":
+            return await req.read()
+        else:
+            raise MiniggNotFoundError(**(await req.json(content_type=None)))
 
 
 async def get_audio_info(name: str, audio_id: str, language: str = "cn") -> str:
@@ -121,16 +121,15 @@ async def get_audio_info(name: str, audio_id: str, language: str = "cn") -> str:
         str: 语音 URL。
     """
     warnings.warn("Audio API is already deprecated.", DeprecationWarning)
-    async with AsyncClient(timeout=None) as client:
-        req = await client.get(
-            url=MINIGG_AUDIO_URL,
-            params={
-                "characters": name,
-                "audioid": audio_id,
-                "language": language,
-            },
-        )
-    return req.text
+    async with get_session().get(
+        MINIGG_AUDIO_URL,
+        params={
+            "characters": name,
+            "audioid": audio_id,
+            "language": language,
+        },
+    ) as req:
+        return await req.text()
 
 
 async def minigg_request(
@@ -162,25 +161,29 @@ async def minigg_request(
         "query": query,
         "queryLanguages": query_languages.value,
         "resultLanguage": result_languages.value,
-        **kwargs,
+        # aiohttp 不接受布尔类型的参数, 与 httpx 一致转换为 true/false
+        **{k: str(v).lower() if isinstance(v, bool) else v for k, v in kwargs.items()},
     }
     if match_categories:
         params["matchCategories"] = "1"
-    async with AsyncClient(base_url=MINIGG_URL, timeout=1.3) as client:
-        req = await client.get(endpoint, params=params)
+    async with get_session().get(
+        f"{MINIGG_URL}{endpoint}",
+        params=params,
+        timeout=ClientTimeout(total=1.3),
+    ) as req:
         try:
-            data = req.json()
+            data = await req.json(content_type=None)
         except json.decoder.JSONDecodeError:
             return -11
         if "retcode" in data:
             retcode: int = data["retcode"]
             return retcode
-        if req.status_code == 404:
+        if req.status == 404:
             raise MiniggNotFoundError(**data)
-        if req.status_code == 502:
+        if req.status == 502:
             raise Exception("Minigg API is unavailable.")
-        if req.status_code != 200:
-            raise Exception(f"Minigg API is unavailable. (Error code: {req.status_code})")
+        if req.status != 200:
+            raise Exception(f"Minigg API is unavailable. (Error code: {req.status})")
         return data
 
 
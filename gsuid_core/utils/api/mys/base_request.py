@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import ssl
 import copy
 import time
 import uuid
@@ -11,8 +10,6 @@ from string import digits
 from typing import Any, Dict, Tuple, Union, Literal, Optional, overload
 
 import aiohttp
-import certifi
-from aiohttp import TCPConnector
 from async_timeout import timeout
 
 from gsuid_core.bot import call_bot
@@ -20,13 +17,14 @@ from gsuid_core.logger import logger
 from gsuid_core.utils.database.api import DBSqla
 from gsuid_core.utils.database.utils import SERVER as RECOGNIZE_SERVER, SR_SERVER, ZZZ_SERVER
 from gsuid_core.utils.database.models import GsUID, GsUser
+from gsuid_core.utils.database.header_profile import HeaderProfile, header_profile_cache
 from gsuid_core.utils.plugins_config.gs_config import pass_config
 
 from .api import _API
 from .tools import random_hex, mys_version, get_ds_token, generate_os_ds, generate_passport_ds
+from ..http_client import get_session
 
 _DEAD_CODE = [10035, 5003, 10041, 1034]
-ssl_context = ssl.create_default_context(cafile=certifi.where())
 
 
 class BaseMysApi:
@@ -109,38 +107,68 @@ class BaseMysApi:
         uid = await self.get_uid(uid, game_name)
         return await GsUser.get_user_stoken_by_uid(uid, game_name)
 
-    async def get_user_fp(self, uid: str, game_name: Optional[str] = None) -> Optional[str]:
-        uid = await self.get_uid(uid, game_name)
-        data = await GsUser.get_user_attr_by_uid(
-            uid,
-            "fp",
-            game_name,
+    async def get_header_profile(self, uid: str, game_name: Optional[str] = None) -> HeaderProfile:
+        """获取该UID请求头所需的设备信息, 未命中缓存时一次查询整行填充"""
+        column = GsUser.get_gameid_name(game_name)
+        profile = header_profile_cache.get(uid, column)
+        if profile is not None:
+            return profile
+
+        main_uid = await self.get_uid(uid, game_name)
+        user: Optional[GsUser] = await GsUser.select_data_by_uid(main_uid, game_name)
+        if user is None:
+            profile = HeaderProfile(main_uid, None, None, None)
+        else:
+            profile = HeaderProfile(
+                main_uid,
+                user.device_id,
+                user.fp,
+                self._build_user_agent(user.device_info) if user.device_info else None,
+            )
+        header_profile_cache.set(uid, column, profile)
+        return profile
+
+    def _build_user_agent(self, device_info: str) -> str:
+        df = device_info.split("/")
+        return (
+            "Mozilla/5.0 (Linux; Android 13; "
+            f"{df[1]} {df[3]} "
+            "; wv)AppleWebKit/537.36 (KHTML, like Gecko) "
+            "Version/4.0 Chrome/104.0.5112.97"
+            "Mobile Safari/537.36 miHoYoBBS/2"
+            f"{mys_version}"
         )
+
+    async def get_user_fp(self, uid: str, game_name: Optional[str] = None) -> Optional[str]:
+        profile = await self.get_header_profile(uid, game_name)
+        data = profile.fp
         if data is None:
             seed_id, seed_time = self.get_seed()
             device_id = self.get_device_id()
             data = await self.generate_fake_fp(device_id, seed_id, seed_time)
             await GsUser.update_data_by_uid_without_bot_id(
-                uid,
+                profile.main_uid,
                 game_name,
                 fp=data,
             )
+            # 写入会让缓存失效, 这里直接放回更新后的信息, 省去下次查询
+            profile.fp = data
+            header_profile_cache.set(uid, GsUser.get_gameid_name(game_name), profile)
         return data
 
     async def get_user_device_id(self, uid: str, game_name: Optional[str] = None) -> Optional[str]:
-        uid = await self.get_uid(uid, game_name)
-        data = await GsUser.get_user_attr_by_uid(
-            uid,
-            "device_id",
-            game_name,
-        )
+        profile = await self.get_header_profile(uid, game_name)
+        data = profile.device_id
         if data is None:
             data = self.get_device_id()
             await GsUser.update_data_by_uid_without_bot_id(
-                uid,
+                profile.main_uid,
                 game_name,
                 device_id=data,
             )
+            # 写入会让缓存失效, 这里直接放回更新后的信息, 省去下次查询
+            profile.device_id = data
+            header_profile_cache.set(uid, GsUser.get_gameid_name(game_name), profile)
         return data
 
     def check_os(self, uid: str, game_name: str = "gs") -> bool:
@@ -420,119 +448,102 @@ class BaseMysApi:
             header = copy.deepcopy(self._HEADER)
 
         url = base_url + url if base_url else url
-        async with aiohttp.ClientSession(
-            base_url=None,
-            connector=TCPConnector(
-                ssl_context=ssl_context,
-            ),
-        ) as session:
-            raw_data = {}
-            uid = None
-            if params and "role_id" in params:
-                uid = params["role_id"]
-            elif data and "role_id" in data:
-                uid = data["role_id"]
-            elif params and "uid" in params:
-                uid = params["uid"]
-
-            if uid is not None:
-                try:
-                    if "x-rpc-device_fp" not in header or "x-rpc-device_id" not in header:
-                        async with timeout(5):
-                            device_id = await self.get_user_device_id(
-                                uid,
-                                game_name,
-                            )
-                            header["x-rpc-device_fp"] = await self.get_user_fp(
-                                uid,
-                                game_name,
-                            )
-                            if device_id is not None:
-                                header["x-rpc-device_id"] = device_id
-
-                    dfp: Optional[str] = await GsUser.get_user_attr_by_uid(
-                        uid,
-                        "device_info",
-                        "sr" if self.is_sr else game_name,
-                    )
-                    if dfp is not None:
-                        df = dfp.split("/")
-                        header["User-Agent"] = (
-                            "Mozilla/5.0 (Linux; Android 13; "
-                            f"{df[1]} {df[3]} "
-                            "; wv)AppleWebKit/537.36 (KHTML, like Gecko) "
-                            "Version/4.0 Chrome/104.0.5112.97"
-                            "Mobile Safari/537.36 miHoYoBBS/2"
-                            f"{mys_version}"
+        session = get_session()
+        raw_data = {}
+        uid = None
+        if params and "role_id" in params:
+            uid = params["role_id"]
+        elif data and "role_id" in data:
+            uid = data["role_id"]
+        elif params and "uid" in params:
+            uid = params["uid"]
+
+        if uid is not None:
+            try:
+                if "x-rpc-device_fp" not in header or "x-rpc-device_id" not in header:
+                    async with timeout(5):
+                        device_id = await self.get_user_device_id(
+                            uid,
+                            game_name,
                         )
-                except asyncio.TimeoutError:
-                    logger.warning("[mhy_request] 获取DFP超时, 未知原因...")
-
-            logger.debug(header)
-
-            for _ in range(2):
-                try:
-                    async with session.request(
-                        method,
-                        url,
-                        headers=header,
-                        params=params,
-                        json=data,
-                        timeout=aiohttp.ClientTimeout(total=time_out),
-                        proxy=proxy,
-                    ) as resp:
-                        raw_data = await resp.json()
-                except aiohttp.ClientConnectionError:
-                    await call_bot().send("[mys_request] 请求连接错误...")
-                    continue
-                except Exception as e:
-                    await call_bot().send(f"[mys_request] 请求错误, 请联系Bot主人检查控制台! 错误信息: {str(e)}")
-                    continue
-
-                logger.debug(raw_data)
-
-                # 判断retcode
-                if "retcode" in raw_data:
-                    retcode = raw_data["retcode"]
-                elif "code" in raw_data:
-                    retcode = raw_data["code"]
-                else:
-                    retcode = 0
-
-                # 做特殊处理
-                if retcode in _DEAD_CODE:
-                    if uid:
-                        header["x-rpc-challenge_game"] = "6" if self.is_sr else "2"
-                        header["x-rpc-page"] = "v1.4.1-rpg_#/rpg" if self.is_sr else "v4.1.5-ys_#ys"
-                        header["x-rpc-tool-verison"] = "v1.4.1-rpg" if self.is_sr else "v4.1.5-ys"
-
-                    if pass_config.get_config("MysPass").data:
-                        pass_header = copy.deepcopy(header)
-                        ch = await self._upass(pass_header)
-                        if ch == "":
-                            return 114514
-                        else:
-                            header["x-rpc-challenge"] = ch
-
-                    if "DS" in header:
-                        if isinstance(params, Dict):
-                            q = "&".join(
-                                [
-                                    f"{k}={v}"
-                                    for k, v in sorted(
-                                        params.items(),
-                                        key=lambda x: x[0],
-                                    )
-                                ]
-                            )
-                        else:
-                            q = ""
-                        header["DS"] = get_ds_token(q, data)
-
-                    logger.debug(f"[米游社请求] Header: {header}")
-                elif retcode != 0:
-                    return retcode
-                else:
-                    return raw_data
+                        header["x-rpc-device_fp"] = await self.get_user_fp(
+                            uid,
+                            game_name,
+                        )
+                        if device_id is not None:
+                            header["x-rpc-device_id"] = device_id
+
+                profile = await self.get_header_profile(uid, "sr" if self.is_sr else game_name)
+                if profile.user_agent is not None:
+                    header["User-Agent"] = profile.user_agent
+            except asyncio.TimeoutError:
+                logger.warning("[mhy_request] 获取DFP超时, 未知原因...")
+
+        logger.debug(header)
+
+        for _ in range(2):
+            try:
+                async with session.request(
+                    method,
+                    url,
+                    headers=header,
+                    params=params,
+                    json=data,
+                    timeout=aiohttp.ClientTimeout(total=time_out),
+                    proxy=proxy,
+                ) as resp:
+                    raw_data = await resp.json()
+            except aiohttp.ClientConnectionError:
+                await call_bot().send("[mys_request] 请求连接错误...")
+                continue
+            except Exception as e:
+                await call_bot().send(f"[mys_request] 请求错误, 请联系Bot主人检查控制台! 错误信息: {str(e)}")
+                continue
+
+            logger.debug(raw_data)
+
+            # 判断retcode
+            if "retcode" in raw_data:
+                retcode = raw_data["retcode"]
+            elif "code" in raw_data:
+                retcode = raw_data["code"]
             else:
-                return -999
+                retcode = 0
+
+            # 做特殊处理
+            if retcode in _DEAD_CODE:
+                if uid:
+                    header["x-rpc-challenge_game"] = "6" if self.is_sr else "2"
+                    header["x-rpc-page"] = "v1.4.1-rpg_#/rpg" if self.is_sr else "v4.1.5-ys_#ys"
+                    header["x-rpc-tool-verison"] = "v1.4.1-rpg" if self.is_sr else "v4.1.5-ys"
+
+                if pass_config.get_config("MysPass").data:
+                    pass_header = copy.deepcopy(header)
+                    ch = await self._upass(pass_header)
+                    if ch == "":
+                        return 114514
+                    else:
+                        header["x-rpc-challenge"] = ch
+
+                if "DS" in header:
+                    if isinstance(params, Dict):
+                        q = "&".join(
+                            [
+                                f"{k}={v}"
+                                for k, v in sorted(
+                                    params.items(),
+                                    key=lambda x: x[0],
+                                )
+                            ]
+                        )
+                    else:
+                        q = ""
+                    header["DS"] = get_ds_token(q, data)
+
+                logger.debug(f"[米游社请求] Header: {header}")
+            elif retcode != 0:
+                return retcode
+            else:
+                return raw_data
+        else:
+            return -999
@@ -0,0 +1,314 @@
+import json
+import time
+import uuid
+import asyncio
+import hashlib
+from typing import Dict, List, Tuple, Union, Literal, Optional
+from datetime import date
+from collections import Counter
+
+import msgspec
+from msgspec import msgpack
+
+from gsuid_core.bot import _Bot, prepare_message
+from gsuid_core.gss import gss
+from gsuid_core.logger import logger
+from gsuid_core.models import Message
+from gsuid_core.data_store import get_res_path
+from gsuid_core.utils.bulk_job import TokenBucket
+from gsuid_core.utils.plugins_config.gs_config import sp_config
+
+from .models import BoardCastMsgDict
+
+broadcast_rpm: int = sp_config.get_config("BroadcastRPM").data
+private_rpm: int = sp_config.get_config("BroadcastPrivateRPM").data
+broadcast_burst: int = sp_config.get_config("BroadcastBurst").data
+platform_rpm: List[str] = sp_config.get_config("BroadcastPlatformRPM").data
+
+BROADCAST_PATH = get_res_path(["GsCore", "broadcast"])
+# 每发送多少条写入一次进度
+CHECKPOINT_EVERY = 20
+MAX_JOBS = 20
+
+# 有公开速率限制的平台, 每个Bot每分钟的条数(留有余量); 可被`BroadcastPlatformRPM`覆盖
+# - telegram: 群发通知每秒不超过 30 条
+# - discord: 每个Bot全局每秒 50 次请求
+# 其他平台(例如 onebot 的风控、官方Bot的主动消息额度)没有公开的固定速率,
+# 默认私聊 120 条/分钟、群聊 30 条/分钟, 不慢于此前逐条发送时 0.5 秒/1.5~3.5 秒的间隔
+PLATFORM_RPM: Dict[str, int] = {
+    "telegram": 1200,
+    "discord": 1500,
+}
+
+# (目标类型, 目标ID, 平台, 消息), 私聊排在群聊之前
+Target = Tuple[Literal["direct", "group"], str, str, List[Message]]
+
+
+def parse_platform_rpm(items: List[str]) -> Dict[str, int]:
+    """解析 平台:每分钟条数 的配置"""
+    result: Dict[str, int] = {}
+    for item in items:
+        parts = [part.strip() for part in item.split(":")]
+        if len(parts) != 2 or not parts[1].isdigit() or int(parts[1]) <= 0:
+            logger.warning(f"[推送] 无法解析平台速率配置: {item}")
+            continue
+        result[parts[0]] = int(parts[1])
+    return result
+
+
+class AdaptiveLimiter(TokenBucket):
+    """
+    自适应速率的令牌桶
+
+    发送失败时速率减半(不低于上限的 1/8), 连续成功`RECOVER_AFTER`条后按上限的 1/10 逐步恢复。
+    """
+
+    RECOVER_AFTER = 10
+
+    def __init__(self, rpm: int, burst: int = 1):
+        super().__init__(rpm, burst)
+        self.max_rpm = rpm
+        self.rpm = float(rpm)
+        self.streak = 0
+
+    def _set_rpm(self, rpm: float):
+        self.rpm = rpm
+        self.rate = rpm / 60
+
+    def on_success(self):
+        self.streak += 1
+        if self.rpm < self.max_rpm and self.streak >= self.RECOVER_AFTER:
+            self.streak = 0
+            self._set_rpm(min(self.max_rpm, self.rpm + self.max_rpm / 10))
+
+    def on_failure(self):
+        self.streak = 0
+        self._set_rpm(max(self.max_rpm / 8, self.rpm / 2))
+
+
+class LaneStats:
+    """一个连接的Bot在一次推送中的进度"""
+
+    def __init__(self, name: str, total: int, cursor: int = 0):
+        self.name = name
+        self.total = total
+        self.cursor = cursor
+        self.sent = 0
+        self.failed = 0
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+
+    def get_stats(self) -> Dict[str, Union[str, int, float, None]]:
+        elapsed = (self.finished_at or time.time()) - self.started_at
+        return {
+            "total": self.total,
+            "cursor": self.cursor,
+            "sent": self.sent,
+            "failed": self.failed,
+            "per_minute": round((self.sent + self.failed) / elapsed * 60, 2) if elapsed > 0 else 0.0,
+            "elapsed": round(elapsed, 1),
+            "finished": self.finished_at is not None,
+        }
+
+
+class BroadcastJob:
+    def __init__(self, job_id: str, targets: List[Target]):
+        self.job_id = job_id
+        self.targets = targets
+        self.lanes: Dict[str, LaneStats] = {}
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+
+        # (消息id, 平台) -> [转换任务, 剩余使用次数], 同一消息体在每个平台只转换一次
+        self.prepared: Dict[Tuple[int, str], list] = {}
+        self.unsaved = 0
+
+    @property
+    def path(self):
+        return BROADCAST_PATH / f"{self.job_id}.json"
+
+    def get_stats(self) -> Dict:
+        return {
+            "targets": len(self.targets),
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "lanes": {name: lane.get_stats() for name, lane in self.lanes.items()},
+        }
+
+
+class BroadcastEngine:
+    """
+    广播推送
+
+    每个连接的Bot(`gss.active_bot`)一条发送通道, 各自按顺序发送同一份目标列表,
+    慢的Bot不会拖慢其他Bot; 每条通道对每个平台的私聊、群聊各有独立的自适应限速。
+    消息体按平台转换一次后复用, 各通道的发送进度写入文件, 当天重启后可继续。
+
+    每个Bot都要发送全部目标, 通道之间没有可以分摊的工作, 因此不使用多通道共享的优先队列;
+    目标列表中私聊排在群聊之前, 私聊与群聊分别限速, 大量群聊不会占用私聊的速率。
+    """
+
+    def __init__(
+        self,
+        rpm: int = broadcast_rpm,
+        private_rpm: int = private_rpm,
+        burst: int = broadcast_burst,
+        platforms: Optional[Dict[str, int]] = None,
+    ):
+        self.rpm = rpm
+        self.private_rpm = private_rpm
+        self.burst = burst
+        self.platforms = {**PLATFORM_RPM, **(platforms or {})}
+        # (通道, 平台, 目标类型) -> 限速器, 多次推送之间共享
+        self.limiters: Dict[Tuple[str, str, str], AdaptiveLimiter] = {}
+        self.jobs: Dict[str, BroadcastJob] = {}
+
+    def _limiter(self, lane: str, platform: str, target_type: str) -> AdaptiveLimiter:
+        key = (lane, platform, target_type)
+        limiter = self.limiters.get(key)
+        if limiter is None:
+            rpm = self.platforms.get(platform) or (self.private_rpm if target_type == "direct" else self.rpm)
+            limiter = self.limiters[key] = AdaptiveLimiter(rpm, self.burst)
+        return limiter
+
+    @staticmethod
+    def build_targets(msgs: BoardCastMsgDict) -> List[Target]:
+        targets: List[Target] = []
+        for qid, singles in msgs["private_msg_dict"].items():
+            for single in singles:
+                targets.append(("direct", qid, single["bot_id"], single["messages"]))
+        for gid, single in msgs["group_msg_dict"].items():
+            targets.append(("group", gid, single["bot_id"], single["messages"]))
+        return targets
+
+    @staticmethod
+    def _job_id(targets: List[Target]) -> str:
+        # 以目标与消息内容区分推送任务, 同一天重复执行相同的推送时可从中断处继续
+        digest = hashlib.sha1()
+        bodies: Dict[int, str] = {}
+        try:
+            for t in targets:
+                body = bodies.get(id(t[3]))
+                if body is None:
+                    body = bodies[id(t[3])] = hashlib.sha1(msgpack.encode(t[3])).hexdigest()
+                digest.update(f"{t[0]}|{t[1]}|{t[2]}|{body}\n".encode())
+        except (TypeError, msgspec.EncodeError):
+            # 消息中有无法序列化的内容(例如图片对象)时不支持断点续传
+            return uuid.uuid4().hex[:16]
+        return digest.hexdigest()[:16]
+
+    async def send(self, msgs: BoardCastMsgDict):
+        targets = self.build_targets(msgs)
+        if not targets:
+            return
+
+        job_id = self._job_id(targets)
+        if job_id in self.jobs and self.jobs[job_id].finished_at is None:
+            logger.warning(f"[推送] 相同的推送任务 {job_id} 正在执行中, 跳过...")
+            return
+
+        # 只保留最近的推送记录
+        finished = [k for k, v in self.jobs.items() if v.finished_at is not None]
+        for old_id in finished[: max(len(finished) - MAX_JOBS + 1, 0)]:
+            del self.jobs[old_id]
+        job = self.jobs[job_id] = BroadcastJob(job_id, targets)
+        cursors = self._load_checkpoint(job)
+        bots = dict(gss.active_bot)
+        for name in bots:
+            job.lanes[name] = LaneStats(name, len(targets), cursors.get(name, 0))
+
+        uses = Counter((id(t[3]), t[2]) for t in targets)
+        for key, count in uses.items():
+            job.prepared[key] = [None, count * len(bots)]
+        # 从断点继续时, 已跳过的目标不再使用转换结果
+        for lane in job.lanes.values():
+            for t in targets[: lane.cursor]:
+                job.prepared[(id(t[3]), t[2])][1] -= 1
+
+        logger.info(f"🚀 [推送] 任务{job_id}启动, 目标{len(targets)}个, 发送通道{len(bots)}条...")
+        try:
+            await asyncio.gather(*(self._run_lane(job, job.lanes[name], bot) for name, bot in bots.items()))
+        finally:
+            job.finished_at = time.time()
+            if all(lane.cursor >= len(targets) for lane in job.lanes.values()):
+                job.path.unlink(missing_ok=True)
+            else:
+                self._save_checkpoint(job)
+            job.prepared.clear()
+
+        for name, lane in job.lanes.items():
+            logger.info(f"✅ [推送] 任务{job_id} 通道{name}: {lane.get_stats()}")
+        logger.info("✅ [推送] 任务结束!")
+
+    async def _prepare(self, job: BroadcastJob, messages: List[Message], platform: str) -> List[Message]:
+        entry = job.prepared[(id(messages), platform)]
+        if entry[0] is None:
+            entry[0] = asyncio.ensure_future(prepare_message(messages, platform, ""))
+        try:
+            return await asyncio.shield(entry[0])
+        finally:
+            entry[1] -= 1
+            if entry[1] <= 0:
+                # 所有通道都已使用, 释放转换结果
+                job.prepared.pop((id(messages), platform), None)
+
+    async def _run_lane(self, job: BroadcastJob, lane: LaneStats, bot: _Bot):
+        for index in range(lane.cursor, len(job.targets)):
+            target_type, target_id, platform, messages = job.targets[index]
+            limiter = self._limiter(lane.name, platform, target_type)
+            await limiter.acquire()
+            try:
+                _message = await self._prepare(job, messages, platform)
+                await bot.send_prepared(_message, target_type, target_id, platform, "", "")
+            except Exception as e:
+                limiter.on_failure()
+                lane.failed += 1
+                logger.warning(f"💥 [推送] [{lane.name}] {target_type} {target_id} 推送失败!错误信息:{e}")
+            else:
+                limiter.on_success()
+                lane.sent += 1
+
+            lane.cursor = index + 1
+            job.unsaved += 1
+            if job.unsaved >= CHECKPOINT_EVERY:
+                job.unsaved = 0
+                self._save_checkpoint(job)
+        lane.finished_at = time.time()
+
+    def _load_checkpoint(self, job: BroadcastJob) -> Dict[str, int]:
+        if not job.path.exists():
+            return {}
+        try:
+            data = json.loads(job.path.read_text(encoding="utf-8"))
+        except Exception as e:
+            logger.warning(f"[推送] 进度文件 {job.path.name} 读取失败: {e}")
+            return {}
+        if data.get("date") != date.today().isoformat():
+            return {}
+        cursors = data.get("lanes", {})
+        logger.info(f"[推送] 任务{job.job_id}从上次中断处继续: {cursors}")
+        return cursors
+
+    def _save_checkpoint(self, job: BroadcastJob):
+        tmp = job.path.with_suffix(".tmp")
+        data = {
+            "date": date.today().isoformat(),
+            "lanes": {name: lane.cursor for name, lane in job.lanes.items()},
+        }
+        try:
+            tmp.write_text(json.dumps(data), encoding="utf-8")
+            tmp.replace(job.path)
+        except Exception as e:
+            logger.warning(f"[推送] 进度文件 {job.path.name} 写入失败: {e}")
+
+    def get_stats(self) -> Dict:
+        return {
+            "jobs": {job_id: job.get_stats() for job_id, job in self.jobs.items()},
+            "limiters": {
+                f"{lane}:{platform}:{target_type}": round(limiter.rpm, 2)
+                for (lane, platform, target_type), limiter in self.limiters.items()
+            },
+        }
+
+
+broadcast_engine = BroadcastEngine(platforms=parse_platform_rpm(platform_rpm))
@@ -0,0 +1,266 @@
+import json
+import time
+import random
+import asyncio
+from typing import (
+    Any,
+    Dict,
+    Union,
+    TypeVar,
+    Callable,
+    Optional,
+    Sequence,
+    Awaitable,
+)
+from datetime import date
+
+from gsuid_core.logger import logger
+from gsuid_core.data_store import get_res_path
+from gsuid_core.utils.plugins_config.gs_config import sp_config
+
+bulk_concurrency: int = sp_config.get_config("BulkConcurrency").data
+bulk_endpoint_rpm: int = sp_config.get_config("BulkEndpointRPM").data
+bulk_cookie_rpm: int = sp_config.get_config("BulkCookieRPM").data
+bulk_jitter: int = sp_config.get_config("BulkJitter").data
+bulk_captcha_retry: int = sp_config.get_config("BulkCaptchaRetry").data
+
+BULK_JOB_PATH = get_res_path(["GsCore", "bulk_jobs"])
+# 验证码重试的退避基数(秒), 第 n 次重试等待 基数 * 2^(n-1) 再加随机时间
+CAPTCHA_BACKOFF = 60
+# 每完成多少个账号写入一次进度
+CHECKPOINT_EVERY = 20
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class TokenBucket:
+    """令牌桶, 每分钟补充`rpm`个令牌, 最多积攒`burst`个"""
+
+    def __init__(self, rpm: float, burst: int = 1):
+        self.rate = max(rpm, 0.01) / 60
+        self.capacity = max(burst, 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class BulkJob:
+    """一次批量任务的进度"""
+
+    def __init__(self, name: str, total: int):
+        self.name = name
+        self.total = total
+        self.done = 0
+        # 从上次中断处恢复, 无需再执行的数量
+        self.resumed = 0
+        self.failed = 0
+        self.retried = 0
+        self.running = 0
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+
+    def get_stats(self) -> Dict[str, Union[str, int, float, None]]:
+        end = self.finished_at or time.time()
+        elapsed = end - self.started_at
+        finished = self.done - self.resumed
+        remain = self.total - self.done
+        eta = None
+        if self.finished_at is None and finished:
+            eta = round(elapsed / finished * remain, 1)
+        return {
+            "name": self.name,
+            "total": self.total,
+            "done": self.done,
+            "resumed": self.resumed,
+            "failed": self.failed,
+            "retried": self.retried,
+            "running": self.running,
+            "progress": round(self.done / self.total, 4) if self.total else 1.0,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "elapsed": round(elapsed, 1),
+            "eta": eta,
+        }
+
+
+class BulkJobEngine:
+    """
+    逐个账号调用上游接口的批量任务(自动签到、刷新Stoken、体力推送等)
+
+    - 全局并发数限制同时执行的账号数量
+    - 每个上游接口、每个Cookie各有一个令牌桶, 执行前再随机等待一段时间
+    - 只有结果为验证码时才退避重试, 其他失败直接记录
+    - 已完成账号的结果写入进度文件, 当天重启后从中断处继续, 任务完成后删除
+    """
+
+    def __init__(
+        self,
+        concurrency: int = bulk_concurrency,
+        endpoint_rpm: int = bulk_endpoint_rpm,
+        cookie_rpm: int = bulk_cookie_rpm,
+        jitter: float = bulk_jitter,
+        captcha_retry: int = bulk_captcha_retry,
+    ):
+        self.semaphore = asyncio.Semaphore(max(concurrency, 1))
+        self.endpoint_rpm = endpoint_rpm
+        self.cookie_rpm = cookie_rpm
+        self.jitter = jitter
+        self.captcha_retry = captcha_retry
+
+        self.endpoints: Dict[str, TokenBucket] = {}
+        self.jobs: Dict[str, BulkJob] = {}
+
+    def _endpoint_bucket(self, endpoint: str) -> TokenBucket:
+        bucket = self.endpoints.get(endpoint)
+        if bucket is None:
+            bucket = self.endpoints[endpoint] = TokenBucket(self.endpoint_rpm)
+        return bucket
+
+    async def run(
+        self,
+        name: str,
+        items: Sequence[T],
+        key: Callable[[T], str],
+        worker: Callable[[T], Awaitable[R]],
+        endpoint: Optional[str] = None,
+        cookie: Optional[Callable[[T], Optional[str]]] = None,
+        is_captcha: Optional[Callable[[R], bool]] = None,
+    ) -> Dict[str, R]:
+        """📝简单介绍:
+
+            对`items`中的每个账号执行`worker`, 返回 账号键 -> 结果 的字典
+
+            执行时抛出异常的账号不在返回值中, 也不会写入进度, 重启后会再次执行
+
+        🌱参数:
+
+            🔹name (`str`):
+                    任务名, 同名任务共用一个进度文件, 例如`daily_sign_gs`
+
+            🔹key (`Callable[[T], str]`):
+                    取得账号唯一键的函数, 例如UID
+
+            🔹worker (`Callable[[T], Awaitable[R]]`):
+                    实际执行的函数, 结果需能以 JSON 保存
+
+            🔹endpoint (`Optional[str]`, 默认是 `None`):
+                    上游接口名, 同名接口共用一个令牌桶, 默认与任务名相同
+
+            🔹cookie (`Optional[Callable[[T], Optional[str]]]`, 默认是 `None`):
+                    取得账号所用Cookie的函数, 用于每个Cookie的限速
+
+            🔹is_captcha (`Optional[Callable[[R], bool]]`, 默认是 `None`):
+                    判断结果是否为出现验证码, 为`True`时退避后重试
+        """
+        if name in self.jobs and self.jobs[name].finished_at is None:
+            raise ValueError(f"[批量任务] {name} 正在执行中!")
+
+        path = BULK_JOB_PATH / f"{name}.json"
+        results: Dict[str, Any] = self._load_checkpoint(path)
+        # 同一账号只执行一次
+        unique: Dict[str, T] = {}
+        for item in items:
+            unique.setdefault(key(item), item)
+        job = self.jobs[name] = BulkJob(name, len(unique))
+        job.done = job.resumed = sum(1 for item_key in unique if item_key in results)
+        if job.resumed:
+            logger.info(f"[批量任务] {name} 从上次中断处继续, 已完成{job.resumed}/{job.total}")
+
+        endpoint_bucket = self._endpoint_bucket(endpoint or name)
+        cookie_buckets: Dict[str, TokenBucket] = {}
+        unsaved = 0
+
+        async def run_one(item_key: str, item: T):
+            nonlocal unsaved
+            ck = cookie(item) if cookie is not None else None
+            for attempt in range(self.captcha_retry + 1):
+                # 先等待Cookie的令牌, 避免占用并发名额
+                if ck:
+                    if ck not in cookie_buckets:
+                        cookie_buckets[ck] = TokenBucket(self.cookie_rpm)
+                    await cookie_buckets[ck].acquire()
+                async with self.semaphore:
+                    await endpoint_bucket.acquire()
+                    if self.jitter > 0:
+                        await asyncio.sleep(random.uniform(0, self.jitter))
+
+                    job.running += 1
+                    try:
+                        result = await worker(item)
+                    except Exception as e:
+                        logger.exception(f"[批量任务] {name} {item_key} 执行失败: {e}")
+                        job.failed += 1
+                        job.done += 1
+                        return
+                    finally:
+                        job.running -= 1
+
+                if is_captcha is None or not is_captcha(result) or attempt >= self.captcha_retry:
+                    break
+                # 退避时不占用并发名额
+                job.retried += 1
+                delay = CAPTCHA_BACKOFF * 2**attempt + random.uniform(0, CAPTCHA_BACKOFF)
+                logger.info(f"[批量任务] {name} {item_key} 出现验证码, 等待{delay:.0f}秒后重试...")
+                await asyncio.sleep(delay)
+
+            results[item_key] = result
+            job.done += 1
+            unsaved += 1
+            if unsaved >= CHECKPOINT_EVERY:
+                unsaved = 0
+                self._save_checkpoint(path, results)
+
+        try:
+            await asyncio.gather(*(run_one(k, v) for k, v in unique.items() if k not in results))
+        finally:
+            job.finished_at = time.time()
+            if job.done < job.total or job.failed:
+                # 中断或有失败时保留进度, 重启后只执行剩余账号
+                self._save_checkpoint(path, results)
+            else:
+                path.unlink(missing_ok=True)
+
+        logger.info(f"[批量任务] {name} 执行完成: {job.get_stats()}")
+        return results
+
+    def _load_checkpoint(self, path) -> Dict[str, Any]:
+        if not path.exists():
+            return {}
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except Exception as e:
+            logger.warning(f"[批量任务] 进度文件 {path.name} 读取失败: {e}")
+            return {}
+        # 只恢复当天的进度
+        if data.get("date") != date.today().isoformat():
+            return {}
+        return data.get("results", {})
+
+    def _save_checkpoint(self, path, results: Dict[str, Any]):
+        tmp = path.with_suffix(".tmp")
+        try:
+            tmp.write_text(
+                json.dumps({"date": date.today().isoformat(), "results": results}, ensure_ascii=False),
+                encoding="utf-8",
+            )
+            tmp.replace(path)
+        except Exception as e:
+            logger.warning(f"[批量任务] 进度文件 {path.name} 写入失败: {e}")
+
+    def get_stats(self) -> Dict[str, Dict]:
+        return {name: job.get_stats() for name, job in self.jobs.items()}
+
+
+bulk_engine = BulkJobEngine()
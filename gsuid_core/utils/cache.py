@@ -1,24 +1,247 @@
+import sys
 import json
 import time
+import heapq
 import base64
+import hashlib
 import inspect
-from typing import Dict, List, Tuple, Union
+from typing import Any, Dict, List, Tuple, Union, Optional
 from pathlib import Path
 from functools import wraps
+from collections import OrderedDict
 
 import aiofiles
 from PIL import Image
 
 from gsuid_core.logger import logger
+from gsuid_core.server import on_core_start
 from gsuid_core.data_store import get_res_path
 from gsuid_core.utils.image.convert import convert_img, convert_img_sync
+from gsuid_core.utils.single_flight import SingleFlight
+from gsuid_core.utils.plugins_config.gs_config import sp_config
 
 IMAGE_CACHE = get_res_path("IMAGE_CACHE")
 
-CACHE: Dict[float, Dict[str, Union[Path, str]]] = {}
-
+cache_max_entries: int = sp_config.get_config("CacheMaxEntries").data
+cache_max_mb: int = sp_config.get_config("CacheMaxMB").data
+
+
+class CacheEntry:
+    __slots__ = ("value", "path", "size", "expire_at", "seq")
+
+    def __init__(
+        self,
+        value: Any,
+        path: Optional[Path],
+        size: int,
+        expire_at: float,
+        seq: int,
+    ):
+        # 磁盘缓存时 value 为 None, 命中后读取 path
+        self.value = value
+        self.path = path
+        self.size = size
+        self.expire_at = expire_at
+        self.seq = seq
+
+
+class CacheEngine:
+    """
+    gs_cache 的缓存引擎
+
+    - 以 OrderedDict 作为 O(1) 的键索引, 同时维护最近最少使用顺序
+    - 以最小堆维护过期时间, 过期条目惰性清理
+    - 超出最大条数/体积时按 LRU 淘汰, 并删除对应的磁盘文件
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+
+        self._data: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._heap: List[Tuple[float, int, str]] = []
+        self._seq = 0
+        self.flight = SingleFlight()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry.expire_at <= time.time():
+            self._remove(key)
+            self.expirations += 1
+            return None
+        self._data.move_to_end(key)
+        return entry
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        expire_time: float,
+        path: Optional[Path] = None,
+        size: int = 0,
+    ):
+        old = self._data.pop(key, None)
+        if old is not None:
+            self.size -= old.size
+            # 同一个键的磁盘文件路径相同, 此时文件已被新结果覆盖, 不能删除
+            if old.path is not None and old.path != path:
+                old.path.unlink(missing_ok=True)
+
+        self._seq += 1
+        expire_at = time.time() + expire_time
+        self._data[key] = CacheEntry(value, path, size, expire_at, self._seq)
+        self.size += size
+        heapq.heappush(self._heap, (expire_at, self._seq, key))
+
+        self._purge_expired()
+        while self._data and (len(self._data) > self.max_entries or self.size > self.max_bytes):
+            old_key = next(iter(self._data))
+            self._remove(old_key)
+            self.evictions += 1
+
+    def _purge_expired(self):
+        now = time.time()
+        while self._heap and self._heap[0][0] <= now:
+            _, seq, key = heapq.heappop(self._heap)
+            entry = self._data.get(key)
+            # 堆中可能残留已被覆盖/淘汰的旧条目
+            if entry is not None and entry.seq == seq:
+                self._remove(key)
+                self.expirations += 1
+
+        # 堆中失效记录过多时重建, 避免无限增长
+        if len(self._heap) > 2 * len(self._data) + 64:
+            self._heap = [(e.expire_at, e.seq, k) for k, e in self._data.items()]
+            heapq.heapify(self._heap)
+
+    def _remove(self, key: str):
+        entry = self._data.pop(key)
+        self.size -= entry.size
+        if entry.path is not None:
+            entry.path.unlink(missing_ok=True)
+
+    def clear(self):
+        for key in list(self._data):
+            self._remove(key)
+        self._heap.clear()
+
+    def get_stats(self) -> Dict[str, Union[int, float]]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "bytes": self.size,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "coalesced": self.flight.coalesced,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "inflight": len(self.flight),
+        }
+
+
+cache_engine = CacheEngine(cache_max_entries, cache_max_mb * 1024 * 1024)
+
+
+@on_core_start
+async def clean_image_cache():
+    # 重启后旧的磁盘缓存已无法被索引, 直接清理
+    for path in IMAGE_CACHE.glob("*"):
+        if path.is_file():
+            path.unlink(missing_ok=True)
+
+
+def _make_key(func_name: str, args: tuple, kwargs: dict) -> str:
+    file_key = func_name
+    for arg in list(args) + list(kwargs.values()):
+        if isinstance(arg, (str, int, float, bool, Tuple, Path)):
+            file_key += "_" + repr(arg)
+        elif isinstance(arg, Dict):
+            file_key += "_" + str(hash(json.dumps(arg, sort_keys=True)))
+        elif isinstance(arg, List):
+            file_key += "_" + str(hash(json.dumps(arg)))
+    return file_key
+
+
+def _image_bytes(result: Any) -> Optional[bytes]:
+    if isinstance(result, bytes):
+        return result
+    if isinstance(result, str) and result.startswith("base64://"):
+        return base64.b64decode(result[9:])
+    return None
+
+
+def _cache_path(file_key: str) -> Path:
+    return IMAGE_CACHE / f"{hashlib.md5(file_key.encode()).hexdigest()}.jpg"
+
+
+def _store_image_sync(file_key: str, result: Any, expire_time: float, store_bytes: bool) -> bool:
+    """图片类结果写入缓存, 非图片结果返回 False"""
+    if store_bytes:
+        if isinstance(result, Image.Image):
+            encoded = convert_img_sync(result, True)
+        elif isinstance(result, bytes):
+            encoded = f"base64://{base64.b64encode(result).decode()}"
+        elif isinstance(result, str) and result.startswith("base64://"):
+            encoded = result
+        else:
+            return False
+        cache_engine.set(file_key, encoded, expire_time, size=len(encoded))
+        return True
+
+    cache_target = _cache_path(file_key)
+    if isinstance(result, Image.Image):
+        result.save(cache_target)
+    else:
+        img_data = _image_bytes(result)
+        if img_data is None:
+            return False
+        with open(cache_target, "wb") as f:
+            f.write(img_data)
+    cache_engine.set(file_key, None, expire_time, cache_target, cache_target.stat().st_size)
+    return True
+
+
+async def _store_image(file_key: str, result: Any, expire_time: float, store_bytes: bool) -> bool:
+    if store_bytes and isinstance(result, Image.Image):
+        result = await convert_img(result, True)
+    if store_bytes or isinstance(result, Image.Image):
+        return _store_image_sync(file_key, result, expire_time, store_bytes)
+
+    img_data = _image_bytes(result)
+    if img_data is None:
+        return False
+
+    cache_target = _cache_path(file_key)
+    async with aiofiles.open(cache_target, "wb") as f:
+        await f.write(img_data)
+    cache_engine.set(file_key, None, expire_time, cache_target, len(img_data))
+    return True
+
+
+def gs_cache(expire_time=3600, store_bytes: bool = False):
+    """
+    缓存函数结果
+
+    Args:
+        expire_time: 缓存有效期(秒)
+        store_bytes: 图片类结果(Image/bytes/base64)是否以编码后的 base64 形式保存在内存中,
+            为 False 时写入磁盘文件, 命中后再读取转换
+    """
 
-def gs_cache(expire_time=3600):
     def wrapper(func):
         is_coroutine = inspect.iscoroutinefunction(func)
 
@@ -26,73 +249,29 @@ def gs_cache(expire_time=3600):
 
             @wraps(func)
             async def inner_async(*args, **kwargs):
-                time_key = time.time()
-                all_args = list(args) + list(kwargs.values())
-                file_key = func.__name__
-                for arg in all_args:
-                    if isinstance(arg, (str, int, float, bool, Tuple, Path)):
-                        file_key += "_" + repr(arg)
-                    elif isinstance(arg, Dict):
-                        file_key += "_" + str(hash(json.dumps(arg, sort_keys=True)))
-                    elif isinstance(arg, List):
-                        file_key += "_" + str(hash(json.dumps(arg)))
-                    else:
-                        continue
-
-                if not file_key:
-                    file_key = repr(func.__name__)
-
-                result = _value = None
-                WILL_DELETE = []
-
-                logger.trace(f"{func.__name__} 开始缓存...")
-                logger.trace(CACHE)
-
-                for key in CACHE:
-                    value = CACHE[key]
-                    if time_key - key <= expire_time:
-                        if file_key in value:
-                            _value = value[file_key]
-                            logger.trace(f"{func.__name__} 命中缓存 {_value}")
-                            break
-                    else:
-                        WILL_DELETE.append(key)
-                else:
-                    result = await func(*args, **kwargs)
-
-                if WILL_DELETE:
-                    for key in WILL_DELETE:
-                        if key in CACHE:
-                            del CACHE[key]
-
-                if _value is not None:
-                    if isinstance(_value, Path):
-                        result = await convert_img(_value)
-                    else:
-                        result = _value
-                elif result is not None:
-                    img_data = None
-                    cache_target = IMAGE_CACHE / f"{time_key}_{file_key}.jpg"
-                    if isinstance(result, Image.Image):
-                        result.save(cache_target)
-                    elif isinstance(result, bytes):
-                        img_data = result
-                    elif isinstance(result, str) and result.startswith("base64://"):
-                        img_data = base64.b64decode(result[9:])
-                    else:
-                        cache_target = result
-
-                    if img_data:
-                        async with aiofiles.open(cache_target, "wb") as f:
-                            await f.write(img_data)
-
-                    if time_key not in CACHE:
-                        CACHE[time_key] = {}
-                    if file_key not in CACHE[time_key]:
-                        CACHE[time_key][file_key] = cache_target
-
-                    logger.trace(f"{func.__name__} 进入缓存...")
-
+                file_key = _make_key(func.__name__, args, kwargs)
+
+                entry = cache_engine.get(file_key)
+                if entry is not None:
+                    cache_engine.hits += 1
+                    logger.trace(f"{func.__name__} 命中缓存 {file_key}")
+                    if entry.path is not None:
+                        return await convert_img(entry.path)
+                    return entry.value
+
+                # 同一个键的并发请求只计算一次
+                return await cache_engine.flight.do(file_key, lambda: compute(args, kwargs, file_key))
+
+            async def compute(args, kwargs, file_key: str):
+                cache_engine.misses += 1
+                result = await func(*args, **kwargs)
+                if result is not None:
+                    try:
+                        if not await _store_image(file_key, result, expire_time, store_bytes):
+                            cache_engine.set(file_key, result, expire_time, size=sys.getsizeof(result))
+                        logger.trace(f"{func.__name__} 进入缓存...")
+                    except Exception as e:
+                        logger.warning(f"{func.__name__} 写入缓存失败: {e}")
                 return result
 
             return inner_async
@@ -100,72 +279,25 @@ def gs_cache(expire_time=3600):
 
             @wraps(func)
             def inner_sync(*args, **kwargs):
-                time_key = time.time()
-                all_args = list(args) + list(kwargs.values())
-                file_key = ""
-                for arg in all_args:
-                    if isinstance(arg, (str, int, float, bool, Tuple, Path)):
-                        file_key += "_" + repr(arg)
-                    elif isinstance(arg, Dict):
-                        file_key += "_" + str(hash(json.dumps(arg, sort_keys=True)))
-                    elif isinstance(arg, List):
-                        file_key += "_" + str(hash(json.dumps(arg)))
-                    else:
-                        continue
-
-                if not file_key:
-                    file_key = repr(func.__name__)
-
-                result = _value = None
-                WILL_DELETE = []
-
-                logger.trace(f"{func.__name__} 开始缓存...")
-                logger.trace(CACHE)
-
-                for key in CACHE:
-                    value = CACHE[key]
-                    if time_key - key <= expire_time:
-                        if file_key in value:
-                            _value = value[file_key]
-                            logger.trace(f"{func.__name__} 命中缓存 {_value}")
-                            break
-                    else:
-                        WILL_DELETE.append(key)
-                else:
-                    result = func(*args, **kwargs)
-
-                if WILL_DELETE:
-                    for key in WILL_DELETE:
-                        if key in CACHE:
-                            del CACHE[key]
-
-                if _value is not None:
-                    if isinstance(_value, Path):
-                        result = convert_img_sync(_value)
-                    else:
-                        result = _value
-                elif result is not None:
-                    img_data = None
-                    cache_target = IMAGE_CACHE / f"{time_key}_{file_key}.jpg"
-                    if isinstance(result, Image.Image):
-                        result.save(cache_target)
-                    elif isinstance(result, bytes):
-                        img_data = result
-                    elif isinstance(result, str) and result.startswith("base64://"):
-                        img_data = base64.b64decode(result[9:])
-                    else:
-                        cache_target = result
-
-                    if img_data:
-                        with open(cache_target, "wb") as f:
-                            f.write(img_data)
-
-                    if time_key not in CACHE:
-                        CACHE[time_key] = {}
-                    if file_key not in CACHE[time_key]:
-                        CACHE[time_key][file_key] = cache_target
-
-                    logger.trace(f"{func.__name__} 进入缓存...")
+                file_key = _make_key(func.__name__, args, kwargs)
+
+                entry = cache_engine.get(file_key)
+                if entry is not None:
+                    cache_engine.hits += 1
+                    logger.trace(f"{func.__name__} 命中缓存 {file_key}")
+                    if entry.path is not None:
+                        return convert_img_sync(entry.path)
+                    return entry.value
+
+                cache_engine.misses += 1
+                result = func(*args, **kwargs)
+                if result is not None:
+                    try:
+                        if not _store_image_sync(file_key, result, expire_time, store_bytes):
+                            cache_engine.set(file_key, result, expire_time, size=sys.getsizeof(result))
+                        logger.trace(f"{func.__name__} 进入缓存...")
+                    except Exception as e:
+                        logger.warning(f"{func.__name__} 写入缓存失败: {e}")
 
                 return result
 
@@ -0,0 +1,190 @@
+import asyncio
+from typing import Dict, List, Tuple, Union, Iterable, Optional
+from datetime import date as ymddate, timedelta
+
+from gsuid_core.logger import logger
+
+from .global_val_models import DataType, CoreTargetIndex, CoreActiveRollup, CoreDataAnalysis
+
+# 回填缺失位图时向前回溯的天数, 覆盖看板统计的30天窗口
+BACKFILL_DAYS = 31
+
+
+def to_bitmap(bits: Iterable[int]) -> int:
+    # 先在 bytearray 中逐位置1, 避免大整数反复按位或产生的拷贝
+    bits = list(bits)
+    if not bits:
+        return 0
+    buf = bytearray(max(bits) // 8 + 1)
+    for bit in bits:
+        buf[bit >> 3] |= 1 << (bit & 7)
+    return int.from_bytes(buf, "little")
+
+
+def bitmap_to_bytes(bitmap: int) -> bytes:
+    return bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")
+
+
+def bitmap_from_bytes(data: bytes) -> int:
+    return int.from_bytes(data, "little")
+
+
+class ActiveRollup:
+    """
+    活跃用户/群组的每日位图汇总
+
+    每个用户/群组ID按数据类型分配一个固定的位序号(CoreTargetIndex),
+    `save_global_val`保存时顺带写入当天各机器人的活跃位图(CoreActiveRollup)。
+    看板的日活、月活、粘性、新增与流失率只需读取最近31天的位图按位合并, 与原始数据量无关。
+    升级前已有的历史数据在首次查询时按天回填。
+    """
+
+    def __init__(self):
+        self._bits: Dict[DataType, Dict[str, int]] = {data_type: {} for data_type in DataType}
+        self._loaded = False
+        self._backfilled = False
+        self._lock = asyncio.Lock()
+        self._backfill_lock = asyncio.Lock()
+
+    async def _load_index(self):
+        if self._loaded:
+            return
+        for data_type, target_id, bit in await CoreTargetIndex.get_all_index() or []:
+            self._bits[data_type][target_id] = bit
+        self._loaded = True
+
+    async def _get_bitmap(self, data_type: DataType, targets: List[str]) -> int:
+        """返回目标集合的位图, 未分配位序号的目标在此时分配并写入数据库"""
+        bits = self._bits[data_type]
+        pending: Dict[str, int] = {}
+        next_bit = max(bits.values(), default=-1) + 1
+        for target_id in targets:
+            if target_id not in bits and target_id not in pending:
+                pending[target_id] = next_bit
+                next_bit += 1
+        if pending:
+            new_index = [
+                CoreTargetIndex(data_type=data_type, target_id=target_id, bit=bit) for target_id, bit in pending.items()
+            ]
+            # 写入成功后才记住新的位序号, 否则重启后对应关系丢失, 历史位图会对应到错误的目标
+            if await CoreTargetIndex.insert_index(new_index):
+                bits.update(pending)
+            else:
+                logger.warning(f"[活跃统计] 写入{len(pending)}个新的位序号失败, 重新载入后本次忽略未分配的目标")
+                self._loaded = False
+                self._bits = {data_type: {} for data_type in DataType}
+                await self._load_index()
+                bits = self._bits[data_type]
+        return to_bitmap(bits[target_id] for target_id in targets if target_id in bits)
+
+    async def update(
+        self,
+        bot_id: str,
+        bot_self_id: str,
+        date: ymddate,
+        users: Iterable[str],
+        groups: Iterable[str],
+    ):
+        """覆盖写入某个机器人某天的活跃位图, 写入成功返回`True`"""
+        async with self._lock:
+            await self._load_index()
+            rows = []
+            for data_type, targets in ((DataType.USER, list(users)), (DataType.GROUP, list(groups))):
+                bitmap = await self._get_bitmap(data_type, targets)
+                rows.append(
+                    CoreActiveRollup(
+                        data_type=data_type,
+                        active_count=bitmap.bit_count(),
+                        bitmap=bitmap_to_bytes(bitmap),
+                        date=date,
+                        bot_id=bot_id,
+                        bot_self_id=bot_self_id,
+                    )
+                )
+            return bool(
+                await CoreActiveRollup.batch_insert_data_with_update(
+                    rows,
+                    ["active_count", "bitmap"],
+                    ["date", "data_type", "bot_id", "bot_self_id"],
+                )
+            )
+
+    async def backfill(self, today: ymddate):
+        """为升级前的历史数据补齐位图, 每次启动只检查一次"""
+        if self._backfilled:
+            return
+        async with self._backfill_lock:
+            if self._backfilled:
+                return
+            missing = await CoreActiveRollup.get_missing_days(today - timedelta(days=BACKFILL_DAYS)) or []
+            if missing:
+                logger.info(f"🔒️ [活跃统计] 开始回填 {len(missing)} 天的活跃位图...")
+            for date, bot_id, bot_self_id in missing:
+                targets = await CoreDataAnalysis.get_day_targets(date, bot_id, bot_self_id) or []
+                await self.update(
+                    bot_id,
+                    bot_self_id,
+                    date,
+                    (target_id for data_type, target_id in targets if data_type == DataType.USER),
+                    (target_id for data_type, target_id in targets if data_type == DataType.GROUP),
+                )
+            self._backfilled = True
+
+    async def get_stats(
+        self,
+        data_type: DataType,
+        today: ymddate,
+        bot_id: Optional[str] = None,
+        bot_self_id: Optional[str] = None,
+    ) -> Dict[str, Union[int, float]]:
+        """
+        计算看板指标, 口径与`CoreDataAnalysis._get_stats_for_type`一致:
+            dau_dag: 最近30天(不含今天)有数据的日子里, 每日活跃数的平均值
+            mau: 最近30天(不含今天)的去重活跃数
+            new: 今天活跃、但最近29天(不含今天)未出现过的数量
+            out_rate: 最近30天活跃、但最近7天未出现的比例
+        """
+        await self.backfill(today)
+
+        rows: List[Tuple[ymddate, bytes]] = (
+            await CoreActiveRollup.get_window(
+                data_type,
+                today - timedelta(days=30),
+                today,
+                bot_id,
+                bot_self_id,
+            )
+            or []
+        )
+
+        # 多个机器人的同一天按位合并
+        days: Dict[ymddate, int] = {}
+        for date, data in rows:
+            days[date] = days.get(date, 0) | bitmap_from_bytes(data)
+
+        month = last_29 = last_7 = 0
+        daily_counts: List[int] = []
+        for date, bitmap in days.items():
+            age = (today - date).days
+            if age == 0:
+                continue
+            month |= bitmap
+            if age <= 29:
+                last_29 |= bitmap
+            if age <= 7:
+                last_7 |= bitmap
+            if bitmap:
+                daily_counts.append(bitmap.bit_count())
+
+        mau = month.bit_count()
+        dau_dag = sum(daily_counts) / len(daily_counts) if daily_counts else 0.0
+        return {
+            "dau_dag": dau_dag,
+            "mau": mau,
+            "new": (days.get(today, 0) & ~last_29).bit_count(),
+            "stickiness": dau_dag / mau * 100 if mau else 0.0,
+            "out_rate": (month & ~last_7).bit_count() / mau * 100 if mau else 0,
+        }
+
+
+active_rollup = ActiveRollup()
@@ -5,17 +5,21 @@ from typing import (
     Dict,
     List,
     Type,
+    Tuple,
     TypeVar,
     Callable,
     Optional,
     Awaitable,
+    AsyncIterator,
 )
 from functools import wraps
+from contextlib import nullcontext, asynccontextmanager
+from contextvars import ContextVar
 from typing_extensions import ParamSpec, Concatenate
 
 from sqlmodel import Field, SQLModel, col, and_, delete, select, update
 from sqlalchemy import MetaData, exc, text, event, inspect, create_engine
-from sqlalchemy.exc import OperationalError
+from sqlalchemy.exc import IntegrityError, OperationalError
 from sqlalchemy.engine import Connection
 from sqlalchemy.schema import CreateTable
 from sqlalchemy.ext.asyncio import (
@@ -28,12 +32,14 @@ from sqlalchemy.ext.asyncio import (
 # from sqlalchemy.pool import NullPool
 # from sqlalchemy.pool import StaticPool
 from sqlalchemy.orm.attributes import InstrumentedAttribute
-from sqlalchemy.sql.expression import func, null, true
+from sqlalchemy.sql.expression import null, true
 
 from gsuid_core.logger import logger
 from gsuid_core.data_store import get_res_path
 from gsuid_core.utils.plugins_config.gs_config import database_config
 
+from .cookie_pool import CookiePool, get_cookie_pool
+
 T_BaseModel = TypeVar("T_BaseModel", bound="BaseModel")
 T_BaseIDModel = TypeVar("T_BaseIDModel", bound="BaseIDModel")
 T_User = TypeVar("T_User", bound="User")
@@ -185,31 +191,158 @@ async def init_database():
             raise ValueError(f"[GsCore] [数据库] [{base_url}] 连接失败, 请检查配置文件!")
 
 
+# 当前任务正在使用的会话, 嵌套的`with_session`方法与`db.transaction()`会加入该会话
+# 同时记录打开会话的任务: 在会话内创建的后台任务会复制上下文, 但不能与其共用会话;
+# 以及会话是否由`db.transaction()`打开
+_current_session: ContextVar[Optional[Tuple[AsyncSession, Optional[asyncio.Task], bool]]] = ContextVar(
+    "gs_db_session",
+    default=None,
+)
+
+
+def _get_current() -> Optional[Tuple[AsyncSession, bool]]:
+    current = _current_session.get()
+    if current is None or current[1] is not asyncio.current_task():
+        return None
+    return current[0], current[2]
+
+
+def current_session() -> Optional[AsyncSession]:
+    """当前任务中已打开的会话, 没有则为`None`"""
+    current = _get_current()
+    return current[0] if current else None
+
+
+def _is_autocommit() -> bool:
+    return db_config.get("isolation_level") == "AUTOCOMMIT"
+
+
+@asynccontextmanager
+async def _open_session(transaction: bool = False) -> AsyncIterator[AsyncSession]:
+    async with sqlite_semaphore or nullcontext():
+        if not _is_autocommit():
+            session = async_maker()
+        elif transaction:
+            # MySQL/PostgreSQL 默认 AUTOCOMMIT, 显式事务改用数据库默认的隔离级别, 才能统一提交或回滚
+            bind = engine.execution_options(  # type: ignore
+                isolation_level=engine.dialect.default_isolation_level or "READ COMMITTED"  # type: ignore
+            )
+            session = async_maker(bind=bind)
+        else:
+            # AUTOCOMMIT 的会话中无法使用 SAVEPOINT, 嵌套调用与此前一样各自打开会话
+            async with async_maker() as session:
+                yield session
+                await session.commit()
+            return
+
+        async with session:
+            token = _current_session.set((session, asyncio.current_task(), transaction))
+            try:
+                yield session
+                await session.commit()
+            finally:
+                _current_session.reset(token)
+
+
+class _JoinedSession:
+    """
+    传给嵌套调用的会话
+
+    嵌套调用中的`commit()`只写入(flush)而不提交, 以免提前提交外层的事务; 由最外层统一提交或回滚
+    """
+
+    def __init__(self, session: AsyncSession):
+        self._session = session
+
+    def __getattr__(self, name: str):
+        return getattr(self._session, name)
+
+    async def commit(self):
+        await self._session.flush()
+
+
+@asynccontextmanager
+async def _nested(session: AsyncSession) -> AsyncIterator[AsyncSession]:
+    """在 SAVEPOINT 中执行嵌套调用, 出错时只撤销其自己的改动, 外层会话与已读取的对象不受影响"""
+    conn = await session.connection()
+    if conn.dialect.name == "sqlite" and not conn.sync_connection.connection.driver_connection.in_transaction:  # type: ignore
+        # pysqlite 只在写语句前开启事务, 此时的 SAVEPOINT 会成为最外层事务, RELEASE 时即被提交,
+        # 外层回滚也无法撤销; 因此先显式开启事务
+        await conn.exec_driver_sql("BEGIN")
+    async with session.begin_nested():
+        yield _JoinedSession(session)  # type: ignore
+
+
+class Database:
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[AsyncSession]:
+        """📝简单介绍:
+
+            打开一个会话并在退出时统一提交, 出现异常时回滚
+
+            块内调用的所有`with_session`方法都使用这个会话, 只占用一个连接、提交一次;
+            其中的`session.commit()`不会提前提交
+
+            块内的方法出错时不再返回`None`, 而是直接抛出异常, 整个事务回滚
+
+            已处于会话中时加入外层会话, 出错时只回滚这个块内的改动
+
+        🚀使用范例:
+
+            `async with db.transaction() as session:`
+            `    await GsUser.full_insert_data(...)`
+            `    await GsBind.insert_uid(...)`
+        """
+        current = _get_current()
+        if current is not None:
+            async with _nested(current[0]) as session:
+                yield session
+            return
+        async with _open_session(transaction=True) as session:
+            yield session
+
+
+db = Database()
+
+
 def with_session(
     func: Callable[Concatenate[Any, AsyncSession, P], Awaitable[R]],
 ) -> Callable[Concatenate[Any, P], Awaitable[R]]:
     @wraps(func)
     async def wrapper(self, *args: P.args, **kwargs: P.kwargs):
+        current = _get_current()
+        if current is not None:
+            session, explicit = current
+            if explicit:
+                # 在`db.transaction()`中出错时直接抛出, 由其回滚整个事务
+                async with _nested(session) as joined:
+                    return await func(self, joined, *args, **kwargs)
+            # 嵌套调用加入外层会话, 由外层统一提交; 出错时撤销嵌套调用的改动, 与此前一样记录后返回 None
+            try:
+                async with _nested(session) as joined:
+                    return await func(self, joined, *args, **kwargs)
+            except OperationalError:
+                # 数据库被锁定等错误交给外层重试
+                raise
+            except Exception as e:
+                logger.exception(f"[数据库] 嵌套调用 {func.__name__} 失败: {e}")
+                return None
+
         max_retries = 3
         for attempt in range(max_retries):
             try:
-                if sqlite_semaphore:
-                    async with sqlite_semaphore:
-                        async with async_maker() as session:
-                            data = await func(self, session, *args, **kwargs)
-                            await session.commit()
-                            return data
-                else:
-                    async with async_maker() as session:
-                        data = await func(self, session, *args, **kwargs)
-                        await session.commit()
-                        return data
+                async with _open_session() as session:
+                    return await func(self, session, *args, **kwargs)
             except OperationalError as e:
                 if "unable to open database file" in str(e):
                     logger.error("[数据库] 数据库无法打开，停止重试")
                     break
                 logger.warning(f"[数据库] 第 {attempt + 1} 次重试失败: {e}")
                 await asyncio.sleep(0.5 * (2**attempt))  # 指数退避
+            except IntegrityError as e:
+                # 违反约束的写入重试也不会成功
+                logger.warning(f"[数据库] {func.__name__} 违反约束, 不再重试: {e}")
+                break
             except Exception as e:
                 logger.exception(f"[数据库] 第 {attempt + 1} 次重试失败: {e}")
                 await asyncio.sleep(0.5 * (2**attempt))
@@ -306,9 +439,11 @@ class BaseIDModel(SQLModel):
     ):
         """
         MySQL需要预先定义约束条件！！
+
+        写入成功返回`True`, 失败时(由`with_session`记录错误)返回`None`
         """
         if not datas:
-            return
+            return True
 
         values_to_insert = [data.model_dump() for data in datas]
         if _db_type == "sqlite":
@@ -337,6 +472,7 @@ class BaseIDModel(SQLModel):
             raise ValueError(f"[GsCore] [数据库] 不支持 {_db_type} 数据库!")
 
         await session.execute(update_stmt, values_to_insert)
+        return True
 
     @classmethod
     @with_session
@@ -1361,6 +1497,7 @@ class User(BaseModel):
         """
         sql = update(cls).where(and_(cls.cookie == cookie, true())).values(status=mark)
         await session.execute(sql)
+        get_cookie_pool(cls.__name__).set_status(cookie, mark)
         return True
 
     @classmethod
@@ -1574,42 +1711,54 @@ class User(BaseModel):
 
             🔸`Optional[str]`: 如找到符合条件的cookie则返回，没有则为`None`
         """
+        gameid_name = cls.get_gameid_name(game_name)
         # 有绑定自己CK 并且该CK有效的前提下，优先使用自己CK
-        if await cls.user_exists(uid, game_name) and await cls.cookie_validate(uid, game_name):
-            return await cls.get_user_cookie_by_uid(uid, game_name)
+        result = await session.execute(select(cls.cookie, cls.status).where(getattr(cls, gameid_name) == uid))
+        row = result.first()
+        if row is not None and not row.status:
+            return row.cookie
 
-        # 自动刷新缓存
-        # await self.delete_error_cache()
+        pool = get_cookie_pool(cls.__name__)
         # 获得缓存库Ck
         if cache_model is not None:
-            cache_data = await cache_model.select_cache_cookie(uid, game_name)
+            cache_data = pool.get_assigned(cache_model.__name__, gameid_name, uid)
+            if cache_data is None:
+                cache_data = await cache_model.select_cache_cookie(uid, game_name)
             if cache_data is not None:
                 return cache_data
 
-        # 随机取CK
-        if condition:
-            for i in condition:
-                sql = select(cls).where(getattr(cls, i) == condition[i]).order_by(func.random())
-                data = await session.execute(sql)
-                user_list = data.scalars().all()
-                break
-            else:
-                user_list = await cls.get_all_user()
-        else:
-            user_list = await cls.get_all_user()
-
-        for user in user_list:
-            if not user.status and user.cookie:
-                if cache_model:
-                    # 进入缓存
-                    await cache_model.insert_cache_data(
-                        user.cookie,
-                        **{cls.get_gameid_name(game_name): uid},
-                    )
-                return user.cookie
-            continue
-        else:
-            return None
+        # 从Cookie池中轮转取CK, 与此前一样只使用condition中的第一个条件
+        column, value = next(iter(condition.items())) if condition else (None, None)
+        if pool.need_load(column):
+            async with pool.lock:
+                if pool.need_load(column):
+                    await cls._load_cookie_pool(session, pool, column)
+
+        cookie = pool.acquire(column, value)
+        if cookie is not None and cache_model is not None:
+            pool.assign(cache_model.__name__, gameid_name, uid, cookie)
+            # 进入缓存, 后台写入
+            pool.spawn(cache_model.insert_cache_data(cookie, **{gameid_name: uid}))
+        return cookie
+
+    @classmethod
+    async def _load_cookie_pool(
+        cls,
+        session: AsyncSession,
+        pool: CookiePool,
+        column: Optional[str] = None,
+    ):
+        """读取全部Cookie的状态与已建立索引的列, 不读取整行数据"""
+        columns = list(pool.columns)
+        if column is not None and column not in columns:
+            columns.append(column)
+        sql = select(
+            cls.cookie,
+            cls.status,
+            *(getattr(cls, name) for name in columns),
+        ).where(cls.cookie != null(), cls.cookie != "")
+        result = await session.execute(sql)
+        pool.load(result.all(), columns)
 
     @classmethod
     @with_session
@@ -1679,6 +1828,7 @@ class Cache(BaseIDModel):
         empty_sql = delete(cls)
         await session.execute(sql)
         await session.execute(empty_sql)
+        get_cookie_pool(user.__name__).reset_status("limit30")
         return True
 
     @classmethod
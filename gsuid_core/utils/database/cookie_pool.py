@@ -0,0 +1,264 @@
+import time
+import asyncio
+from typing import Dict, List, Tuple, Iterable, Optional, Sequence, Coroutine
+from datetime import date
+from collections import OrderedDict
+
+from gsuid_core.logger import logger
+from gsuid_core.utils.plugins_config.gs_config import database_config
+
+daily_budget: int = database_config.get_config("cookie_daily_budget").data
+refresh_interval: int = database_config.get_config("cookie_pool_refresh").data
+
+# (列名, 值), 例如 ('region', 'cn_gf01'); ('', '') 为不区分服务器的全部Cookie
+QueueKey = Tuple[str, str]
+ALL: QueueKey = ("", "")
+
+
+class CookieEntry:
+    __slots__ = ("cookie", "status", "keys", "used", "day", "last_used")
+
+    def __init__(self, cookie: str, status: Optional[str]):
+        self.cookie = cookie
+        self.status = status
+        self.keys: List[QueueKey] = [ALL]
+        # 当天已分配次数
+        self.used = 0
+        self.day = 0
+        self.last_used = 0.0
+
+
+class CookieQueue:
+    """
+    同一服务器下的健康Cookie, 按最近最少使用的顺序排列
+
+    当天分配次数用完的Cookie移入`parked`, 日期变化时再放回,
+    因此每次分配只需查看队首。
+    """
+
+    __slots__ = ("ready", "parked")
+
+    def __init__(self):
+        self.ready: "OrderedDict[str, None]" = OrderedDict()
+        self.parked: "OrderedDict[str, None]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.ready) + len(self.parked)
+
+    def discard(self, cookie: str):
+        self.ready.pop(cookie, None)
+        self.parked.pop(cookie, None)
+
+
+class CookiePool:
+    """
+    公共Cookie池
+
+    `User.get_random_cookie`在UID没有绑定Cookie时, 需从全部用户中挑选一个可用的Cookie。
+    此处在内存中保存全部Cookie的状态, 按服务器分组, 以轮转的方式分配并限制每个Cookie每天的分配次数,
+    `mark_invalid`等标记失效时同步更新, 其他写入路径由定时刷新兜底。
+    同时记录 UID -> Cookie 的分配结果, 缓存表的写入在后台进行。
+    """
+
+    def __init__(
+        self,
+        budget: int = daily_budget,
+        refresh: float = refresh_interval,
+        max_assigned: int = 100000,
+    ):
+        self.budget = budget
+        self.refresh = refresh
+        self.max_assigned = max_assigned
+
+        self._entries: Dict[str, CookieEntry] = {}
+        self._queues: Dict[QueueKey, CookieQueue] = {ALL: CookieQueue()}
+        self._assigned: "OrderedDict[Tuple[str, str, str], str]" = OrderedDict()
+        self._tasks: set = set()
+        self._day = 0
+
+        # 已建立索引的列, 刷新时一并读取
+        self.columns: Tuple[str, ...] = ()
+        self.expire_at = 0.0
+        self.lock = asyncio.Lock()
+
+        self.acquired = 0
+        self.over_budget = 0
+        self.empty = 0
+        self.assigned_hits = 0
+        self.reloads = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def need_load(self, column: Optional[str] = None) -> bool:
+        if self.expire_at <= time.time():
+            return True
+        return column is not None and column not in self.columns
+
+    def load(self, rows: Iterable[Sequence[Optional[str]]], columns: Sequence[str]):
+        """
+        以数据库中的数据重建Cookie池
+
+        `rows`中每行为 (cookie, status, *columns的值), 同一Cookie可能出现在多行中,
+        已有Cookie的当天分配次数会被保留。
+        """
+        entries: Dict[str, CookieEntry] = {}
+        for row in rows:
+            cookie, status = row[0], row[1]
+            if not cookie:
+                continue
+            entry = entries.get(cookie)
+            if entry is None:
+                entry = entries[cookie] = CookieEntry(cookie, status)
+                old = self._entries.get(cookie)
+                if old is not None:
+                    entry.used, entry.day, entry.last_used = old.used, old.day, old.last_used
+            elif status:
+                entry.status = status
+            for column, value in zip(columns, row[2:]):
+                if value and (column, value) not in entry.keys:
+                    entry.keys.append((column, value))
+
+        self._entries = entries
+        self._queues = {ALL: CookieQueue()}
+        # 从未使用过的排在前面, 其余按上次使用时间
+        for entry in sorted(entries.values(), key=lambda e: e.last_used):
+            if not entry.status:
+                self._enqueue(entry)
+
+        self.columns = tuple(columns)
+        self.expire_at = time.time() + self.refresh
+        self.reloads += 1
+        logger.debug(f"[Cookie池] 载入Cookie {len(entries)} 个, 可用 {len(self._queues[ALL])} 个")
+
+    def _enqueue(self, entry: CookieEntry):
+        for key in entry.keys:
+            queue = self._queues.get(key)
+            if queue is None:
+                queue = self._queues[key] = CookieQueue()
+            if self.budget > 0 and entry.day == self._day and entry.used >= self.budget:
+                queue.parked[entry.cookie] = None
+            else:
+                queue.ready[entry.cookie] = None
+
+    def _new_day(self, today: int):
+        self._day = today
+        for queue in self._queues.values():
+            queue.ready.update(queue.parked)
+            queue.parked.clear()
+
+    def acquire(self, column: Optional[str] = None, value: Optional[str] = None) -> Optional[str]:
+        """按轮转分配一个可用的Cookie, 不存在时为`None`"""
+        queue = self._queues.get((column, value) if column else ALL)  # type: ignore
+        if not queue:
+            self.empty += 1
+            return None
+
+        today = date.today().toordinal()
+        if today != self._day:
+            self._new_day(today)
+
+        while queue.ready:
+            cookie = next(iter(queue.ready))
+            entry = self._entries[cookie]
+            if entry.day != today:
+                entry.day = today
+                entry.used = 0
+            if self.budget <= 0 or entry.used < self.budget:
+                queue.ready.move_to_end(cookie)
+                break
+            # 当天额度已用完, 移出队列
+            del queue.ready[cookie]
+            queue.parked[cookie] = None
+        else:
+            # 全部用完时仍然轮转分配, 由接口返回的限制码标记
+            self.over_budget += 1
+            cookie = next(iter(queue.parked))
+            queue.parked.move_to_end(cookie)
+            entry = self._entries[cookie]
+
+        entry.used += 1
+        entry.last_used = time.time()
+        self.acquired += 1
+        return cookie
+
+    def set_status(self, cookie: str, status: Optional[str]):
+        """更新Cookie的状态, 有状态(例如`error`, `limit30`)的Cookie不再分配"""
+        entry = self._entries.get(cookie)
+        if entry is None:
+            return
+        entry.status = status
+        if status:
+            for key in entry.keys:
+                queue = self._queues.get(key)
+                if queue is not None:
+                    queue.discard(cookie)
+        else:
+            self._enqueue(entry)
+
+    def reset_status(self, status: str):
+        """将指定状态的Cookie恢复为可用, 并清空分配记录"""
+        for entry in self._entries.values():
+            if entry.status == status:
+                self.set_status(entry.cookie, None)
+        self._assigned.clear()
+
+    def is_healthy(self, cookie: str) -> bool:
+        entry = self._entries.get(cookie)
+        return entry is not None and not entry.status
+
+    def get_assigned(self, cache_name: str, column: str, uid: str) -> Optional[str]:
+        """此前分配给该UID且仍然可用的Cookie"""
+        key = (cache_name, column, uid)
+        cookie = self._assigned.get(key)
+        if cookie is None:
+            return None
+        if not self.is_healthy(cookie):
+            del self._assigned[key]
+            return None
+        self._assigned.move_to_end(key)
+        self.assigned_hits += 1
+        return cookie
+
+    def assign(self, cache_name: str, column: str, uid: str, cookie: str):
+        self._assigned[(cache_name, column, uid)] = cookie
+        while len(self._assigned) > self.max_assigned:
+            self._assigned.popitem(last=False)
+
+    def spawn(self, coro: Coroutine):
+        """在后台执行数据库写入, 保留任务引用直到完成"""
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._on_done)
+
+    def _on_done(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"[Cookie池] 后台写入失败: {task.exception()!r}")
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "cookies": len(self._entries),
+            "healthy": len(self._queues[ALL]),
+            "exhausted": len(self._queues[ALL].parked),
+            "regions": len(self._queues) - 1,
+            "budget": self.budget,
+            "acquired": self.acquired,
+            "over_budget": self.over_budget,
+            "empty": self.empty,
+            "assigned": len(self._assigned),
+            "assigned_hits": self.assigned_hits,
+            "reloads": self.reloads,
+            "pending_writes": len(self._tasks),
+        }
+
+
+# 表名 -> Cookie池, 每个继承`User`的表各自一个
+cookie_pools: Dict[str, CookiePool] = {}
+
+
+def get_cookie_pool(name: str) -> CookiePool:
+    pool = cookie_pools.get(name)
+    if pool is None:
+        pool = cookie_pools[name] = CookiePool()
+    return pool
@@ -1,11 +1,13 @@
 import enum
-from typing import Any, Dict, List, Optional, TypedDict
+from typing import Any, Dict, List, Tuple, Optional, Sequence, TypedDict, AsyncIterator
 from datetime import date as ymddate, datetime, timedelta
+from contextlib import nullcontext
 
 from sqlmodel import Field, Index, col, func, delete, select
-from sqlalchemy import UniqueConstraint, distinct
+from sqlalchemy import Column, LargeBinary, UniqueConstraint, distinct
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from . import base_models
 from .base_models import BaseIDModel, with_session
 
 
@@ -278,6 +280,38 @@ class CoreDataSummary(BaseIDModel, table=True):
         rows = r.all()
         return [{"bot_id": row[0], "bot_self_id": row[1]} for row in rows]
 
+    @classmethod
+    @with_session
+    async def get_range(
+        cls,
+        session: AsyncSession,
+        start: ymddate,
+        end: ymddate,
+        bot_id: Optional[str] = None,
+        bot_self_id: Optional[str] = None,
+    ) -> List[Tuple[ymddate, str, str, int, int, int, int, int, int]]:
+        """
+        获取[start, end]内的概要数据, 只查询列不构造模型对象
+        返回(日期, bot_id, bot_self_id, 接收, 发送, 指令, 图片, 用户数, 群组数)
+        """
+        result = select(
+            col(cls.date),
+            col(cls.bot_id),
+            col(cls.bot_self_id),
+            col(cls.receive),
+            col(cls.send),
+            col(cls.command),
+            col(cls.image),
+            col(cls.user_count),
+            col(cls.group_count),
+        ).where(cls.date >= start, cls.date <= end)
+        if bot_id:
+            result = result.where(cls.bot_id == bot_id)
+        if bot_self_id:
+            result = result.where(cls.bot_self_id == bot_self_id)
+        r = await session.execute(result)
+        return [tuple(row) for row in r.all()]  # type: ignore
+
 
 class CoreDataAnalysis(BaseIDModel, table=True):
     __table_args__ = (
@@ -415,6 +449,65 @@ class CoreDataAnalysis(BaseIDModel, table=True):
         r = await session.execute(result)
         return r.scalars().all()
 
+    @classmethod
+    async def stream_range(
+        cls,
+        start: ymddate,
+        end: ymddate,
+        bot_id: Optional[str] = None,
+        bot_self_id: Optional[str] = None,
+        batch_size: int = 20000,
+    ) -> AsyncIterator[Sequence[Tuple[ymddate, str, str, DataType, str, str, int]]]:
+        """
+        分批流式读取[start, end]内的明细, 只查询列不构造模型对象
+        每行为(日期, bot_id, bot_self_id, 数据类型, 用户/群组ID, 指令, 次数)
+
+        流式读取无法安全重试(已交给调用方的行会重复), 因此不经过`with_session`
+        """
+        result = select(
+            col(cls.date),
+            col(cls.bot_id),
+            col(cls.bot_self_id),
+            col(cls.data_type),
+            col(cls.target_id),
+            col(cls.command_name),
+            col(cls.command_count),
+        ).where(cls.date >= start, cls.date <= end)
+        if bot_id:
+            result = result.where(cls.bot_id == bot_id)
+        if bot_self_id:
+            result = result.where(cls.bot_self_id == bot_self_id)
+
+        async with base_models.sqlite_semaphore or nullcontext():
+            async with base_models.async_maker() as session:
+                # 直接在连接上执行, 跳过 ORM 的行加载流程
+                conn = await session.connection()
+                r = await conn.stream(result)
+                async for rows in r.partitions(batch_size):
+                    yield rows  # type: ignore
+
+    @classmethod
+    @with_session
+    async def get_day_targets(
+        cls,
+        session: AsyncSession,
+        date: ymddate,
+        bot_id: str,
+        bot_self_id: str,
+    ) -> List[Tuple[DataType, str]]:
+        """获取某个机器人某天出现过的全部(数据类型, 用户/群组ID)"""
+        result = (
+            select(col(cls.data_type), col(cls.target_id))
+            .where(
+                cls.date == date,
+                cls.bot_id == bot_id,
+                cls.bot_self_id == bot_self_id,
+            )
+            .distinct()
+        )
+        r = await session.execute(result)
+        return [(row[0], row[1]) for row in r.all()]
+
     @classmethod
     @with_session
     async def _get_stats_for_type(
@@ -544,28 +637,15 @@ class CoreDataAnalysis(BaseIDModel, table=True):
         bot_id: Optional[str] = None,
         bot_self_id: Optional[str] = None,
     ) -> CountVal:
+        from .active_rollup import active_rollup
+
         today = ymddate.today()
-        thirty_days_ago = today - timedelta(days=30)
-        seven_days_ago = today - timedelta(days=7)
-
-        user_stats = await cls._get_stats_for_type(
-            DataType.USER,
-            today,
-            thirty_days_ago,
-            seven_days_ago,
-            bot_id,
-            bot_self_id,
-        )
+
+        # 由每日活跃位图合并得到, 与 _get_stats_for_type 口径一致
+        user_stats = await active_rollup.get_stats(DataType.USER, today, bot_id, bot_self_id)
 
         # 计算群组相关指标
-        group_stats = await cls._get_stats_for_type(
-            DataType.GROUP,
-            today,
-            thirty_days_ago,
-            seven_days_ago,
-            bot_id,
-            bot_self_id,
-        )
+        group_stats = await active_rollup.get_stats(DataType.GROUP, today, bot_id, bot_self_id)
 
         # 格式化并返回最终结果
         result_data: CountVal = {
@@ -584,3 +664,131 @@ class CoreDataAnalysis(BaseIDModel, table=True):
         }
 
         return result_data
+
+
+class CoreTargetIndex(BaseIDModel, table=True):
+    """用户/群组ID在活跃位图中对应的位序号, 同一数据类型下全局唯一"""
+
+    __table_args__ = (
+        UniqueConstraint(
+            "data_type",
+            "target_id",
+            name="record_target_index",
+        ),
+        {"extend_existing": True},
+    )
+
+    data_type: DataType = Field(title="数据类型", default=DataType.USER, max_length=64)
+    target_id: str = Field(title="数据ID", max_length=64)
+    bit: int = Field(title="位序号")
+
+    @classmethod
+    @with_session
+    async def get_all_index(
+        cls,
+        session: AsyncSession,
+    ) -> List[Tuple[DataType, str, int]]:
+        result = select(col(cls.data_type), col(cls.target_id), col(cls.bit))
+        r = await session.execute(result)
+        return [(row[0], row[1], row[2]) for row in r.all()]
+
+    @classmethod
+    @with_session
+    async def insert_index(
+        cls,
+        session: AsyncSession,
+        datas: List["CoreTargetIndex"],
+    ) -> bool:
+        """写入新分配的位序号, 提交成功时返回`True`, 失败时为`None`"""
+        session.add_all(datas)
+        await session.flush()
+        return True
+
+
+class CoreActiveRollup(BaseIDModel, table=True):
+    """
+    每日活跃位图
+
+    每个(日期, 数据类型, 机器人)一行, 位图中第 bit 位为1表示对应的用户/群组当天活跃,
+    看板指标由最近30天的位图按位合并得到, 无需扫描 CoreDataAnalysis。
+    """
+
+    __table_args__ = (
+        UniqueConstraint(
+            "date",
+            "data_type",
+            "bot_id",
+            "bot_self_id",
+            name="record_active_rollup",
+        ),
+        {"extend_existing": True},
+    )
+
+    data_type: DataType = Field(title="数据类型", default=DataType.USER, max_length=64)
+    active_count: int = Field(title="活跃数量", default=0)
+    # MySQL 中 BLOB 最大 64KB(约52万个目标), 指定长度后使用 MEDIUMBLOB(16MB)
+    bitmap: bytes = Field(
+        title="活跃位图",
+        default=b"",
+        sa_column=Column(LargeBinary(length=2**24 - 1), nullable=False),
+    )
+    date: ymddate = Field(title="日期", index=True)
+    bot_id: str = Field(title="机器人平台", max_length=64)
+    bot_self_id: str = Field(title="机器人自身ID", max_length=64)
+
+    @classmethod
+    @with_session
+    async def delete_outdate(
+        cls,
+        session: AsyncSession,
+        days: int = 300,
+    ):
+        """
+        删除过期数据。
+        """
+        today = datetime.now().date()
+        days_ago = today - timedelta(days=days)
+        query = delete(cls).where(cls.date < days_ago)  # type: ignore
+        await session.execute(query)
+
+    @classmethod
+    @with_session
+    async def get_window(
+        cls,
+        session: AsyncSession,
+        data_type: DataType,
+        start: ymddate,
+        end: ymddate,
+        bot_id: Optional[str] = None,
+        bot_self_id: Optional[str] = None,
+    ) -> List[Tuple[ymddate, bytes]]:
+        """获取[start, end]之间的(日期, 位图)"""
+        result = select(col(cls.date), col(cls.bitmap)).where(
+            cls.data_type == data_type,
+            cls.date >= start,
+            cls.date <= end,
+        )
+        if bot_id:
+            result = result.where(cls.bot_id == bot_id)
+        if bot_self_id:
+            result = result.where(cls.bot_self_id == bot_self_id)
+        r = await session.execute(result)
+        return [(row[0], row[1]) for row in r.all()]
+
+    @classmethod
+    @with_session
+    async def get_missing_days(
+        cls,
+        session: AsyncSession,
+        start: ymddate,
+    ) -> List[Tuple[ymddate, str, str]]:
+        """已有统计数据、但还没有活跃位图的(日期, bot_id, bot_self_id)"""
+        summary_keys = select(
+            col(CoreDataSummary.date),
+            col(CoreDataSummary.bot_id),
+            col(CoreDataSummary.bot_self_id),
+        ).where(CoreDataSummary.date >= start)
+        rollup_keys = select(col(cls.date), col(cls.bot_id), col(cls.bot_self_id)).where(cls.date >= start)
+        summary_rows = {(row[0], row[1], row[2]) for row in (await session.execute(summary_keys)).all()}
+        rollup_rows = {(row[0], row[1], row[2]) for row in (await session.execute(rollup_keys)).all()}
+        return sorted(summary_rows - rollup_rows)
@@ -0,0 +1,107 @@
+import time
+from typing import Dict, Tuple, Optional
+from collections import OrderedDict
+from dataclasses import dataclass
+
+# 与 GsUser 列对应的设备信息字段, 这些列被修改时需要让缓存失效
+PROFILE_FIELDS = frozenset({"device_id", "fp", "device_info"})
+
+# (uid, uid列名), 列名由 GsUser.get_gameid_name 得到, 因此 None 与 'gs' 视为同一个键
+ProfileKey = Tuple[str, str]
+
+
+@dataclass
+class HeaderProfile:
+    """米游社请求头中与 UID 绑定的设备信息"""
+
+    # 经过 GsUID.get_main_uid 转换后的主 UID, 数据库中实际存放的 UID
+    main_uid: str
+    device_id: Optional[str]
+    fp: Optional[str]
+    # 由 device_info 预先拼接好的 User-Agent, 没有设备信息时为 None
+    user_agent: Optional[str]
+    expire_at: float = 0
+
+
+class HeaderProfileCache:
+    """
+    请求头设备信息缓存
+
+    以(uid, uid列名)为键缓存 device_id / fp / User-Agent,
+    未命中时由调用方通过一次查询整行填充。
+    `GsUser.update_data_by_uid_without_bot_id`修改上述列时按主 UID 失效,
+    其他写入路径由 TTL 兜底。
+    """
+
+    def __init__(self, max_size: int = 20000, ttl: float = 1800):
+        self.max_size = max_size
+        self.ttl = ttl
+
+        self._data: "OrderedDict[ProfileKey, HeaderProfile]" = OrderedDict()
+        # 主 UID -> 以该主 UID 缓存的全部键, 用于别名 UID 的失效
+        self._reverse: Dict[ProfileKey, set] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, uid: str, column: str) -> Optional[HeaderProfile]:
+        key = (uid, column)
+        profile = self._data.get(key)
+        if profile is None or profile.expire_at <= time.time():
+            if profile is not None:
+                self._remove(key)
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return profile
+
+    def set(self, uid: str, column: str, profile: HeaderProfile):
+        key = (uid, column)
+        if key in self._data:
+            self._remove(key)
+
+        profile.expire_at = time.time() + self.ttl
+        self._data[key] = profile
+        self._reverse.setdefault((profile.main_uid, column), set()).add(key)
+
+        while len(self._data) > self.max_size:
+            self._remove(next(iter(self._data)))
+
+    def invalidate(self, main_uid: str, column: str):
+        keys = self._reverse.pop((main_uid, column), None)
+        if not keys:
+            return
+        self.invalidations += 1
+        for key in keys:
+            self._data.pop(key, None)
+
+    def _remove(self, key: ProfileKey):
+        profile = self._data.pop(key)
+        rkey = (profile.main_uid, key[1])
+        keys = self._reverse.get(rkey)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._reverse[rkey]
+
+    def clear(self):
+        self._data.clear()
+        self._reverse.clear()
+
+    def get_stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+
+header_profile_cache = HeaderProfileCache()
@@ -1,4 +1,4 @@
-from typing import List, Type, Union, Optional, Sequence
+from typing import Dict, List, Type, Tuple, Union, Iterable, Optional, Sequence
 
 from sqlmodel import Field, Index, col, select, update
 from sqlalchemy import Row, UniqueConstraint, or_, delete
@@ -20,6 +20,7 @@ from .base_models import (
     BaseBotIDModel,
     with_session,
 )
+from .header_profile import PROFILE_FIELDS, header_profile_cache
 
 
 class Subscribe(BaseModel, table=True):
@@ -291,6 +292,68 @@ class CoreUser(BaseBotIDModel, table=True):
 
         return 1
 
+    @classmethod
+    @with_session
+    async def batch_insert_user(
+        cls,
+        session: AsyncSession,
+        users: Dict[Tuple[str, str, Optional[str]], Tuple[str, str]],
+    ) -> List[Tuple[str, str, Optional[str]]]:
+        """批量写入用户, `users`为`{(bot_id, user_id, group_id): (user_name, user_icon)}`
+
+        已存在的(bot_id, user_id, group_id)只在用户名/头像变化时更新, 与`insert_user`行为一致
+
+        唯一约束(user_id, group_id, user_name)不含`bot_id`, 会与其他机器人下的同名用户冲突,
+        这些用户不写入, 以免整批失败; 返回被跳过的键
+        """
+        if not users:
+            return []
+
+        stmt = select(cls).where(col(cls.user_id).in_({key[1] for key in users}))
+        result = await session.execute(stmt)
+
+        exist: Dict[Tuple[str, str, Optional[str]], List["CoreUser"]] = {}
+        # 唯一约束的键, group_id 为空时不会冲突
+        taken: Dict[Tuple[str, str, Optional[str]], "CoreUser"] = {}
+        for row in result.scalars().all():
+            exist.setdefault((row.bot_id, row.user_id, row.group_id), []).append(row)
+            if row.group_id is not None:
+                taken[(row.user_id, row.group_id, row.user_name)] = row
+
+        conflicts: List[Tuple[str, str, Optional[str]]] = []
+        for key, (user_name, user_icon) in users.items():
+            bot_id, user_id, group_id = key
+            unique_key = (user_id, group_id, user_name)
+            rows = exist.get(key)
+            if not rows:
+                if group_id is not None and unique_key in taken:
+                    conflicts.append(key)
+                    continue
+                data = cls(
+                    bot_id=bot_id,
+                    user_id=user_id,
+                    group_id=group_id,
+                    user_name=user_name,
+                    user_icon=user_icon,
+                )
+                session.add(data)
+                if group_id is not None:
+                    taken[unique_key] = data
+                continue
+
+            for row in rows:
+                if row.user_name == user_name and row.user_icon == user_icon:
+                    continue
+                if row.user_name != user_name and group_id is not None:
+                    if unique_key in taken:
+                        conflicts.append(key)
+                        break
+                    taken.pop((user_id, group_id, row.user_name), None)
+                    taken[unique_key] = row
+                row.user_name = user_name
+                row.user_icon = user_icon
+        return conflicts
+
 
 class CoreGroup(BaseBotIDModel, table=True):
     __table_args__ = (
@@ -378,6 +441,26 @@ class CoreGroup(BaseBotIDModel, table=True):
             )
         return 1
 
+    @classmethod
+    @with_session
+    async def batch_insert_group(
+        cls,
+        session: AsyncSession,
+        groups: Iterable[Tuple[str, str]],
+    ) -> bool:
+        """批量写入群组, `groups`为`(bot_id, group_id)`, 已存在的群组会被跳过"""
+        groups = set(groups)
+        if not groups:
+            return True
+
+        stmt = select(cls.bot_id, cls.group_id).where(col(cls.group_id).in_({group[1] for group in groups}))
+        result = await session.execute(stmt)
+        exist = {(row.bot_id, row.group_id) for row in result.all()}
+
+        for bot_id, group_id in groups - exist:
+            session.add(cls(bot_id=bot_id, group_id=group_id))
+        return True
+
 
 class GsBind(Bind, table=True):
     __table_args__ = {"extend_existing": True}
@@ -456,6 +539,19 @@ class GsUser(User, table=True):
         schema_extra={"json_schema_extra": {"hint": "mys设备登陆"}},
     )
 
+    @classmethod
+    async def update_data_by_uid_without_bot_id(
+        cls,
+        uid: str,
+        game_name: Optional[str] = None,
+        **data,
+    ) -> int:
+        retcode = await super().update_data_by_uid_without_bot_id(uid, game_name, **data)
+        # 设备信息变化后, 米游社请求头缓存需要重新读取
+        if PROFILE_FIELDS.intersection(data):
+            header_profile_cache.invalidate(uid, cls.get_gameid_name(game_name))
+        return retcode
+
 
 class GsCache(Cache, table=True):
     __table_args__ = {"extend_existing": True}
@@ -0,0 +1,212 @@
+import time
+import asyncio
+from typing import Dict, List, Tuple, Optional
+from collections import OrderedDict
+
+from gsuid_core.logger import logger
+from gsuid_core.server import on_core_shutdown
+from gsuid_core.utils.plugins_config.gs_config import database_config
+
+from .models import CoreUser, CoreGroup
+
+UserKey = Tuple[str, str, Optional[str]]
+GroupKey = Tuple[str, str]
+
+cache_size: int = database_config.get_config("user_cache_size").data
+flush_interval: int = database_config.get_config("user_flush_interval").data
+flush_rows: int = database_config.get_config("user_flush_rows").data
+
+
+class UserRegistry:
+    """
+    用户/群组注册表
+
+    在内存中记录已知的(bot_id, user_id, group_id) -> (用户名, 头像), 以及(bot_id, group_id),
+    只有首次出现或信息变化的用户/群组才会进入待写入队列。
+    队列中的数据会被合并, 每隔`user_flush_interval`毫秒或积累`user_flush_rows`条时批量写入数据库,
+    避免每条消息都占用一次数据库会话。
+    """
+
+    def __init__(
+        self,
+        max_size: int = cache_size,
+        interval: float = flush_interval / 1000,
+        batch_size: int = flush_rows,
+    ):
+        self.max_size = max(max_size, 1)
+        self.interval = max(interval, 0.01)
+        self.batch_size = max(batch_size, 1)
+
+        self._users: "OrderedDict[UserKey, Tuple[str, str]]" = OrderedDict()
+        self._groups: "OrderedDict[GroupKey, None]" = OrderedDict()
+        self._pending_users: Dict[UserKey, Tuple[str, str]] = {}
+        self._pending_groups: Dict[GroupKey, None] = {}
+
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._lock = asyncio.Lock()
+
+        self.total = 0
+        self.hits = 0
+        self.flush_count = 0
+        self.flushed_rows = 0
+        self.flush_fails = 0
+        self.conflicts = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self.total_flush_ms = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._pending_users) + len(self._pending_groups)
+
+    def add_user(
+        self,
+        bot_id: str,
+        user_id: str,
+        group_id: Optional[str],
+        user_name: Optional[str],
+        user_icon: Optional[str],
+    ):
+        # 与 CoreUser.insert_user 保持一致, 缺省值为"1"
+        key = (bot_id, user_id, group_id)
+        value = (
+            user_name if user_name is not None else "1",
+            user_icon if user_icon is not None else "1",
+        )
+
+        self.total += 1
+        if self._users.get(key) == value:
+            self.hits += 1
+            self._users.move_to_end(key)
+            return
+
+        self._users[key] = value
+        self._users.move_to_end(key)
+        if len(self._users) > self.max_size:
+            self._users.popitem(last=False)
+
+        self._pending_users[key] = value
+        self._notify()
+
+    def add_group(self, bot_id: str, group_id: str):
+        key = (bot_id, group_id)
+
+        self.total += 1
+        if key in self._groups:
+            self.hits += 1
+            self._groups.move_to_end(key)
+            return
+
+        self._groups[key] = None
+        if len(self._groups) > self.max_size:
+            self._groups.popitem(last=False)
+
+        self._pending_groups[key] = None
+        self._notify()
+
+    def _notify(self):
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+        if self._wakeup and self.queue_depth >= self.batch_size:
+            self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            if self._wakeup is None:
+                return
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.exception(f"[用户注册表] 批量写入失败: {e}")
+
+    async def flush(self):
+        """立即将待写入的用户/群组全部写入数据库"""
+        async with self._lock:
+            if not self._pending_users and not self._pending_groups:
+                return
+
+            users, self._pending_users = self._pending_users, {}
+            groups, self._pending_groups = self._pending_groups, {}
+
+            start = time.perf_counter()
+            user_items = list(users.items())
+            for i in range(0, len(user_items), self.batch_size):
+                await self._flush_users(dict(user_items[i : i + self.batch_size]))
+
+            group_keys = list(groups)
+            for i in range(0, len(group_keys), self.batch_size):
+                await self._flush_groups(group_keys[i : i + self.batch_size])
+
+            cost = (time.perf_counter() - start) * 1000
+            self.flush_count += 1
+            self.flushed_rows += len(users) + len(groups)
+            self.last_flush_ms = cost
+            self.max_flush_ms = max(self.max_flush_ms, cost)
+            self.total_flush_ms += cost
+            logger.trace(f"[用户注册表] 写入用户{len(users)}条, 群组{len(groups)}条, 耗时{cost:.2f}ms")
+
+    async def _flush_users(self, users: Dict[UserKey, Tuple[str, str]]):
+        conflicts = await CoreUser.batch_insert_user(users)
+        if conflicts is not None:
+            if conflicts:
+                # 与其他机器人下的同名用户冲突, 仍留在缓存中, 信息不变时不再重复写入
+                self.conflicts += len(conflicts)
+                logger.debug(f"[用户注册表] {len(conflicts)} 个用户与已有记录冲突, 已跳过: {conflicts[:5]}")
+            return
+
+        # 整批失败时(例如并发写入触发唯一约束)逐条写入, 避免一条数据拖垮整批
+        self.flush_fails += 1
+        for (bot_id, user_id, group_id), (user_name, user_icon) in users.items():
+            if not await CoreUser.insert_user(bot_id, user_id, group_id, user_name, user_icon):
+                # 写入失败则移出缓存, 下次收到消息时重试
+                self._users.pop((bot_id, user_id, group_id), None)
+
+    async def _flush_groups(self, groups: List[GroupKey]):
+        if await CoreGroup.batch_insert_group(groups):
+            return
+
+        self.flush_fails += 1
+        for bot_id, group_id in groups:
+            if not await CoreGroup.insert_group(bot_id, group_id):
+                self._groups.pop((bot_id, group_id), None)
+
+    async def close(self):
+        # 等待进行中的写入完成后再停止后台任务, 剩余数据由最后一次 flush 写入
+        async with self._lock:
+            if self._task is not None:
+                self._task.cancel()
+                self._task = None
+        await self.flush()
+
+    def get_stats(self) -> Dict[str, float]:
+        return {
+            "queue_depth": self.queue_depth,
+            "known_users": len(self._users),
+            "known_groups": len(self._groups),
+            "total": self.total,
+            "dedup_hits": self.hits,
+            "dedup_hit_rate": round(self.hits / self.total, 4) if self.total else 0.0,
+            "flush_count": self.flush_count,
+            "flushed_rows": self.flushed_rows,
+            "flush_fails": self.flush_fails,
+            "conflicts": self.conflicts,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+            "max_flush_ms": round(self.max_flush_ms, 2),
+            "avg_flush_ms": (round(self.total_flush_ms / self.flush_count, 2) if self.flush_count else 0.0),
+        }
+
+
+user_registry = UserRegistry()
+
+
+@on_core_shutdown
+async def flush_user_registry():
+    await user_registry.close()
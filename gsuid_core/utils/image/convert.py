@@ -1,5 +1,4 @@
 import math
-from io import BytesIO
 from base64 import b64encode
 from typing import Union, overload
 from pathlib import Path
@@ -9,10 +8,8 @@ from PIL import Image, ImageDraw, ImageFont
 from gsuid_core.pool import to_thread
 from gsuid_core.logger import logger
 from gsuid_core.utils.fonts.fonts import core_font
+from gsuid_core.utils.image.encoder import ImageBytes as ImageBytes, encode_image, image_encoder
 from gsuid_core.utils.image.image_tools import draw_center_text_by_line
-from gsuid_core.utils.plugins_config.gs_config import pic_gen_config
-
-pic_quality: int = pic_gen_config.get_config("PicQuality").data
 
 
 @overload
@@ -56,6 +53,12 @@ async def convert_img(
     :返回:
       * res: bytes对象或base64编码图片。
     """
+    if isinstance(img, Image.Image) and img.format != "GIF":
+        logger.info("🚀 [GsCore] 处理图片中....")
+        res = await image_encoder.encode(img)
+        if is_base64:
+            return "base64://" + b64encode(res).decode()
+        return res
     return await _convert_img_sync(img, is_base64)
 
 
@@ -67,21 +70,9 @@ def _convert_img_sync(
     logger.info("🚀 [GsCore] 处理图片中....")
 
     if isinstance(img, Image.Image):
-        if img.format == "GIF":
-            result_buffer = BytesIO()
-            img.save(result_buffer, format="GIF")
-        else:
-            img = img.convert("RGB")
-            result_buffer = BytesIO()
-            img.save(
-                result_buffer,
-                format="JPEG",
-                quality=pic_quality,
-            )
-
-        res = result_buffer.getvalue()
+        res = encode_image(img)
         if is_base64:
-            res = "base64://" + b64encode(res).decode()
+            return "base64://" + b64encode(res).decode()
         return res
     elif isinstance(img, bytes):
         pass
@@ -101,21 +92,9 @@ def convert_img_sync(
     logger.info("🚀 [GsCore] 处理图片中....")
 
     if isinstance(img, Image.Image):
-        if img.format == "GIF":
-            result_buffer = BytesIO()
-            img.save(result_buffer, format="GIF")
-        else:
-            img = img.convert("RGB")
-            result_buffer = BytesIO()
-            img.save(
-                result_buffer,
-                format="JPEG",
-                quality=pic_quality,
-            )
-
-        res = result_buffer.getvalue()
+        res = encode_image(img)
         if is_base64:
-            res = "base64://" + b64encode(res).decode()
+            return "base64://" + b64encode(res).decode()
         return res
     elif isinstance(img, bytes):
         pass
@@ -0,0 +1,110 @@
+"""
+图片编码的实际执行部分, 在线程中或进程池的子进程中运行
+
+子进程只导入本模块, 不依赖配置等其他模块; 像素数据经共享内存传入, 编码结果以 bytes 返回。
+"""
+
+import sys
+from io import BytesIO
+from typing import Tuple, Union, Optional
+from functools import lru_cache
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+
+from PIL import Image
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+
+@lru_cache(maxsize=None)
+def _turbojpeg():
+    try:
+        from turbojpeg import TurboJPEG
+
+        return TurboJPEG()
+    except Exception:
+        return None
+
+
+def available_encoders() -> Tuple[str, ...]:
+    encoders = ["pil"]
+    if _turbojpeg() is not None:
+        encoders.append("turbojpeg")
+    return tuple(encoders)
+
+
+def is_pillow_simd() -> bool:
+    # pillow-simd 是 Pillow 的直接替换, 版本号带有 .postN 后缀
+    import PIL
+
+    return ".post" in PIL.__version__
+
+
+def encode_pil(img: Image.Image, format: str, quality: int) -> bytes:
+    if format != "PNG" and img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+    buffer = BytesIO()
+    if format == "PNG":
+        img.save(buffer, format="PNG")
+    else:
+        img.save(buffer, format=format, quality=quality)
+    return buffer.getvalue()
+
+
+def encode_raw(
+    pixels: Buffer,
+    mode: str,
+    size: Tuple[int, int],
+    format: str,
+    quality: int,
+    encoder: str = "pil",
+) -> bytes:
+    """按原始像素数据编码"""
+    if encoder == "turbojpeg" and format == "JPEG" and mode == "RGB":
+        jpeg = _turbojpeg()
+        if jpeg is not None:
+            import numpy as np
+            from turbojpeg import TJPF_RGB
+
+            array = np.frombuffer(pixels, dtype=np.uint8).reshape(size[1], size[0], 3)
+            return jpeg.encode(array, quality=quality, pixel_format=TJPF_RGB)
+
+    img = Image.frombuffer(mode, size, pixels, "raw", mode, 0, 1)
+    try:
+        return encode_pil(img, format, quality)
+    finally:
+        # 释放对共享内存的引用, 否则无法关闭
+        img.close()
+        del img
+
+
+def _attach(name: str) -> SharedMemory:
+    # 共享内存由主进程创建和释放, 子进程附加时不应登记到 resource_tracker, 否则会被重复清理
+    if sys.version_info >= (3, 13):
+        return SharedMemory(name, track=False)  # type: ignore
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args, **kwargs: None
+    try:
+        return SharedMemory(name)
+    finally:
+        resource_tracker.register = register
+
+
+def encode_shared(
+    name: str,
+    length: int,
+    mode: str,
+    size: Tuple[int, int],
+    format: str,
+    quality: int,
+    encoder: str = "pil",
+) -> bytes:
+    """在子进程中从共享内存读取像素并编码"""
+    shm = _attach(name)
+    pixels: Optional[memoryview] = shm.buf[:length]
+    try:
+        return encode_raw(pixels, mode, size, format, quality, encoder)  # type: ignore
+    finally:
+        pixels.release()  # type: ignore
+        pixels = None
+        shm.close()
@@ -0,0 +1,196 @@
+"""
+图片编码服务
+
+渲染好的大尺寸卡片编码为 JPEG/PNG 时, Pillow 编码会长时间占用 GIL, 即使放在线程池中也会拖慢事件循环。
+- thread(默认): 在线程池中编码, 小图也总是走这条路径, 进程间传递的开销高于编码本身
+- process: 像素数据在线程中写入共享内存, 交给进程池中的子进程编码; 只有一个 CPU 核心时自动改用 thread
+- 安装了 PyTurboJPEG 时 JPEG 可使用 libjpeg-turbo 编码; pillow-simd 作为 Pillow 的替换无需额外处理
+- 格式与质量默认取`PicQuality`的 JPEG, 可按平台在`PicPlatformFormat`中单独指定
+"""
+
+import os
+from io import BytesIO
+from typing import Dict, List, Tuple, Union, Optional
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing.shared_memory import SharedMemory
+
+from PIL import Image
+
+from gsuid_core.pool import to_thread, run_in_process
+from gsuid_core.logger import logger
+from gsuid_core.utils.image import encode_worker
+from gsuid_core.utils.plugins_config.gs_config import pic_gen_config
+
+pic_quality: int = pic_gen_config.get_config("PicQuality").data
+encode_backend: str = pic_gen_config.get_config("PicEncodeBackend").data
+pic_encoder: str = pic_gen_config.get_config("PicEncoder").data
+platform_format: List[str] = pic_gen_config.get_config("PicPlatformFormat").data
+
+# 像素数小于该值的图片在线程中编码
+PROCESS_MIN_PIXELS = 500_000
+FORMATS = ("JPEG", "PNG", "WEBP")
+# 写入共享内存时每次拷贝的字节数
+_COPY_CHUNK = 1 << 20
+
+
+class ImageBytes(bytes):
+    """
+    已编码的图片数据, 额外记录编码时的宽高与格式
+
+    仍是`bytes`, 可直接当作图片字节使用; 发送链路以链接方式发送时,
+    直接读取`size`而无需再次`Image.open`解析图片。
+    """
+
+    size: Tuple[int, int]
+    format: str
+
+    def __new__(cls, data: Union[bytes, memoryview], size: Tuple[int, int], format: str):
+        obj = super().__new__(cls, data)
+        obj.size = size
+        obj.format = format
+        return obj
+
+    def __reduce__(self):
+        return (ImageBytes, (bytes(self), self.size, self.format))
+
+
+def encode_image(img: Image.Image, format: Optional[str] = None, **params) -> ImageBytes:
+    """将图片编码为 JPEG(GIF 保持 GIF), 或按指定格式编码"""
+    if format is None:
+        if img.format == "GIF":
+            format = "GIF"
+        else:
+            format = "JPEG"
+            params.setdefault("quality", pic_quality)
+    if format != "GIF":
+        img = img.convert("RGB")
+    result_buffer = BytesIO()
+    img.save(result_buffer, format=format, **params)
+    # 直接从缓冲区构造, 只拷贝一次
+    with result_buffer.getbuffer() as buffer:
+        return ImageBytes(buffer, img.size, format)
+
+
+def parse_platform_format(items: List[str]) -> Dict[str, Tuple[str, int]]:
+    """解析 平台:格式:质量 的配置, 质量可省略"""
+    result: Dict[str, Tuple[str, int]] = {}
+    for item in items:
+        parts = [part.strip() for part in item.split(":")]
+        if len(parts) < 2 or parts[1].upper() not in FORMATS:
+            logger.warning(f"[图片编码] 无法解析平台格式配置: {item}")
+            continue
+        quality = int(parts[2]) if len(parts) > 2 and parts[2].isdigit() else pic_quality
+        result[parts[0]] = (parts[1].upper(), min(quality, 100))
+    return result
+
+
+@to_thread
+def _encode_in_thread(img: Image.Image, format: str, quality: int, encoder: str) -> bytes:
+    if encoder == "turbojpeg" and format == "JPEG":
+        rgb = img.convert("RGB")
+        return encode_worker.encode_raw(rgb.tobytes(), "RGB", rgb.size, format, quality, encoder)
+    return encode_worker.encode_pil(img, format, quality)
+
+
+@to_thread
+def _share_pixels(img: Image.Image, format: str) -> Tuple[SharedMemory, int, str]:
+    """把像素数据写入新建的共享内存, 在线程中执行, 分块拷贝以便事件循环穿插运行"""
+    if img.mode not in ("RGB", "L") and not (format == "PNG" and img.mode == "RGBA"):
+        img = img.convert("RGB")
+    pixels = memoryview(img.tobytes())
+    length = len(pixels)
+    shm = SharedMemory(create=True, size=length)
+    try:
+        # 对 memoryview 切片不会再拷贝一次
+        for start in range(0, length, _COPY_CHUNK):
+            shm.buf[start : start + _COPY_CHUNK] = pixels[start : start + _COPY_CHUNK]
+    except BaseException:
+        shm.close()
+        shm.unlink()
+        raise
+    return shm, length, img.mode
+
+
+class ImageEncoder:
+    def __init__(
+        self,
+        backend: str,
+        encoder: str,
+        quality: int,
+        platforms: Dict[str, Tuple[str, int]],
+        min_pixels: int = PROCESS_MIN_PIXELS,
+    ):
+        self.backend = backend
+        self.quality = quality
+        self.platforms = platforms
+        self.min_pixels = min_pixels
+
+        available = encode_worker.available_encoders()
+        if encoder == "auto":
+            encoder = "turbojpeg" if "turbojpeg" in available else "pil"
+        elif encoder not in available:
+            logger.warning(f"[图片编码] 编码器 {encoder} 不可用, 使用 Pillow")
+            encoder = "pil"
+        self.encoder = encoder
+
+        self.thread = 0
+        self.process = 0
+
+    def get_params(self, bot_id: Optional[str] = None) -> Tuple[str, int]:
+        """某个平台的图片格式与质量"""
+        if bot_id is not None and bot_id in self.platforms:
+            return self.platforms[bot_id]
+        return "JPEG", self.quality
+
+    async def encode(self, img: Image.Image, bot_id: Optional[str] = None) -> ImageBytes:
+        if img.format == "GIF":
+            self.thread += 1
+            return await to_thread(encode_image)(img)
+
+        format, quality = self.get_params(bot_id)
+        if self.backend == "process" and img.width * img.height >= self.min_pixels:
+            try:
+                data = await self._encode_in_process(img, format, quality)
+                self.process += 1
+                return ImageBytes(data, img.size, format)
+            except (BrokenProcessPool, OSError) as e:
+                # 进程池不可用(例如子进程被杀死)后不再尝试
+                logger.warning(f"[图片编码] 进程池编码失败, 改为在线程中编码: {e!r}")
+                self.backend = "thread"
+
+        self.thread += 1
+        data = await _encode_in_thread(img, format, quality, self.encoder)
+        return ImageBytes(data, img.size, format)
+
+    async def _encode_in_process(self, img: Image.Image, format: str, quality: int) -> bytes:
+        shm, length, mode = await _share_pixels(img, format)
+        try:
+            return await run_in_process(
+                encode_worker.encode_shared,
+                shm.name,
+                length,
+                mode,
+                img.size,
+                format,
+                quality,
+                self.encoder,
+            )
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def get_stats(self) -> Dict[str, Union[str, int, bool]]:
+        return {
+            "backend": self.backend,
+            "encoder": self.encoder,
+            "pillow_simd": encode_worker.is_pillow_simd(),
+            "process": self.process,
+            "thread": self.thread,
+        }
+
+
+# 单核机器上子进程与主进程争抢同一个核心, 多进程编码只会增加拷贝开销
+if encode_backend == "process" and (os.cpu_count() or 1) < 2:
+    encode_backend = "thread"
+
+image_encoder = ImageEncoder(encode_backend, pic_encoder, pic_quality, parse_platform_format(platform_format))
@@ -0,0 +1,133 @@
+import time
+from typing import Dict, Union, Optional
+from collections import OrderedDict
+
+from gsuid_core.logger import logger
+from gsuid_core.utils.single_flight import SingleFlight
+from gsuid_core.utils.plugins_config.gs_config import sp_config
+
+link_cache_ttl: int = sp_config.get_config("LinkImageCacheTTL").data
+link_cache_mb: int = sp_config.get_config("LinkImageCacheMB").data
+
+
+class UrlCacheEntry:
+    __slots__ = ("data", "etag", "last_modified", "expire_at")
+
+    def __init__(
+        self,
+        data: bytes,
+        etag: Optional[str],
+        last_modified: Optional[str],
+        expire_at: float,
+    ):
+        self.data = data
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expire_at = expire_at
+
+
+class UrlImageCache:
+    """
+    发送`link://`图片时, 以 base64 发送的平台需先下载图片, 此处缓存下载结果
+
+    - 以原始字节缓存, 按总字节数限制体积, 超出后按最近最少使用淘汰
+    - 超过 TTL 的条目不直接丢弃, 而是带上 ETag / Last-Modified 重新验证, 未变化(304)时续期
+    - 同一 URL 的并发请求共享一次下载
+    """
+
+    def __init__(self, ttl: float, max_bytes: int):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.size = 0
+
+        self._data: "OrderedDict[str, UrlCacheEntry]" = OrderedDict()
+        self.flight = SingleFlight()
+
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    async def get(self, url: str) -> bytes:
+        entry = self._data.get(url)
+        if entry is not None and entry.expire_at > time.time():
+            self._data.move_to_end(url)
+            self.hits += 1
+            return entry.data
+
+        return await self.flight.do(url, lambda: self._fetch(url, entry))
+
+    async def _fetch(self, url: str, entry: Optional[UrlCacheEntry]) -> bytes:
+        # http_client 依赖 server, 在模块顶层导入会与 segment 循环引用
+        from gsuid_core.utils.api.http_client import get_session
+
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+
+        logger.info(f"[Sget] 开始下载内容: {url}")
+        try:
+            async with get_session().get(url, headers=headers) as resp:
+                if resp.status == 304 and entry is not None:
+                    self.revalidated += 1
+                    entry.expire_at = time.time() + self.ttl
+                    if url in self._data:
+                        self._data.move_to_end(url)
+                    return entry.data
+                data = await resp.read()
+                etag = resp.headers.get("ETag")
+                last_modified = resp.headers.get("Last-Modified")
+                ok = resp.status < 400
+        except Exception as e:
+            if entry is None:
+                raise
+            # 重新验证失败时沿用旧数据, 下次发送时再尝试
+            logger.warning(f"[Sget] 重新验证 {url} 失败, 使用缓存: {e}")
+            return entry.data
+
+        self.misses += 1
+        if ok:
+            self._set(url, UrlCacheEntry(data, etag, last_modified, time.time() + self.ttl))
+        return data
+
+    def _set(self, url: str, entry: UrlCacheEntry):
+        old = self._data.pop(url, None)
+        if old is not None:
+            self.size -= len(old.data)
+        # 单个图片超过总体积上限时不缓存
+        if len(entry.data) > self.max_bytes:
+            return
+        self._data[url] = entry
+        self.size += len(entry.data)
+        while self.size > self.max_bytes:
+            _, evicted = self._data.popitem(last=False)
+            self.size -= len(evicted.data)
+            self.evictions += 1
+
+    def clear(self):
+        self._data.clear()
+        self.size = 0
+
+    def get_stats(self) -> Dict[str, Union[int, float]]:
+        total = self.hits + self.misses + self.revalidated
+        return {
+            "entries": len(self._data),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidated": self.revalidated,
+            "hit_rate": round((self.hits + self.revalidated) / total, 4) if total else 0.0,
+            "coalesced": self.flight.coalesced,
+            "evictions": self.evictions,
+            "inflight": len(self.flight),
+        }
+
+
+url_image_cache = UrlImageCache(link_cache_ttl, link_cache_mb * 1024 * 1024)
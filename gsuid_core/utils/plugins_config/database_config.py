@@ -68,4 +68,34 @@ DATABASE_CONIFG: Dict[str, GSC] = {
         1500,
         options=[1500, 3600, 7200, 14400, 28800],
     ),
+    "user_cache_size": GsIntConfig(
+        "用户/群组注册表缓存上限",
+        "内存中记录的已知用户/群组数量上限, 超出后按最近最少使用淘汰",
+        50000,
+        options=[10000, 50000, 100000, 200000],
+    ),
+    "user_flush_interval": GsIntConfig(
+        "用户/群组写入间隔(毫秒)",
+        "新用户/群组在内存中合并后, 每隔该时间批量写入数据库",
+        1000,
+        options=[200, 500, 1000, 3000, 5000],
+    ),
+    "user_flush_rows": GsIntConfig(
+        "用户/群组单批写入条数",
+        "待写入条数达到该值时立即触发一次批量写入",
+        200,
+        options=[50, 100, 200, 500],
+    ),
+    "cookie_daily_budget": GsIntConfig(
+        "公共Cookie每日分配次数",
+        "每个公共Cookie每天最多分配给多少个未绑定Cookie的UID, 全部用完后仍按轮转分配, 0为不限制",
+        25,
+        options=[0, 10, 25, 30, 50],
+    ),
+    "cookie_pool_refresh": GsIntConfig(
+        "公共Cookie池刷新间隔(秒)",
+        "内存中的公共Cookie池每隔该时间从数据库重新读取一次, 以发现新绑定的Cookie",
+        300,
+        options=[60, 300, 600, 1800],
+    ),
 }
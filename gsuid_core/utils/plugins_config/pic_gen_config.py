@@ -1,6 +1,6 @@
 from typing import Dict
 
-from .models import GSC, GsIntConfig
+from .models import GSC, GsIntConfig, GsStrConfig, GsListStrConfig
 
 PIC_GEN_CONIFG: Dict[str, GSC] = {
     "PicQuality": GsIntConfig(
@@ -9,4 +9,21 @@ PIC_GEN_CONIFG: Dict[str, GSC] = {
         85,
         100,
     ),
+    "PicEncodeBackend": GsStrConfig(
+        "图片编码执行方式",
+        "thread: 在线程池中编码; process: 大图在进程池中编码, 不占用主进程的GIL(需多核, 尚在验证中)",
+        "thread",
+        ["process", "thread"],
+    ),
+    "PicEncoder": GsStrConfig(
+        "JPEG编码器",
+        "auto: 安装了PyTurboJPEG时使用turbojpeg, 否则使用Pillow(可安装pillow-simd加速)",
+        "auto",
+        ["auto", "pil", "turbojpeg"],
+    ),
+    "PicPlatformFormat": GsListStrConfig(
+        "各平台图片格式",
+        "直接发送图片对象时按平台选择编码格式与质量, 格式为 平台:格式:质量, 例如 qqgroup:JPEG:75, telegram:PNG",
+        [],
+    ),
 }
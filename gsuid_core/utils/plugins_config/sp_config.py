@@ -55,4 +55,222 @@ SP_CONIFG: Dict[str, GSC] = {
             "全部拆成单独消息",
         ],
     ),
+    "CacheMaxEntries": GsIntConfig(
+        "函数结果缓存最大条数",
+        "gs_cache缓存的最大条目数, 超出后按最近最少使用淘汰",
+        2000,
+        100000,
+        [500, 1000, 2000, 5000, 10000],
+    ),
+    "CacheMaxMB": GsIntConfig(
+        "函数结果缓存最大体积(MB)",
+        "gs_cache缓存(含磁盘图片)的最大体积, 超出后按最近最少使用淘汰并删除文件",
+        256,
+        10240,
+        [64, 128, 256, 512, 1024],
+    ),
+    "ResourceTTL": GsIntConfig(
+        "事件资源保留时间(秒)",
+        "消息中的图片等资源注册后可通过资源ID取回的时间, 过期后自动释放",
+        1800,
+        86400,
+        [300, 600, 1800, 3600],
+    ),
+    "ResourceMaxMB": GsIntConfig(
+        "事件资源最大体积(MB)",
+        "消息中的图片等资源占用的最大体积, 超出后按最近最少使用淘汰",
+        128,
+        4096,
+        [32, 64, 128, 256, 512],
+    ),
+    "ResourceSpillKB": GsIntConfig(
+        "事件资源落盘阈值(KB)",
+        "超过该大小的资源写入临时目录并以内存映射读取, 0为不落盘",
+        256,
+        102400,
+        [0, 128, 256, 1024],
+    ),
+    "LinkImageCacheTTL": GsIntConfig(
+        "链接图片缓存时间(秒)",
+        "以base64发送link://图片时下载结果的缓存时间, 过期后带ETag/Last-Modified重新验证",
+        600,
+        86400,
+        [60, 300, 600, 3600],
+    ),
+    "LinkImageCacheMB": GsIntConfig(
+        "链接图片缓存最大体积(MB)",
+        "以base64发送link://图片时下载结果缓存的最大体积, 超出后按最近最少使用淘汰",
+        64,
+        4096,
+        [16, 32, 64, 128, 256],
+    ),
+    "HttpPoolLimit": GsIntConfig(
+        "HTTP连接池最大连接数",
+        "米游社/MiniGG/安柏/Enka/Hakush等API请求共享连接池的最大连接数",
+        100,
+        1000,
+        [50, 100, 200, 500],
+    ),
+    "HttpPoolLimitPerHost": GsIntConfig(
+        "HTTP连接池单域名最大连接数",
+        "共享连接池中同一域名最多同时保持的连接数, 0为不限制",
+        30,
+        500,
+        [0, 10, 30, 50, 100],
+    ),
+    "HttpKeepAlive": GsIntConfig(
+        "HTTP连接保持时间(秒)",
+        "空闲连接在连接池中保留的时间, 期间可被复用, 免去重新握手",
+        60,
+        3600,
+        [15, 30, 60, 120, 300],
+    ),
+    "HttpDNSCacheTTL": GsIntConfig(
+        "DNS缓存时间(秒)",
+        "共享连接池的DNS解析结果缓存时间",
+        300,
+        86400,
+        [60, 300, 600, 3600],
+    ),
+    "TaskScheduler": GsStrConfig(
+        "命令任务调度器",
+        "fair: 按插件加权公平调度; priority: 仅按权限优先级先进先出",
+        "fair",
+        ["fair", "priority"],
+    ),
+    "TaskConcurrency": GsIntConfig(
+        "命令任务最大并发数",
+        "每个连接同时执行的命令任务数量上限",
+        10,
+        200,
+        [5, 10, 20, 50],
+    ),
+    "TaskPluginConcurrency": GsIntConfig(
+        "单插件命令任务最大并发数",
+        "同一插件同时执行的命令任务数量上限, 避免单个慢插件占满全部并发, 0为不限制",
+        5,
+        200,
+        [0, 3, 5, 10],
+    ),
+    "TaskPluginWeight": GsListStrConfig(
+        "插件调度权重",
+        "格式为 插件名:权重, 例如 GenshinUID:2, 未设置的插件权重为1",
+        [],
+    ),
+    "TaskQueueSize": GsIntConfig(
+        "命令任务队列长度",
+        "排队中的命令任务数量上限, 超出后按丢弃策略处理",
+        1000,
+        100000,
+        [200, 500, 1000, 5000],
+    ),
+    "TaskShedPolicy": GsStrConfig(
+        "命令任务队列满时的丢弃策略",
+        "reject: 丢弃新任务; evict: 丢弃积压最多的插件中优先级最低的任务",
+        "evict",
+        ["reject", "evict"],
+    ),
+    "TaskMaxWait": GsIntConfig(
+        "命令任务最长排队时间(秒)",
+        "排队超过该时间的任务不再执行, 直接丢弃(不会通知用户), 0为不限制",
+        0,
+        3600,
+        [0, 30, 60, 120, 300],
+    ),
+    "StatFlushInterval": GsIntConfig(
+        "统计数据落库间隔(秒)",
+        "每隔该时间将变化过的指令统计写入数据库, 重启后生效",
+        60,
+        3600,
+        [30, 60, 300, 600],
+    ),
+    "StatFlushBatch": GsIntConfig(
+        "统计数据单次写入条数",
+        "落库时每批写入数据库的最大行数",
+        1000,
+        10000,
+        [200, 500, 1000, 5000],
+    ),
+    "PerfSampleRate": GsIntConfig(
+        "消息处理耗时采样率(%)",
+        "按该比例记录消息处理各阶段耗时, 可在 /api/perf 查看, 0为关闭",
+        0,
+        100,
+        [0, 1, 5, 10, 100],
+    ),
+    "BulkConcurrency": GsIntConfig(
+        "批量任务并发数",
+        "自动签到等逐个账号执行的批量任务, 同时执行的账号数量",
+        4,
+        32,
+        [1, 2, 4, 8, 16],
+    ),
+    "BulkEndpointRPM": GsIntConfig(
+        "批量任务每个接口每分钟请求数",
+        "批量任务对同一上游接口每分钟最多发起的账号数, 用于规避风控",
+        20,
+        600,
+        [10, 20, 30, 60, 120],
+    ),
+    "BulkCookieRPM": GsIntConfig(
+        "批量任务每个Cookie每分钟请求数",
+        "批量任务中同一Cookie每分钟最多执行的次数",
+        6,
+        60,
+        [2, 6, 10, 30],
+    ),
+    "BulkJitter": GsIntConfig(
+        "批量任务随机间隔(秒)",
+        "每个账号执行前额外等待 0 到该值之间的随机时间",
+        3,
+        60,
+        [0, 1, 3, 5, 10],
+    ),
+    "BulkCaptchaRetry": GsIntConfig(
+        "批量任务验证码重试次数",
+        "出现验证码时, 退避等待后重新执行的最大次数, 其他失败不重试",
+        2,
+        10,
+        [0, 1, 2, 3, 5],
+    ),
+    "SubscribeConcurrency": GsIntConfig(
+        "订阅推送并发数",
+        "订阅推送任务(muti_task)同时执行的UID数量, 同一UID的多个订阅只执行一次",
+        8,
+        64,
+        [1, 4, 8, 16, 32],
+    ),
+    "SubscribeTimeout": GsIntConfig(
+        "订阅推送单个UID超时(秒)",
+        "单个UID执行超过该时间视为失败, 不影响其他订阅, 0为不限制",
+        60,
+        600,
+        [0, 30, 60, 120, 300],
+    ),
+    "BroadcastRPM": GsIntConfig(
+        "群聊推送每分钟发送条数",
+        "广播推送时每个连接的Bot向同一平台的群聊每分钟最多发送的条数, 发送失败时自动减速",
+        30,
+        600,
+        [10, 20, 30, 60, 120],
+    ),
+    "BroadcastPrivateRPM": GsIntConfig(
+        "私聊推送每分钟发送条数",
+        "广播推送时每个连接的Bot向同一平台的私聊每分钟最多发送的条数, 发送失败时自动减速",
+        120,
+        1200,
+        [30, 60, 120, 240],
+    ),
+    "BroadcastBurst": GsIntConfig(
+        "推送突发条数",
+        "空闲后可以不等待连续发送的条数, 之后按每分钟条数匀速发送",
+        5,
+        60,
+        [1, 3, 5, 10],
+    ),
+    "BroadcastPlatformRPM": GsListStrConfig(
+        "各平台推送每分钟发送条数",
+        "按平台单独设置推送速率(私聊与群聊相同), 格式为 平台:每分钟条数, 例如 onebot:30, qqgroup:10",
+        [],
+    ),
 }
@@ -25,6 +25,7 @@ def reload_plugin(plugin_name: str):
     for v in del_v:
         del SL.detail_lst[v]
     del SL.plugins[plugin_name]
+    SL.mark_dirty()
 
     retcode = gss.load_plugin(plugin_name)
     if retcode is None:
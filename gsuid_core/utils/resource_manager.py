@@ -1,34 +1,206 @@
+import mmap
+import time
 import uuid
-from typing import Dict, Union
+import base64
+from typing import Dict, Union, Optional
+from pathlib import Path
+from collections import OrderedDict, deque
 
 from PIL import Image
 
+from gsuid_core.logger import logger
+from gsuid_core.server import on_core_start
+from gsuid_core.data_store import get_res_path
+from gsuid_core.utils.single_flight import SingleFlight
 from gsuid_core.utils.image.image_tools import change_ev_image_to_bytes
+from gsuid_core.utils.plugins_config.gs_config import sp_config
+
+RESOURCE_TEMP = get_res_path("RESOURCE_TEMP")
+
+resource_ttl: int = sp_config.get_config("ResourceTTL").data
+resource_max_mb: int = sp_config.get_config("ResourceMaxMB").data
+resource_spill_kb: int = sp_config.get_config("ResourceSpillKB").data
+
+
+class ResourceEntry:
+    __slots__ = ("source", "data", "path", "size", "expire_at")
+
+    def __init__(
+        self,
+        source: Optional[str],
+        data: Union[bytes, mmap.mmap, None],
+        expire_at: float,
+    ):
+        # 尚未取回的 URL 等, 首次 get 时再下载
+        self.source = source
+        # 已取回的数据, 落盘后为只读的内存映射
+        self.data = data
+        self.path: Optional[Path] = None
+        self.size = len(data) if data is not None else len(source or "")
+        self.expire_at = expire_at
+
+
+def _decode_base64(data: str) -> Optional[bytes]:
+    if data.startswith("base64://"):
+        return base64.b64decode(data[9:])
+    if data.startswith("data:") and ";base64," in data[:64]:
+        return base64.b64decode(data.split(",", 1)[1])
+    return None
 
 
 # 全局资源注册表
 class ResourceManager:
-    _store: Dict[str, Union[str, bytes]] = {}
+    """
+    事件与AI工具产生的图片等资源, 以 ID 引用
+
+    - base64 在注册时即解码为二进制, URL 在首次`get`时才下载, 并发的同一资源只下载一次
+    - 每个资源在注册后 TTL 秒过期, 总体积超出上限时按最近最少使用淘汰
+    - 超过落盘阈值的数据写入临时目录并以内存映射读取, 不占用 Python 堆
+    """
 
-    @classmethod
-    def register(cls, data: Union[str, bytes, Image.Image]) -> str:
+    def __init__(self, ttl: float, max_bytes: int, spill_bytes: int):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        # 0 为不落盘
+        self.spill_bytes = spill_bytes
+        self.size = 0
+        self.disk_size = 0
+
+        self._store: "OrderedDict[str, ResourceEntry]" = OrderedDict()
+        # TTL 固定, 注册顺序即过期顺序, 用队列即可
+        self._expire_queue: "deque[tuple[float, str]]" = deque()
+        self.flight = SingleFlight()
+
+        self.hits = 0
+        self.fetches = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.spilled = 0
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def register(self, data: Union[str, bytes, Image.Image]) -> str:
         """存入二进制数据或者base64数据/URL，返回一个 ID"""
         resource_id = f"img_{uuid.uuid4().hex[:8]}"
         if isinstance(data, Image.Image):
             data = data.tobytes()
 
-        cls._store[resource_id] = data
+        source = None
+        if isinstance(data, str):
+            decoded = _decode_base64(data)
+            if decoded is None:
+                source = data
+            data = decoded
+
+        expire_at = time.time() + self.ttl
+        entry = ResourceEntry(source, data, expire_at)
+        self._store[resource_id] = entry
+        self._expire_queue.append((expire_at, resource_id))
+        self.size += entry.size
+        if data is not None:
+            self._maybe_spill(resource_id, entry)
+        self._purge()
         return resource_id
 
-    @classmethod
-    async def get(cls, resource_id: str) -> bytes:
+    async def get(self, resource_id: str) -> bytes:
         """根据 ID 取回数据"""
-        if resource_id not in cls._store:
-            raise ValueError(f"找不到资源 ID: {resource_id}")
-        data = cls._store[resource_id]
-        if isinstance(data, str):
-            data = await change_ev_image_to_bytes(data)
+        entry = self._get_entry(resource_id)
+        if entry.data is not None:
+            self.hits += 1
+            return entry.data[:] if isinstance(entry.data, mmap.mmap) else entry.data
+
+        return await self.flight.do(resource_id, lambda: self._fetch(resource_id, entry))
+
+    async def _fetch(self, resource_id: str, entry: ResourceEntry) -> bytes:
+        self.fetches += 1
+        data = await change_ev_image_to_bytes(entry.source)  # type: ignore
+        # 下载期间资源可能已过期或被淘汰
+        if self._store.get(resource_id) is entry:
+            self.size += len(data) - entry.size
+            entry.data, entry.source, entry.size = data, None, len(data)
+            self._maybe_spill(resource_id, entry)
+            self._purge()
         return data
 
+    def _get_entry(self, resource_id: str) -> ResourceEntry:
+        self._purge()
+        entry = self._store.get(resource_id)
+        if entry is None:
+            raise ValueError(f"找不到资源 ID: {resource_id}")
+        self._store.move_to_end(resource_id)
+        return entry
+
+    def _maybe_spill(self, resource_id: str, entry: ResourceEntry):
+        if not self.spill_bytes or entry.size < self.spill_bytes or not isinstance(entry.data, bytes):
+            return
+        path = RESOURCE_TEMP / resource_id
+        try:
+            path.write_bytes(entry.data)
+            with path.open("rb") as f:
+                entry.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            logger.warning(f"[资源管理] 资源 {resource_id} 落盘失败, 保留在内存中: {e}")
+            path.unlink(missing_ok=True)
+            return
+        entry.path = path
+        self.disk_size += entry.size
+        self.spilled += 1
+
+    def _purge(self):
+        now = time.time()
+        queue = self._expire_queue
+        while queue and queue[0][0] <= now:
+            _, resource_id = queue.popleft()
+            if resource_id in self._store:
+                self._remove(resource_id)
+                self.expirations += 1
+
+        while self._store and self.size > self.max_bytes:
+            self._remove(next(iter(self._store)))
+            self.evictions += 1
+
+        # 被淘汰的资源仍留在过期队列中, 过多时重建
+        if len(queue) > 2 * len(self._store) + 64:
+            self._expire_queue = deque(sorted((e.expire_at, k) for k, e in self._store.items()))
+
+    def _remove(self, resource_id: str):
+        entry = self._store.pop(resource_id)
+        self.size -= entry.size
+        if isinstance(entry.data, mmap.mmap):
+            entry.data.close()
+        if entry.path is not None:
+            self.disk_size -= entry.size
+            entry.path.unlink(missing_ok=True)
+
+    def clear(self):
+        for resource_id in list(self._store):
+            self._remove(resource_id)
+        self._expire_queue.clear()
+
+    def get_stats(self) -> Dict[str, Union[int, float]]:
+        return {
+            "entries": len(self._store),
+            "bytes": self.size,
+            "disk_bytes": self.disk_size,
+            "max_bytes": self.max_bytes,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "fetches": self.fetches,
+            "coalesced": self.flight.coalesced,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "spilled": self.spilled,
+            "inflight": len(self.flight),
+        }
+
+
+RM = ResourceManager(resource_ttl, resource_max_mb * 1024 * 1024, resource_spill_kb * 1024)
+
 
-RM = ResourceManager()
+@on_core_start
+async def clean_resource_temp():
+    # 重启后旧的落盘资源已无法被引用, 直接清理
+    for path in RESOURCE_TEMP.glob("*"):
+        if path.is_file():
+            path.unlink(missing_ok=True)
@@ -4,10 +4,12 @@ from typing import Dict, List
 
 from gsuid_core.logger import logger
 from gsuid_core.segment import MessageSegment
+from gsuid_core.utils.bulk_job import bulk_engine
 from gsuid_core.utils.api.mys_api import mys_api
 from gsuid_core.utils.error_reply import get_error
 from gsuid_core.utils.database.models import GsUser
 from gsuid_core.utils.boardcast.models import BoardCastMsg, BoardCastMsgDict
+from gsuid_core.utils.database.cookie_pool import get_cookie_pool
 from gsuid_core.utils.plugins_config.gs_config import pass_config
 
 GAME_NAME_MAP = {
@@ -25,6 +27,7 @@ async def sign_error(uid: str, retcode: int, game_name: str = "gs") -> str:
         ck = await GsUser.get_user_cookie_by_uid(uid, game_name)
         if ck:
             await GsUser.update_data_by_uid_without_bot_id(uid, game_name, status="error")
+            get_cookie_pool(GsUser.__name__).set_status(ck, "error")
     return f"[{game_name}] 签到失败!{error_msg}"
 
 
@@ -133,6 +136,18 @@ async def single_daily_sign(
     group_msgs: Dict,
 ):
     im = await sign_in(uid, game_name)
+    collect_sign_result(bot_id, uid, gid, qid, im, private_msgs, group_msgs)
+
+
+def collect_sign_result(
+    bot_id: str,
+    uid: str,
+    gid: str,
+    qid: str,
+    im: str,
+    private_msgs: Dict,
+    group_msgs: Dict,
+):
     if gid == "on":
         if qid not in private_msgs:
             private_msgs[qid] = []
@@ -161,52 +176,43 @@ async def single_daily_sign(
 
 
 async def daily_sign(game_name: str):
-    tasks = []
     private_msgs = {}
     group_msgs = {}
+    uid_name = f"{game_name}_uid" if game_name and game_name != "gs" else "uid"
+    switch_name = f"{game_name}_sign_switch" if game_name and game_name != "gs" else "sign_switch"
     _user_list: List[GsUser] = await GsUser.get_all_user()
     uid_list = []
     user_list: List[GsUser] = []
     for user in _user_list:
-        _uid = getattr(
-            user,
-            f"{game_name}_uid" if game_name and game_name != "gs" else "uid",
-        )
-        _switch = getattr(
-            user,
-            (f"{game_name}_sign_switch" if game_name and game_name != "gs" else "sign_switch"),
-        )
+        _uid = getattr(user, uid_name)
+        _switch = getattr(user, switch_name)
         if _switch != "off" and not user.status and _uid:
             uid_list.append(_uid)
             user_list.append(user)
 
     logger.info(f"[{game_name}] [全部重签] [UID列表] {uid_list}")
+    # 并发签到, 按接口与Cookie限速, 重启后从中断处继续
+    results = await bulk_engine.run(
+        f"daily_sign_{game_name}",
+        user_list,
+        key=lambda user: getattr(user, uid_name),
+        worker=lambda user: sign_in(getattr(user, uid_name), game_name),
+        endpoint=f"mys_sign_{game_name}",
+        cookie=lambda user: user.cookie,
+        is_captcha=lambda im: "验证码" in im,
+    )
     for user in user_list:
-        tasks.append(
-            single_daily_sign(
-                user.bot_id,
-                getattr(
-                    user,
-                    (f"{game_name}_uid" if game_name and game_name != "gs" else "uid"),
-                ),
-                getattr(
-                    user,
-                    (f"{game_name}_sign_switch" if game_name and game_name != "gs" else "sign_switch"),
-                ),
-                user.user_id,
-                game_name,
-                private_msgs,
-                group_msgs,
-            )
+        uid = getattr(user, uid_name)
+        im = results.get(uid, "签到失败!执行时出现异常, 请检查控制台...")
+        collect_sign_result(
+            user.bot_id,
+            uid,
+            getattr(user, switch_name),
+            user.user_id,
+            im,
+            private_msgs,
+            group_msgs,
         )
-        if len(tasks) >= 1:
-            await asyncio.gather(*tasks)
-            delay = 30 + random.randint(3, 35)
-            logger.info(f"[{game_name}] [签到] 已签到{len(tasks)}个用户, 等待{delay}秒进行下一次签到")
-            tasks.clear()
-            await asyncio.sleep(delay)
-    await asyncio.gather(*tasks)
-    tasks.clear()
 
     # 转为广播消息
     private_msg_dict: Dict[str, List[BoardCastMsg]] = {}
@@ -0,0 +1,60 @@
+import asyncio
+from typing import Dict, TypeVar, Callable, Hashable, Awaitable
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    同一个键的并发请求只执行一次, 其余请求等待并共享结果
+
+    - 等待者被取消时只取消自己, 不影响正在执行的请求
+    - 执行的请求被取消时, 等待者不会收到不属于自己的取消, 而是由其中一个重新执行
+    """
+
+    def __init__(self):
+        self.inflight: Dict[Hashable, asyncio.Future] = {}
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self.inflight)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.inflight
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        while True:
+            fut = self.inflight.get(key)
+            if fut is None:
+                break
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(fut)
+            except asyncio.CancelledError:
+                if not fut.cancelled():
+                    raise
+
+        fut = self.inflight[key] = asyncio.get_running_loop().create_future()
+        fut.add_done_callback(_retrieve_exception)
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+        except Exception as e:
+            fut.set_exception(e)
+            raise
+        else:
+            fut.set_result(result)
+            return result
+        finally:
+            self.inflight.pop(key, None)
+            # KeyboardInterrupt 等情况下也不让等待者一直挂起
+            if not fut.done():
+                fut.cancel()
+
+
+def _retrieve_exception(future: asyncio.Future):
+    # 没有其他等待者时, 避免 "Future exception was never retrieved"
+    if not future.cancelled():
+        future.exception()
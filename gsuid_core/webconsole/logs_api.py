@@ -10,10 +10,26 @@ from datetime import datetime
 from fastapi import Depends, Request
 from fastapi.responses import StreamingResponse
 
-from gsuid_core.logger import LOG_PATH, HistoryLogData, read_log, get_all_log_path
+from gsuid_core.pool import to_thread
+from gsuid_core.logger import LOG_PATH, read_log, get_all_log_path
+from gsuid_core.log_index import log_reader
 from gsuid_core.webconsole.app_app import app
 from gsuid_core.webconsole.web_api import require_auth
 
+LEVEL_MAPPING = {
+    "info": "info",
+    "warning": "warn",
+    "warn": "warn",
+    "error": "error",
+    "debug": "debug",
+    "critical": "error",
+    "fatal": "error",
+}
+
+# 索引读取与日志解析都是阻塞IO, 放到线程池中执行
+_query_logs = to_thread(log_reader.query)
+_get_log_index = to_thread(log_reader.get_index)
+
 
 @app.get("/api/logs")
 async def get_logs(
@@ -49,62 +65,34 @@ async def get_logs(
     if date.endswith(".log"):
         date = date.removesuffix(".log")
 
-    history_log_data = HistoryLogData()
     log_file_path = LOG_PATH / f"{date}.log"
     if not log_file_path.exists():
         return {"status": 404, "msg": "该日志不存在", "data": None}
-    log_files = await history_log_data.get_parse_logs(log_file_path)
-
-    # Filter by level
-    if level and level != "all":
-        level_mapping = {
-            "info": "info",
-            "warning": "warn",
-            "warn": "warn",
-            "error": "error",
-            "debug": "debug",
-            "critical": "error",
-            "fatal": "error",
-        }
-        filtered_logs = []
-        for log in log_files:
-            raw_level = log.get("日志等级", "INFO").lower()
-            mapped_level = level_mapping.get(raw_level, "info")
-            if mapped_level == level:
-                filtered_logs.append(log)
-        log_files = filtered_logs
-
-    # Filter by source
-    if source and source != "all":
-        log_files = [log for log in log_files if log.get("来源", "core") == source]
-
-    total = len(log_files)
-    start = (page - 1) * per_page
-    end = start + per_page
-    log_page = log_files[start:end]
+
+    # 日志中没有来源字段, 全部视为 core
+    if source and source not in ("all", "core"):
+        total, log_page = 0, []
+    else:
+        total, log_page = await _query_logs(
+            log_file_path,
+            level if level and level != "all" else None,
+            page,
+            per_page,
+        )
 
     # Convert to frontend expected format
+    start = (page - 1) * per_page
     formatted_logs = []
-    level_mapping = {
-        "info": "info",
-        "warning": "warn",
-        "warn": "warn",
-        "error": "error",
-        "debug": "debug",
-        "critical": "error",
-        "fatal": "error",
-    }
     for i, log in enumerate(log_page):
-        raw_level = log.get("日志等级", "INFO").lower()
-        level = level_mapping.get(raw_level, "info")
-        message = log.get("内容", "")
+        raw_level = str(log.get("level", "INFO")).lower()
+        message = log.get("event", "")
         if not isinstance(message, str):
             message = json.dumps(message, ensure_ascii=False)
         formatted_logs.append(
             {
                 "id": start + i + 1,
-                "timestamp": log.get("时间", ""),
-                "level": level,
+                "timestamp": log.get("timestamp", ""),
+                "level": LEVEL_MAPPING.get(raw_level, "info"),
                 "source": "core",
                 "message": message,
                 "details": None,
@@ -191,61 +179,13 @@ async def get_log_stats(
         date = date.removesuffix(".log")
 
     try:
-        history_log_data = HistoryLogData()
-        log_files = await history_log_data.get_parse_logs(LOG_PATH / f"{date}.log")
-
-        level_mapping = {
-            "info": "info",
-            "warning": "warn",
-            "warn": "warn",
-            "error": "error",
-            "debug": "debug",
-            "critical": "error",
-            "fatal": "error",
-        }
+        log_index = await _get_log_index(LOG_PATH / f"{date}.log")
+        counts = log_index.counts()
 
-        # Calculate statistics by level for entire date
-        info_count = 0
-        warn_count = 0
-        error_count = 0
-        debug_count = 0
-
-        for log in log_files:
-            raw_level = log.get("日志等级", "INFO").lower()
-            mapped_level = level_mapping.get(raw_level, "info")
-            if mapped_level == "info":
-                info_count += 1
-            elif mapped_level == "warn":
-                warn_count += 1
-            elif mapped_level == "error":
-                error_count += 1
-            elif mapped_level == "debug":
-                debug_count += 1
-
-        # Filter by level
-        if level and level != "all":
-            level_mapping = {
-                "info": "info",
-                "warning": "warn",
-                "warn": "warn",
-                "error": "error",
-                "debug": "debug",
-                "critical": "error",
-                "fatal": "error",
-            }
-            filtered_logs = []
-            for log in log_files:
-                raw_level = log.get("日志等级", "INFO").lower()
-                mapped_level = level_mapping.get(raw_level, "info")
-                if mapped_level == level:
-                    filtered_logs.append(log)
-            log_files = filtered_logs
-
-        # Filter by source
-        if source and source != "all":
-            log_files = [log for log in log_files if log.get("来源", "core") == source]
-
-        total = len(log_files)
+        if source and source not in ("all", "core"):
+            total = 0
+        else:
+            total, _ = log_index.rows(level if level and level != "all" else None)
         total_pages = (total + per_page - 1) // per_page if per_page > 0 else 0
 
         return {
@@ -255,10 +195,10 @@ async def get_log_stats(
                 "total": total,
                 "total_pages": total_pages,
                 "per_page": per_page,
-                "info_count": info_count,
-                "warn_count": warn_count,
-                "error_count": error_count,
-                "debug_count": debug_count,
+                "info_count": counts["info"],
+                "warn_count": counts["warn"],
+                "error_count": counts["error"],
+                "debug_count": counts["debug"],
             },
         }
     except Exception:
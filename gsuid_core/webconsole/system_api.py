@@ -6,6 +6,7 @@ System APIs
 from typing import Dict
 
 from fastapi import Depends, Request
+from fastapi.responses import PlainTextResponse
 
 from gsuid_core.handler import IS_HANDDLE, set_handle
 from gsuid_core.webconsole.app_app import app
@@ -133,3 +134,264 @@ async def resume_core(_user: Dict = Depends(require_auth)):
         "msg": "恢复指令已发送，核心即将恢复...",
         "data": None,
     }
+
+
+@app.get("/api/system/user_registry")
+async def get_user_registry_stats(_user: Dict = Depends(require_auth)):
+    """
+    获取用户/群组注册表状态
+
+    Args:
+        _user: 认证用户信息
+
+    Returns:
+        status: 0成功
+        data: 待写入队列长度、批量写入耗时与去重命中率等统计
+    """
+    from gsuid_core.utils.database.user_registry import user_registry
+
+    return {
+        "status": 0,
+        "msg": "ok",
+        "data": user_registry.get_stats(),
+    }
+
+
+@app.get("/api/system/cookie_pool")
+async def get_cookie_pool_stats(_user: Dict = Depends(require_auth)):
+    """
+    获取公共Cookie池状态
+
+    Args:
+        _user: 认证用户信息
+
+    Returns:
+        status: 0成功
+        data: 各表的可用Cookie数量、分配次数与超出每日额度的次数等统计
+    """
+    from gsuid_core.utils.database.cookie_pool import cookie_pools
+
+    return {
+        "status": 0,
+        "msg": "ok",
+        "data": {name: pool.get_stats() for name, pool in cookie_pools.items()},
+    }
+
+
+@app.get("/api/system/bulk_jobs")
+async def get_bulk_job_stats(_user: Dict = Depends(require_auth)):
+    """
+    获取批量任务进度
+
+    Args:
+        _user: 认证用户信息
+
+    Returns:
+        status: 0成功
+        data: 各批量任务(如自动签到)的总数、已完成数、失败与验证码重试次数、预计剩余秒数
+    """
+    from gsuid_core.utils.bulk_job import bulk_engine
+
+    return {
+        "status": 0,
+        "msg": "ok",
+        "data": bulk_engine.get_stats(),
+    }
+
+
+@app.get("/api/system/broadcast")
+async def get_broadcast_stats(_user: Dict = Depends(require_auth)):
+    """
+    获取广播推送状态
+
+    Args:
+        _user: 认证用户信息
+
+    Returns:
+        status: 0成功
+        data: 最近推送任务中每条发送通道的进度、每分钟发送条数与失败数, 以及当前限速
+    """
+    from gsuid_core.utils.boardcast.engine import broadcast_engine
+
+    return {
+        "status": 0,
+        "msg": "ok",
+        "data": broadcast_engine.get_stats(),
+    }
+
+
+@app.get("/api/system/cache")
+async def get_cache_stats(_user: Dict = Depends(require_auth)):
+    """
+    获取函数结果缓存(gs_cache)状态
+
+    Args:
+        _user: 认证用户信息
+
+    Returns:
+        status: 0成功
+        data: 缓存条数、体积以及命中/未命中/淘汰次数等统计, link_image 为链接图片下载缓存的统计
+    """
+    from gsuid_core.utils.cache import cache_engine
+    from gsuid_core.utils.image.url_cache import url_image_cache
+
+    return {
+        "status": 0,
+        "msg": "ok",
+        "data": cache_engine.get_stats() | {"link_image": url_image_cache.get_stats()},
+    }
+
+
+@app.get("/api/system/resource")
+async def get_resource_stats(_user: Dict = Depends(require_auth)):
+    """
+    获取事件资源(图片等资源ID)的存储状态
+
+    Args:
+        _user: 认证用户信息
+
+    Returns:
+        status: 0成功
+        data: 资源条数、内存/落盘体积以及下载/合并/淘汰/过期次数等统计
+    """
+    from gsuid_core.utils.resource_manager import RM
+
+    return {
+        "status": 0,
+        "msg": "ok",
+        "data": RM.get_stats(),
+    }
+
+
+@app.get("/api/system/http_pool")
+async def get_http_pool_stats(_user: Dict = Depends(require_auth)):
+    """
+    获取共享HTTP连接池状态
+
+    Args:
+        _user: 认证用户信息
+
+    Returns:
+        status: 0成功
+        data: 连接池上限、已连接的域名数与空闲连接数
+    """
+    from gsuid_core.utils.api.http_client import http_client
+
+    return {
+        "status": 0,
+        "msg": "ok",
+        "data": http_client.get_stats(),
+    }
+
+
+@app.get("/api/system/scheduler")
+async def get_scheduler_stats(_user: Dict = Depends(require_auth)):
+    """
+    获取各连接的命令任务调度状态
+
+    Args:
+        _user: 认证用户信息
+
+    Returns:
+        status: 0成功
+        data: 以连接ID为键, 包含排队/执行中任务数, 以及按插件统计的排队/执行耗时直方图
+    """
+    from gsuid_core.gss import gss
+
+    return {
+        "status": 0,
+        "msg": "ok",
+        "data": {bot_id: bot.scheduler.get_stats() for bot_id, bot in gss.active_bot.items()},
+    }
+
+
+@app.get("/api/system/embedding")
+async def get_embedding_stats(_user: Dict = Depends(require_auth)):
+    """
+    获取 AI 向量计算服务状态
+
+    Args:
+        _user: 认证用户信息
+
+    Returns:
+        status: 0成功
+        data: 查询向量缓存命中率、合批次数与平均批大小、排队/计算耗时直方图
+    """
+    from gsuid_core.ai_core.embedding import embedding_service
+
+    return {
+        "status": 0,
+        "msg": "ok",
+        "data": embedding_service.get_stats(),
+    }
+
+
+@app.get("/api/perf")
+async def get_perf_stats(_user: Dict = Depends(require_auth)):
+    """
+    获取消息处理各阶段的耗时统计
+
+    Args:
+        _user: 认证用户信息
+
+    Returns:
+        status: 0成功
+        data: 采样率、已采样消息数, 以及全局和按插件统计的各阶段耗时直方图(微秒), 繁简转换的缓存命中情况,
+            图片编码的执行方式、编码器、是否为 pillow-simd 与各方式的编码次数
+    """
+    from gsuid_core.perf import profiler
+    from gsuid_core.text_normalize import text_normalizer
+    from gsuid_core.utils.image.encoder import image_encoder
+
+    return {
+        "status": 0,
+        "msg": "ok",
+        "data": profiler.get_stats()
+        | {"opencc": text_normalizer.get_stats(), "image_encode": image_encoder.get_stats()},
+    }
+
+
+@app.get("/api/perf/flame")
+async def get_perf_flame(_user: Dict = Depends(require_auth)):
+    """
+    导出折叠栈格式的耗时数据, 可直接交给 flamegraph.pl 或 speedscope 生成火焰图
+
+    Args:
+        _user: 认证用户信息
+
+    Returns:
+        纯文本, 每行为`阶段;子阶段 自身耗时(微秒)`
+    """
+    from gsuid_core.perf import profiler
+
+    return PlainTextResponse(profiler.export_folded())
+
+
+@app.post("/api/perf/config")
+async def set_perf_config(data: Dict, _user: Dict = Depends(require_auth)):
+    """
+    调整耗时采样率, 立即生效且不写入配置文件
+
+    Args:
+        data: sample_rate 为采样百分比(0-100), reset 为 true 时清空已有统计
+        _user: 认证用户信息
+
+    Returns:
+        status: 0成功
+        data: 调整后的采样率
+    """
+    from gsuid_core.perf import profiler
+
+    if "sample_rate" in data:
+        try:
+            profiler.set_sample_rate(float(data["sample_rate"]) / 100)
+        except (TypeError, ValueError):
+            return {"status": 1, "msg": "sample_rate 必须为数字"}
+    if data.get("reset"):
+        profiler.reset()
+
+    return {
+        "status": 0,
+        "msg": "ok",
+        "data": {"sample_rate": profiler.sample_rate},
+    }
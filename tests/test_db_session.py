@@ -0,0 +1,138 @@
+"""
+测试 with_session 嵌套调用与 db.transaction() 的提交、回滚行为
+"""
+
+import asyncio
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+import pytest
+from sqlmodel import select
+
+from gsuid_core.utils.database import base_models
+from gsuid_core.benchmarks.db_session import Counter, setup
+from gsuid_core.utils.database.models import CoreUser
+from gsuid_core.utils.database.base_models import db, with_session
+
+
+class Helper:
+    @classmethod
+    @with_session
+    async def add_user(cls, session, user_id: str, fail: bool = False, commit: bool = False):
+        session.add(CoreUser(bot_id="onebot", user_id=user_id, group_id="10001", user_name=user_id))
+        await session.flush()
+        if commit:
+            await session.commit()
+        if fail:
+            raise ValueError("嵌套调用失败")
+        return True
+
+    @classmethod
+    @with_session
+    async def outer(cls, session, nested_fail: bool = False, write: bool = True):
+        if write:
+            session.add(CoreUser(bot_id="onebot", user_id="outer", group_id="10001", user_name="outer"))
+            await session.flush()
+        user = (await session.execute(select(CoreUser).where(CoreUser.user_id == "outer"))).scalar_one()
+        result = await cls.add_user("nested", fail=nested_fail)
+        # 嵌套调用失败后, 外层已读取的对象仍可访问
+        return result, user.user_name, user.group_id
+
+
+async def user_ids():
+    async with base_models.async_maker() as session:
+        rows = await session.execute(select(CoreUser.user_id))
+        return sorted(row[0] for row in rows.all())
+
+
+def run(coro_func):
+    async def main():
+        counter = Counter()
+        with tempfile.TemporaryDirectory() as tmp:
+            with (
+                mock.patch.object(base_models, "engine"),
+                mock.patch.object(base_models, "async_maker"),
+                mock.patch.object(base_models, "sqlite_semaphore"),
+            ):
+                engine = await setup(Path(tmp) / "test.db", counter)
+                try:
+                    return await coro_func(counter)
+                finally:
+                    await engine.dispose()
+
+    return asyncio.run(main())
+
+
+def test_nested_success():
+    """嵌套调用加入外层会话, 只提交一次"""
+
+    async def case(counter: Counter):
+        commits = counter.commit
+        assert await Helper.outer() == (True, "outer", "10001")
+        assert counter.commit - commits == 1
+        assert await user_ids() == ["nested", "outer"]
+
+    run(case)
+
+
+def test_nested_failure():
+    """嵌套调用失败时只撤销其自己的改动, 外层继续执行并提交"""
+
+    async def case(counter: Counter):
+        assert await Helper.outer(nested_fail=True) == (None, "outer", "10001")
+        assert await user_ids() == ["outer"]
+        # 外层只读取过数据时同样如此
+        assert await Helper.outer(nested_fail=True, write=False) == (None, "outer", "10001")
+        assert await user_ids() == ["outer"]
+
+    run(case)
+
+
+def test_transaction_commit():
+    """db.transaction() 中的多次写入一起提交"""
+
+    async def case(counter: Counter):
+        commits = counter.commit
+        async with db.transaction():
+            await Helper.add_user("a")
+            await Helper.add_user("b")
+        assert counter.commit - commits == 1
+        assert await user_ids() == ["a", "b"]
+
+    run(case)
+
+
+def test_transaction_rollback():
+    """db.transaction() 中出错时抛出异常并回滚整个事务, 方法内的 commit 不会提前提交"""
+
+    async def case(counter: Counter):
+        with pytest.raises(ValueError):
+            async with db.transaction():
+                await Helper.add_user("a", commit=True)
+                await Helper.add_user("b", fail=True)
+        assert await user_ids() == []
+
+        with pytest.raises(RuntimeError):
+            async with db.transaction():
+                await Helper.add_user("c", commit=True)
+                raise RuntimeError
+        assert await user_ids() == []
+
+    run(case)
+
+
+def test_inner_transaction_rollback():
+    """嵌套的 db.transaction() 出错时只回滚块内的改动"""
+
+    async def case(counter: Counter):
+        async with db.transaction():
+            await Helper.add_user("a")
+            with pytest.raises(ValueError):
+                async with db.transaction():
+                    await Helper.add_user("b")
+                    raise ValueError
+            await Helper.add_user("c")
+        assert await user_ids() == ["a", "c"]
+
+    run(case)
@@ -0,0 +1,144 @@
+"""
+测试命令任务调度器的出队顺序、队列满时的丢弃与超时丢弃
+"""
+
+import time
+import asyncio
+from typing import List
+from unittest import mock
+
+from gsuid_core.models import TaskContext
+from gsuid_core.scheduler import FairScheduler
+
+
+async def noop():
+    pass
+
+
+def make(plugin: str, priority: int = 2) -> TaskContext:
+    return TaskContext(coro=noop(), name=plugin, priority=priority, plugin=plugin)
+
+
+def create(**kwargs) -> FairScheduler:
+    kwargs.setdefault("concurrency", 10)
+    kwargs.setdefault("per_plugin", 0)
+    kwargs.setdefault("max_queue", 100)
+    kwargs.setdefault("policy", "evict")
+    kwargs.setdefault("max_wait", 0)
+    kwargs.setdefault("weights", {})
+    return FairScheduler("test", **kwargs)
+
+
+def drain(scheduler: FairScheduler) -> List[TaskContext]:
+    result = []
+    while True:
+        ctx = scheduler._pop()
+        if ctx is None:
+            return result
+        ctx.coro.close()  # type: ignore
+        result.append(ctx)
+
+
+def submit_all(scheduler: FairScheduler, tasks: List[TaskContext]) -> List[bool]:
+    with mock.patch.object(scheduler, "ensure_running"):
+        return [scheduler.submit(ctx) for ctx in tasks]
+
+
+def test_fair_order():
+    """同优先级下各插件轮流出队, 插件内先进先出"""
+    scheduler = create()
+    a = [make("a") for _ in range(4)]
+    b = [make("b") for _ in range(2)]
+    submit_all(scheduler, a + b)
+    assert drain(scheduler) == [a[0], b[0], a[1], b[1], a[2], a[3]]
+    assert len(scheduler) == 0
+
+
+def test_weight():
+    """权重高的插件按比例获得更多出队机会"""
+    scheduler = create(weights={"a": 2})
+    a = [make("a") for _ in range(4)]
+    b = [make("b") for _ in range(2)]
+    submit_all(scheduler, a + b)
+    assert drain(scheduler) == [a[0], a[1], b[0], a[2], a[3], b[1]]
+
+
+def test_priority_first():
+    """不同优先级之间严格按优先级出队"""
+    scheduler = create()
+    low = make("a", priority=3)
+    normal = make("a")
+    high = make("b", priority=0)
+    submit_all(scheduler, [low, normal, high])
+    assert drain(scheduler) == [high, normal, low]
+
+
+def test_plugin_concurrency():
+    """已达并发上限的插件被跳过"""
+    scheduler = create(per_plugin=1)
+    a = make("a")
+    b = make("b")
+    submit_all(scheduler, [a, b])
+    scheduler._get_stats("a").running = 1
+    assert drain(scheduler) == [b]
+    scheduler._get_stats("a").running = 0
+    assert drain(scheduler) == [a]
+
+
+def test_evict():
+    """队列已满时丢弃积压最多的插件中优先级最低、最晚提交的任务"""
+    scheduler = create(max_queue=3)
+    a = [make("a") for _ in range(2)]
+    b = make("b")
+    assert submit_all(scheduler, [*a, b]) == [True, True, True]
+
+    # 其他插件的新任务挤掉积压最多的插件 a 中最晚提交的任务
+    b2 = make("b")
+    assert submit_all(scheduler, [b2]) == [True]
+    assert scheduler.stats["a"].shed == 1
+    assert scheduler.stats["a"].queued == 1
+
+    # 积压最多的插件(b)自己的新任务直接丢弃
+    b3 = make("b")
+    assert submit_all(scheduler, [b3]) == [False]
+    assert scheduler.stats["b"].shed == 1
+
+    # 优先级更低的新任务直接丢弃, 更高的则挤掉最低优先级的任务
+    assert submit_all(scheduler, [make("c", priority=3)]) == [False]
+    high = make("b", priority=0)
+    assert submit_all(scheduler, [high]) == [True]
+    assert drain(scheduler) == [high, a[0], b]
+    assert len(scheduler) == 0
+
+
+def test_reject():
+    """reject 策略下队列已满时丢弃新任务"""
+    scheduler = create(max_queue=1, policy="reject")
+    first = make("a")
+    assert submit_all(scheduler, [first, make("b", priority=0)]) == [True, False]
+    assert drain(scheduler) == [first]
+
+
+def test_max_wait():
+    """max_wait 为 0 时不丢弃排队过久的任务, 大于 0 时丢弃且不执行"""
+
+    async def main(max_wait: float) -> List[str]:
+        scheduler = create(max_wait=max_wait)
+        executed = []
+
+        async def job(name: str):
+            executed.append(name)
+
+        old = TaskContext(coro=job("old"), name="old", plugin="a")
+        old.create_time = time.perf_counter() - 100
+        scheduler.submit(old)
+        scheduler.submit(TaskContext(coro=job("new"), name="new", plugin="a"))
+        for _ in range(5):
+            await asyncio.sleep(0)
+        assert scheduler._runner is not None
+        scheduler._runner.cancel()
+        assert scheduler.stats["a"].expired == (1 if max_wait else 0)
+        return executed
+
+    assert asyncio.run(main(0)) == ["old", "new"]
+    assert asyncio.run(main(60)) == ["new"]
@@ -0,0 +1,81 @@
+"""
+测试 SingleFlight 的结果共享与取消行为
+"""
+
+import asyncio
+
+import pytest
+
+from gsuid_core.utils.single_flight import SingleFlight
+
+
+def test_share_result():
+    """并发请求只执行一次, 共享结果与异常"""
+
+    async def main():
+        flight = SingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return len(calls)
+
+        assert await asyncio.gather(*(flight.do("a", fetch) for _ in range(5))) == [1] * 5
+        assert flight.coalesced == 4
+        assert len(flight) == 0
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError
+
+        results = await asyncio.gather(*(flight.do("b", fail) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(r, ValueError) for r in results)
+
+    asyncio.run(main())
+
+
+def test_owner_cancelled():
+    """执行的请求被取消时, 等待者重新执行而不是收到取消"""
+
+    async def main():
+        flight = SingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return len(calls)
+
+        owner = asyncio.create_task(flight.do("a", fetch))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(flight.do("a", fetch))
+        await asyncio.sleep(0.01)
+        owner.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await owner
+        assert await waiter == 2
+
+    asyncio.run(main())
+
+
+def test_waiter_cancelled():
+    """等待者被取消时不影响正在执行的请求"""
+
+    async def main():
+        flight = SingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.05)
+            return "ok"
+
+        owner = asyncio.create_task(flight.do("a", fetch))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(flight.do("a", fetch))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert await owner == "ok"
+
+    asyncio.run(main())
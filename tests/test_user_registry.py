@@ -0,0 +1,64 @@
+"""
+测试用户注册表批量写入时的唯一约束冲突处理
+"""
+
+import asyncio
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from sqlmodel import select
+
+from gsuid_core.utils.database import base_models
+from gsuid_core.benchmarks.db_session import Counter, setup
+from gsuid_core.utils.database.models import CoreUser
+from gsuid_core.utils.database.user_registry import UserRegistry
+
+
+async def rows():
+    async with base_models.async_maker() as session:
+        result = await session.execute(select(CoreUser.bot_id, CoreUser.user_id, CoreUser.user_name))
+        return sorted(tuple(row) for row in result.all())
+
+
+def test_conflict_skipped():
+    """与其他机器人下同名用户冲突的记录被跳过, 同批其余记录照常写入, 且不逐条重试"""
+
+    async def main():
+        with tempfile.TemporaryDirectory() as tmp:
+            with (
+                mock.patch.object(base_models, "engine"),
+                mock.patch.object(base_models, "async_maker"),
+                mock.patch.object(base_models, "sqlite_semaphore"),
+            ):
+                engine = await setup(Path(tmp) / "test.db", Counter())
+                try:
+                    registry = UserRegistry(interval=60)
+                    registry.add_user("onebot", "1", "10001", "a", None)
+                    await registry.flush()
+
+                    registry.add_user("qqgroup", "1", "10001", "a", None)
+                    registry.add_user("onebot", "2", "10001", "b", None)
+                    registry.add_user("onebot", "3", "10001", "c", None)
+                    registry.add_user("qqgroup", "3", "10001", "c", None)
+                    with mock.patch.object(CoreUser, "insert_user") as insert_user:
+                        await registry.flush()
+                    insert_user.assert_not_called()
+
+                    assert registry.conflicts == 2
+                    assert registry.flush_fails == 0
+                    assert await rows() == [("onebot", "1", "a"), ("onebot", "2", "b"), ("onebot", "3", "c")]
+
+                    # 改名为其他机器人下已占用的用户名同样跳过
+                    registry.add_user("qqgroup", "4", "10001", "x", None)
+                    registry.add_user("onebot", "4", "10001", "y", None)
+                    await registry.flush()
+                    registry.add_user("onebot", "4", "10001", "x", None)
+                    await registry.flush()
+                    assert registry.conflicts == 3
+                    assert ("onebot", "4", "y") in await rows()
+                    await registry.close()
+                finally:
+                    await engine.dispose()
+
+    asyncio.run(main())